@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import array
 import collections
+import concurrent.futures
+import contextlib
 import functools
 import logging
 import random
@@ -8,7 +11,7 @@ import secrets
 import warnings
 from argparse import Namespace
 from collections import Counter, deque, defaultdict
-from collections.abc import Callable, Collection, Iterable, Iterator, Mapping, MutableSequence, Set
+from collections.abc import Callable, Collection, Iterable, Iterator, Mapping, MutableMapping, MutableSequence, Set
 from enum import IntEnum, IntFlag
 from typing import (AbstractSet, Any, ClassVar, Dict, List, Literal, NamedTuple,
                     Optional, Protocol, Tuple, Union, TYPE_CHECKING, overload)
@@ -99,6 +102,11 @@ class MultiWorld():
 
     game: Dict[int, str]
 
+    sweep_executor: Optional[concurrent.futures.Executor] = None
+    """If set, the locations of different players are checked concurrently on this executor during sweeps."""
+    profiler: Optional[Utils.GenerationProfiler] = None
+    """If set, generation stages and world calls are recorded to it."""
+
     random: random.Random
     per_slot_randoms: Utils.DeprecateDict[int, random.Random]
     """Deprecated. Please use `self.random` instead."""
@@ -402,6 +410,12 @@ class MultiWorld():
     def get_name_string_for_object(self, obj: HasNameAndPlayer) -> str:
         return obj.name if self.players == 1 else f'{obj.name} ({self.get_player_name(obj.player)})'
 
+    def profile_stage(self, name: str) -> contextlib.AbstractContextManager[None]:
+        """Records the code run in this context as a generation stage, if a profiler is set."""
+        if self.profiler:
+            return self.profiler.stage(name)
+        return contextlib.nullcontext()
+
     def get_player_name(self, player: int) -> str:
         return self.player_name[player]
 
@@ -687,9 +701,18 @@ class MultiWorld():
 
         while locations:
             sphere: List[Location] = []
-            for n in range(len(locations) - 1, -1, -1):
-                if locations[n].can_reach(state):
-                    sphere.append(locations.pop(n))
+            if self.sweep_executor is None:
+                for n in range(len(locations) - 1, -1, -1):
+                    if locations[n].can_reach(state):
+                        sphere.append(locations.pop(n))
+            else:
+                locations_per_player: Dict[int, List[Location]] = defaultdict(list)
+                for location in reversed(locations):
+                    locations_per_player[location.player].append(location)
+                locations = []
+                for reachable, unreachable in state.partition_reachable_locations(list(locations_per_player.items())):
+                    sphere += reachable
+                    locations += unreachable
 
             if not sphere:
                 if __debug__:
@@ -719,8 +742,79 @@ class MultiWorld():
 PathValue = Tuple[str, Optional["PathValue"]]
 
 
+class ItemCounts(MutableMapping[str, int]):
+    """
+    Compact item counter of a single player, used in CollectionState.prog_items for worlds that set
+    World.compact_item_counts. Items of the world are counted in an array indexed by World.item_name_to_index, any other
+    names, such as events, in a dict. Counts are read, written and deleted by item name like a Counter, returning 0 for
+    missing items, but indexed items are only contained while their count is not 0.
+    """
+    __slots__ = ("item_name_to_index", "counts", "other_counts")
+
+    item_name_to_index: Mapping[str, int]
+    counts: array.array[int]
+    other_counts: Dict[str, int]
+
+    def __init__(self, item_name_to_index: Mapping[str, int]) -> None:
+        self.item_name_to_index = item_name_to_index
+        self.counts = array.array("i", bytes(4 * len(item_name_to_index)))
+        self.other_counts = {}
+
+    def __getitem__(self, item: str) -> int:
+        index = self.item_name_to_index.get(item)
+        if index is None:
+            return self.other_counts.get(item, 0)
+        return self.counts[index]
+
+    def __setitem__(self, item: str, count: int) -> None:
+        index = self.item_name_to_index.get(item)
+        if index is None:
+            self.other_counts[item] = count
+        else:
+            self.counts[index] = count
+
+    def __delitem__(self, item: str) -> None:
+        index = self.item_name_to_index.get(item)
+        if index is None:
+            self.other_counts.pop(item, None)  # missing items are ignored, like Counter does
+        else:
+            self.counts[index] = 0
+
+    def __contains__(self, item: object) -> bool:
+        index = self.item_name_to_index.get(item)  # type: ignore[call-overload]
+        if index is None:
+            return item in self.other_counts
+        return self.counts[index] != 0
+
+    def __iter__(self) -> Iterator[str]:
+        counts = self.counts
+        for item, index in self.item_name_to_index.items():
+            if counts[index]:
+                yield item
+        yield from self.other_counts
+
+    def __len__(self) -> int:
+        return len(self.counts) - self.counts.count(0) + len(self.other_counts)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({dict(self.items())})"
+
+    def get(self, item: str, default: Any = None) -> Any:
+        return self[item] if item in self else default
+
+    def copy(self) -> ItemCounts:
+        new = ItemCounts.__new__(ItemCounts)
+        new.item_name_to_index = self.item_name_to_index
+        new.counts = self.counts[:]
+        new.other_counts = self.other_counts.copy()
+        return new
+
+    def total(self) -> int:
+        return sum(self.counts) + sum(self.other_counts.values())
+
+
 class CollectionState():
-    prog_items: Dict[int, Counter[str]]
+    prog_items: Dict[int, Union[Counter[str], ItemCounts]]
     multiworld: MultiWorld
     reachable_regions: Dict[int, Set[Region]]
     blocked_connections: Dict[int, Set[Entrance]]
@@ -728,14 +822,25 @@ class CollectionState():
     path: Dict[Union[Region, Entrance], PathValue]
     locations_checked: Set[Location]
     """Internal cache for Advancement Locations already checked by this CollectionState. Not for use in logic."""
-    stale: Dict[int, bool]
+    stale: Dict[int, Union[bool, Set[str]]]
+    """Per player, True if all blocked connections have to be rechecked, or the names of the items that changed since
+    the last region accessibility update. Falsy if the player's reachable regions are up to date."""
     allow_partial_entrances: bool
+    shared_players: Set[int]
+    """Players whose per-player containers are shared with other states through a copy-on-write copy."""
     additional_init_functions: List[Callable[[CollectionState, MultiWorld], None]] = []
     additional_copy_functions: List[Callable[[CollectionState, CollectionState], CollectionState]] = []
+    additional_own_functions: List[Callable[[CollectionState, int], None]] = []
 
     def __init__(self, parent: MultiWorld, allow_partial_entrances: bool = False):
         assert parent.worlds, "CollectionState created without worlds initialized in parent"
-        self.prog_items = {player: Counter() for player in parent.get_all_ids()}
+        self.prog_items = {}
+        for player in parent.get_all_ids():
+            world = parent.worlds.get(player)
+            if world and world.compact_item_counts:
+                self.prog_items[player] = ItemCounts(world.item_name_to_index)
+            else:
+                self.prog_items[player] = Counter()
         self.multiworld = parent
         self.reachable_regions = {player: set() for player in parent.get_all_ids()}
         self.blocked_connections = {player: set() for player in parent.get_all_ids()}
@@ -744,6 +849,7 @@ class CollectionState():
         self.locations_checked = set()
         self.stale = {player: True for player in parent.get_all_ids()}
         self.allow_partial_entrances = allow_partial_entrances
+        self.shared_players = set()
         for function in self.additional_init_functions:
             function(self, parent)
         for items in parent.precollected_items.values():
@@ -751,16 +857,31 @@ class CollectionState():
                 self.collect(item, True)
 
     def update_reachable_regions(self, player: int):
+        if player in self.shared_players:
+            self.own_player(player)
+        changed_items = self.stale[player]
         self.stale[player] = False
         world: AutoWorld.World = self.multiworld.worlds[player]
         reachable_regions = self.reachable_regions[player]
-        queue = deque(self.blocked_connections[player])
+        blocked_connections = self.blocked_connections[player]
+        if changed_items is True or not changed_items or not world.incremental_reachability:
+            # a direct call on an up to date player still rechecks everything, as callers may have blocked
+            # connections by hand
+            queue = deque(blocked_connections)
+        else:
+            # only connections whose rules could be affected by the changed items can have become reachable
+            get_dependencies = world.get_entrance_item_dependencies
+            queue = deque()
+            for connection in blocked_connections:
+                dependencies = get_dependencies(connection)
+                if dependencies is None or not dependencies.isdisjoint(changed_items):
+                    queue.append(connection)
         start: Region = world.get_region(world.origin_region_name)
 
         # init on first call - this can't be done on construction since the regions don't exist yet
         if start not in reachable_regions:
             reachable_regions.add(start)
-            self.blocked_connections[player].update(start.exits)
+            blocked_connections.update(start.exits)
             queue.extend(start.exits)
 
         if world.explicit_indirect_conditions:
@@ -796,6 +917,7 @@ class CollectionState():
                     queue.extend(relevant_entrances)
 
     def _update_reachable_regions_auto_indirect_conditions(self, player: int, queue: deque[Entrance]):
+        world: AutoWorld.World = self.multiworld.worlds[player]
         reachable_regions = self.reachable_regions[player]
         blocked_connections = self.blocked_connections[player]
         new_connection: bool = True
@@ -817,17 +939,42 @@ class CollectionState():
                     queue.extend(new_region.exits)
                     self.path[new_region] = (new_region.name, self.path.get(connection, None))
                     new_connection = True
-                    self.multiworld.worlds[player].reached_region(self, new_region)
+                    world.reached_region(self, new_region)
             # sweep for indirect connections, mostly Entrance.can_reach(unrelated_Region)
-            queue.extend(blocked_connections)
+            if world.incremental_reachability:
+                # connections that only depend on items have already been checked against the current items
+                get_dependencies = world.get_entrance_item_dependencies
+                queue.extend(connection for connection in blocked_connections
+                             if get_dependencies(connection) is None)
+            else:
+                queue.extend(blocked_connections)
 
-    def copy(self) -> CollectionState:
+    def copy(self, copy_on_write: bool = False) -> CollectionState:
+        """
+        Creates a copy of this state.
+
+        :param copy_on_write: Share each player's items and region caches between both states until one of them
+        changes that player's items. Shared containers must not be modified directly, only through collect, remove or
+        the item methods of CollectionState, or after calling own_player.
+        """
         ret = CollectionState(self.multiworld)
-        ret.prog_items = {player: counter.copy() for player, counter in self.prog_items.items()}
-        ret.reachable_regions = {player: region_set.copy() for player, region_set in
-                                 self.reachable_regions.items()}
-        ret.blocked_connections = {player: entrance_set.copy() for player, entrance_set in
-                                   self.blocked_connections.items()}
+        if self.multiworld.profiler:
+            self.multiworld.profiler.count_state_copy()
+        if copy_on_write:
+            self.shared_players.update(self.prog_items)
+            ret.shared_players = set(self.prog_items)
+            ret.prog_items = self.prog_items.copy()
+            ret.reachable_regions = self.reachable_regions.copy()
+            ret.blocked_connections = self.blocked_connections.copy()
+            # the shared region caches are only as up to date as this state's
+            ret.stale = {player: stale if isinstance(stale, bool) else stale.copy()
+                         for player, stale in self.stale.items()}
+        else:
+            ret.prog_items = {player: counter.copy() for player, counter in self.prog_items.items()}
+            ret.reachable_regions = {player: region_set.copy() for player, region_set in
+                                     self.reachable_regions.items()}
+            ret.blocked_connections = {player: entrance_set.copy() for player, entrance_set in
+                                       self.blocked_connections.items()}
         ret.advancements = self.advancements.copy()
         ret.path = self.path.copy()
         ret.locations_checked = self.locations_checked.copy()
@@ -836,6 +983,19 @@ class CollectionState():
             ret = function(self, ret)
         return ret
 
+    def own_player(self, player: int) -> None:
+        """
+        Stops sharing a player's containers with other states after a copy-on-write copy, so they can be modified.
+
+        :param player: The player whose containers are about to be modified.
+        """
+        self.shared_players.discard(player)
+        self.prog_items[player] = self.prog_items[player].copy()
+        self.reachable_regions[player] = self.reachable_regions[player].copy()
+        self.blocked_connections[player] = self.blocked_connections[player].copy()
+        for function in self.additional_own_functions:
+            function(self, player)
+
     def can_reach(self,
                   spot: Union[Location, Entrance, Region, str],
                   resolution_hint: Optional[str] = None,
@@ -874,6 +1034,7 @@ class CollectionState():
         """
         all_players = {player for player, _ in advancements_per_player}
         players_to_check = all_players
+        parallel = self.multiworld.sweep_executor is not None
         # As an optimization, it is assumed that each player's world only logically depends on itself. However, worlds
         # are allowed to logically depend on other worlds, so once there are no more players that should be checked
         # under this assumption, an extra sweep iteration is performed that checks every player, to confirm that the
@@ -883,6 +1044,13 @@ class CollectionState():
             next_advancements_per_player: List[Tuple[int, List[Location]]] = []
             next_players_to_check = set()
 
+            if parallel:
+                # Players' locations are checked concurrently before any items are collected, then the items are
+                # collected in the same player order as in a sequential sweep, so the result stays deterministic.
+                partitioned_locations = iter(self.partition_reachable_locations(
+                    [(player, locations) for player, locations in advancements_per_player
+                     if player in players_to_check]))
+
             for player, locations in advancements_per_player:
                 if player not in players_to_check:
                     next_advancements_per_player.append((player, locations))
@@ -890,16 +1058,23 @@ class CollectionState():
 
                 # Accessibility of each location is checked first because a player's region accessibility cache becomes
                 # stale whenever one of their own items is collected into the state.
-                reachable_locations: List[Location] = []
-                unreachable_locations: List[Location] = []
-                for location in locations:
-                    if location.can_reach(self):
-                        # Locations containing items that do not belong to `player` could be collected immediately
-                        # because they won't stale `player`'s region accessibility cache, but, for simplicity, all the
-                        # items at reachable locations are collected in a single loop.
-                        reachable_locations.append(location)
-                    else:
-                        unreachable_locations.append(location)
+                reachable_locations: List[Location]
+                unreachable_locations: List[Location]
+                if parallel:
+                    reachable_locations, unreachable_locations = next(partitioned_locations)
+                    if player in next_players_to_check and unreachable_locations:
+                        # Items of `player` were collected after their locations were checked concurrently, so their
+                        # unreachable locations are checked again, to end up where a sequential sweep would.
+                        newly_reachable, unreachable_locations = self._partition_reachable_locations(
+                            unreachable_locations)
+                        if newly_reachable:
+                            reachable = {*reachable_locations, *newly_reachable}
+                            reachable_locations = [location for location in locations if location in reachable]
+                else:
+                    # Locations containing items that do not belong to `player` could be collected immediately because
+                    # they won't stale `player`'s region accessibility cache, but, for simplicity, all the items at
+                    # reachable locations are collected in a single loop.
+                    reachable_locations, unreachable_locations = self._partition_reachable_locations(locations)
                 if unreachable_locations:
                     next_advancements_per_player.append((player, unreachable_locations))
 
@@ -939,6 +1114,46 @@ class CollectionState():
             if yield_each_sweep:
                 yield
 
+    def _partition_reachable_locations(self, locations: Iterable[Location]) -> Tuple[List[Location], List[Location]]:
+        reachable_locations: List[Location] = []
+        unreachable_locations: List[Location] = []
+        for location in locations:
+            if location.can_reach(self):
+                reachable_locations.append(location)
+            else:
+                unreachable_locations.append(location)
+        return reachable_locations, unreachable_locations
+
+    def partition_reachable_locations(self, locations_per_player: List[Tuple[int, List[Location]]]
+                                      ) -> List[Tuple[List[Location], List[Location]]]:
+        """
+        Splits each player's locations into the locations that are reachable and unreachable in this state, checking
+        the players whose worlds declare thread_safe_rules concurrently on the multiworld's sweep_executor if it is
+        set. The state must not be modified until this returns.
+
+        :param locations_per_player: The locations to check, grouped by player.
+        :return: A tuple of reachable and unreachable locations for each entry of locations_per_player, in order.
+        """
+        executor = self.multiworld.sweep_executor
+        # Only the locations of worlds declaring thread_safe_rules are checked concurrently, the others are checked on
+        # this thread afterwards, so their rules never run alongside another thread.
+        concurrent = [index for index, (player, _) in enumerate(locations_per_player)
+                      if self.multiworld.worlds[player].thread_safe_rules]
+        if executor is None or len(concurrent) < 2:
+            return [self._partition_reachable_locations(locations) for _, locations in locations_per_player]
+        # Access rules may check the regions of other players, so every region cache is updated up front instead of
+        # letting several threads update the same player's cache.
+        for player, stale in self.stale.items():
+            if stale:
+                self.update_reachable_regions(player)
+        partitions: List[Optional[Tuple[List[Location], List[Location]]]] = [None] * len(locations_per_player)
+        concurrent_partitions = executor.map(self._partition_reachable_locations,
+                                             [locations_per_player[index][1] for index in concurrent])
+        for index, partition in zip(concurrent, concurrent_partitions):
+            partitions[index] = partition
+        return [partition or self._partition_reachable_locations(locations)
+                for partition, (_, locations) in zip(partitions, locations_per_player)]
+
     @overload
     def sweep_for_advancements(self, locations: Optional[Iterable[Location]] = None, *,
                                yield_each_sweep: Literal[True],
@@ -996,14 +1211,29 @@ class CollectionState():
 
     # item name related
     def has(self, item: str, player: int, count: int = 1) -> bool:
-        return self.prog_items[player][item] >= count
+        player_prog_items = self.prog_items[player]
+        if player_prog_items.__class__ is ItemCounts:
+            index = player_prog_items.item_name_to_index.get(item)
+            if index is not None:
+                return player_prog_items.counts[index] >= count
+        return player_prog_items[item] >= count
 
     # for loops are specifically used in all/any/count methods, instead of all()/any()/sum(), to avoid the overhead of
     # creating and iterating generator instances. In `return all(player_prog_items[item] for item in items)`, the
     # argument to all() would be a new generator instance, for example.
+    # ItemCounts are read by index directly, instead of through ItemCounts.__getitem__ for each item.
     def has_all(self, items: Iterable[str], player: int) -> bool:
         """Returns True if each item name of items is in state at least once."""
         player_prog_items = self.prog_items[player]
+        if player_prog_items.__class__ is ItemCounts:
+            get_index = player_prog_items.item_name_to_index.get
+            counts = player_prog_items.counts
+            other_counts = player_prog_items.other_counts
+            for item in items:
+                index = get_index(item)
+                if not (other_counts.get(item) if index is None else counts[index]):
+                    return False
+            return True
         for item in items:
             if not player_prog_items[item]:
                 return False
@@ -1012,6 +1242,15 @@ class CollectionState():
     def has_any(self, items: Iterable[str], player: int) -> bool:
         """Returns True if at least one item name of items is in state at least once."""
         player_prog_items = self.prog_items[player]
+        if player_prog_items.__class__ is ItemCounts:
+            get_index = player_prog_items.item_name_to_index.get
+            counts = player_prog_items.counts
+            other_counts = player_prog_items.other_counts
+            for item in items:
+                index = get_index(item)
+                if other_counts.get(item) if index is None else counts[index]:
+                    return True
+            return False
         for item in items:
             if player_prog_items[item]:
                 return True
@@ -1042,6 +1281,16 @@ class CollectionState():
             return True
         found: int = 0
         player_prog_items = self.prog_items[player]
+        if player_prog_items.__class__ is ItemCounts:
+            get_index = player_prog_items.item_name_to_index.get
+            counts = player_prog_items.counts
+            other_counts = player_prog_items.other_counts
+            for item_name in items:
+                index = get_index(item_name)
+                found += other_counts.get(item_name, 0) if index is None else counts[index]
+                if found >= count:
+                    return True
+            return False
         for item_name in items:
             found += player_prog_items[item_name]
             if found >= count:
@@ -1108,6 +1357,14 @@ class CollectionState():
     def count_group(self, item_name_group: str, player: int) -> int:
         """Returns the cumulative count of items from an item group present in state."""
         player_prog_items = self.prog_items[player]
+        if player_prog_items.__class__ is ItemCounts:
+            indices = self.multiworld.worlds[player].item_name_group_indices.get(item_name_group)
+            if indices is not None:
+                counts = player_prog_items.counts
+                total = 0
+                for index in indices:
+                    total += counts[index]
+                return total
         return sum(
             player_prog_items[item_name]
             for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]
@@ -1127,10 +1384,11 @@ class CollectionState():
         if location:
             self.locations_checked.add(location)
 
+        if item.player in self.shared_players:
+            self.own_player(item.player)
+        self.mark_stale(item.name, item.player)
         changed = self.multiworld.worlds[item.player].collect(self, item)
 
-        self.stale[item.player] = True
-
         if changed and not prevent_sweep:
             self.sweep_for_advancements()
 
@@ -1145,9 +1403,14 @@ class CollectionState():
         :param count: How many of the item to add.
         """
         assert count > 0
+        if player in self.shared_players:
+            self.own_player(player)
         self.prog_items[player][item] += count
+        self.mark_stale(item, player)
 
     def remove(self, item: Item):
+        if item.player in self.shared_players:
+            self.own_player(item.player)
         changed = self.multiworld.worlds[item.player].remove(self, item)
         if changed:
             # invalidate caches, nothing can be trusted anymore now
@@ -1164,9 +1427,12 @@ class CollectionState():
         :param count: How many of the item to remove.
         """
         assert count > 0
+        if player in self.shared_players:
+            self.own_player(player)
         self.prog_items[player][item] -= count
         if self.prog_items[player][item] < 1:
             del (self.prog_items[player][item])
+        self.mark_stale(item, player)
 
     def set_item(self, item: str, player: int, count: int) -> None:
         """
@@ -1177,10 +1443,26 @@ class CollectionState():
         :param count: How many of the item to now have.
         """
         assert count >= 0
+        if player in self.shared_players:
+            self.own_player(player)
         if count == 0:
             del (self.prog_items[player][item])
         else:
             self.prog_items[player][item] = count
+        self.mark_stale(item, player)
+
+    def mark_stale(self, item: str, player: int) -> None:
+        """
+        Marks the player's reachable regions as needing an update because the item changed in state.
+
+        :param item: The name of the item that changed.
+        :param player: The player the item is for.
+        """
+        stale = self.stale[player]
+        if not stale:
+            self.stale[player] = {item}
+        elif stale is not True:
+            stale.add(item)
 
 
 CollectionRule = Callable[[CollectionState], bool]
@@ -1730,7 +2012,8 @@ class Spoiler:
 
             sphere_candidates -= sphere
             collection_spheres.append(sphere)
-            state_cache.append(state.copy())
+            # checkpoints only duplicate the containers of players that change afterwards
+            state_cache.append(state.copy(copy_on_write=True))
 
             logging.debug('Calculated sphere %i, containing %i of %i progress items.', len(collection_spheres),
                           len(sphere),
@@ -1750,21 +2033,38 @@ class Spoiler:
         # in the second phase, we cull each sphere such that the game is still beatable,
         # reducing each range of influence to the bare minimum required inside it
         required_locations = {location for sphere in collection_spheres for location in sphere}
+
+        def cull(locations: List[Location], num: int) -> bool:
+            # Removes the locations that are not required to beat the game from sphere num on, with the same result as
+            # checking them one at a time in order, and returns whether all of them were removed.
+            # Removing locations only makes beating the game harder, so if the game can be beaten without all of them,
+            # checking them one at a time would have succeeded for each of them as well. Otherwise, bisect.
+            # We remove the locations from required_locations to sweep from, and check if the game is still beatable.
+            required_locations.difference_update(locations)
+            logging.debug('Checking if %i items, starting with %s (Player %d), are required to beat the game.',
+                          len(locations), locations[0].item.name, locations[0].item.player)
+            if multiworld.can_beat_game(state_cache[num], required_locations):
+                return True
+            # still required, got to keep them around
+            required_locations.update(locations)
+            if len(locations) > 1:
+                half = len(locations) // 2
+                cull(locations[:half], num)
+                cull(locations[half:], num)
+            return False
+
         for num, sphere in reversed(tuple(enumerate(collection_spheres))):
-            to_delete: Set[Location] = set()
-            for location in sphere:
-                # we remove the location from required_locations to sweep from, and check if the game is still beatable
-                logging.debug('Checking if %s (Player %d) is required to beat the game.', location.item.name,
-                              location.item.player)
-                required_locations.remove(location)
-                if multiworld.can_beat_game(state_cache[num], required_locations):
-                    to_delete.add(location)
-                else:
-                    # still required, got to keep it around
-                    required_locations.add(location)
+            # copies of the same item tend to be unneeded together, so check growing runs of them at once while they are
+            sphere_locations = sorted(sphere, key=lambda location: (location.item.player, location.item.name, location))
+            block_size = 1
+            while sphere_locations:
+                block, sphere_locations = sphere_locations[:block_size], sphere_locations[block_size:]
+                block_size = block_size * 2 if cull(block, num) else 1
 
             # cull entries in spheres for spoiler walkthrough at end
-            sphere -= to_delete
+            sphere &= required_locations
+            # later spheres are done, so their checkpoint is no longer needed
+            state_cache[num + 1] = None
 
         # second phase, sphere 0
         removed_precollected: List[Item] = []
@@ -1870,6 +2170,14 @@ class Spoiler:
                 display_name = getattr(option_obj, "display_name", option_key)
                 outfile.write(f"{display_name + ':':33}{res.current_option_name}\n")
 
+        def write_lines(lines: Iterable[str]) -> None:
+            # writes one line at a time instead of joining all of them in memory first
+            separator = ""
+            for line in lines:
+                outfile.write(separator)
+                outfile.write(line)
+                separator = "\n"
+
         with open(filename, 'w', encoding="utf-8-sig") as outfile:
             outfile.write(
                 'Archipelago Version %s  -  Seed: %s\n\n' % (
@@ -1913,16 +2221,14 @@ class Spoiler:
                 outfile.write("\n\nStarting Items:\n\n")
                 outfile.write("\n".join([item for item in precollected_items]))
 
-            locations = [(str(location), str(location.item) if location.item is not None else "Nothing")
-                         for location in self.multiworld.get_locations() if location.show_in_spoiler]
             outfile.write('\n\nLocations:\n\n')
-            outfile.write('\n'.join(
-                ['%s: %s' % (location, item) for location, item in locations]))
+            write_lines('%s: %s' % (location, location.item if location.item is not None else "Nothing")
+                        for location in self.multiworld.get_locations() if location.show_in_spoiler)
 
             outfile.write('\n\nPlaythrough:\n\n')
-            outfile.write('\n'.join(['%s: {\n%s\n}' % (sphere_nr, '\n'.join(
+            write_lines('%s: {\n%s\n}' % (sphere_nr, '\n'.join(
                 [f"  {location}: {item}" for (location, item) in sphere.items()] if isinstance(sphere, dict) else
-                [f"  {item}" for item in sphere])) for (sphere_nr, sphere) in self.playthrough.items()]))
+                [f"  {item}" for item in sphere])) for (sphere_nr, sphere) in self.playthrough.items())
             if self.unreachables:
                 outfile.write('\n\nUnreachable Progression Items:\n\n')
                 outfile.write(
@@ -1931,17 +2237,18 @@ class Spoiler:
 
             if self.paths:
                 outfile.write('\n\nPaths:\n\n')
-                path_listings: List[str] = []
-                for location, path in sorted(self.paths.items()):
-                    path_lines: List[str] = []
-                    for region, exit in path:
-                        if exit is not None:
-                            path_lines.append("{} -> {}".format(region, exit))
-                        else:
-                            path_lines.append(region)
-                    path_listings.append("{}\n        {}".format(location, "\n   =>   ".join(path_lines)))
-
-                outfile.write('\n'.join(path_listings))
+
+                def path_listings() -> Iterator[str]:
+                    for location, path in sorted(self.paths.items()):
+                        path_lines: List[str] = []
+                        for region, exit in path:
+                            if exit is not None:
+                                path_lines.append("{} -> {}".format(region, exit))
+                            else:
+                                path_lines.append(region)
+                        yield "{}\n        {}".format(location, "\n   =>   ".join(path_lines))
+
+                write_lines(path_listings())
             AutoWorld.call_all(self.multiworld, "write_spoiler_end", outfile)
 
 
@@ -25,7 +25,7 @@ from MultiServer import CommandProcessor, mark_raw
 from NetUtils import (Endpoint, decode, NetworkItem, encode, JSONtoTextParser, ClientStatus, Permission, NetworkSlot,
                       RawJSONtoTextParser, add_json_text, add_json_location, add_json_item, JSONTypes, HintStatus, SlotType)
 from Utils import gui_enabled, Version, stream_input, async_start
-from worlds import network_data_package, AutoWorldRegister
+from worlds import get_game_checksum, get_game_data_package, AutoWorldRegister
 import os
 import ssl
 
@@ -425,9 +425,10 @@ class CommonContext:
 
         self.jsontotextparser = JSONtoTextParser(self)
         self.rawjsontotextparser = RawJSONtoTextParser(self)
+        # other games are only looked up once the server tells which games are relevant, see prepare_data_package
         if self.game:
-            self.checksums[self.game] = network_data_package["games"][self.game]["checksum"]
-        self.update_data_package(network_data_package)
+            self.update_game(get_game_data_package(self.game), self.game)
+        self.update_game(get_game_data_package("Archipelago"), "Archipelago")
 
         # execution
         self.keep_alive_task = asyncio.create_task(keep_alive(self), name="Bouncy")
@@ -661,9 +662,9 @@ class CommonContext:
             cached_checksum: typing.Optional[str] = self.checksums.get(game)
             # no action required if cached version is new enough
             if remote_checksum != cached_checksum:
-                local_checksum: typing.Optional[str] = network_data_package["games"].get(game, {}).get("checksum")
+                local_checksum: typing.Optional[str] = get_game_checksum(game)
                 if remote_checksum == local_checksum:
-                    self.update_game(network_data_package["games"][game], game)
+                    self.update_game(get_game_data_package(game), game)
                 else:
                     cached_game = Utils.load_data_package_for_checksum(game, remote_checksum)
                     cache_checksum: typing.Optional[str] = cached_game.get("checksum")
@@ -1,5 +1,5 @@
 from collections import Counter, defaultdict, deque
-from collections.abc import Iterable, Sequence
+from collections.abc import Iterable, Iterator, Sequence
 import itertools
 import logging
 from typing import Callable, Literal
@@ -28,7 +28,7 @@ def _log_fill_progress(name: str, placed: int, total_items: int) -> None:
 def sweep_from_pool(base_state: CollectionState,
                     itempool: Sequence[Item] = (),
                     locations: Iterable[Location] | None = None) -> CollectionState:
-    new_state = base_state.copy()
+    new_state = base_state.copy(copy_on_write=True)
     for item in itempool:
         new_state.collect(item, True)
     new_state.sweep_for_advancements(locations=locations)
@@ -53,6 +53,16 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     :param allow_excluded: if true and placement fails, it is re-attempted while ignoring excluded on Locations
     :param name: name of this fill step for progress logging purposes
     """
+    with multiworld.profile_stage(f"fill_restrictive {name}"):
+        _fill_restrictive(multiworld, base_state, locations, item_pool, single_player_placement, lock, swap, on_place,
+                          allow_partial, allow_excluded, one_item_per_player, name)
+
+
+def _fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locations: list[Location],
+                      item_pool: list[Item], single_player_placement: bool = False, lock: bool = False,
+                      swap: bool = True, on_place: Callable[[Location], None] | None = None,
+                      allow_partial: bool = False, allow_excluded: bool = False, one_item_per_player: bool = True,
+                      name: str = "Unknown") -> None:
     unplaced_items: list[Item] = []
     placements: list[Location] = []
     cleanup_required = False
@@ -746,6 +756,46 @@ def flood_items(multiworld: MultiWorld) -> None:
                 break
 
 
+class LocationBitset:
+    """
+    Assigns dense indices to a fixed sequence of locations, so that sets of them can be stored as int bitsets.
+    Bit i of a mask is set if `locations[i]` is part of the set.
+    """
+    locations: list[Location]
+    index: dict[Location, int]
+    all: int
+
+    def __init__(self, locations: Iterable[Location]) -> None:
+        self.locations = list(locations)
+        self.index = {location: i for i, location in enumerate(self.locations)}
+        self.all = (1 << len(self.locations)) - 1
+
+    def mask(self, locations: Iterable[Location]) -> int:
+        # building the binary literal is linear, while or-ing single bits into a big int is quadratic
+        bits = bytearray(b"0" * (len(self.locations) + 1))
+        for location in locations:
+            bits[-1 - self.index[location]] = ord("1")
+        return int(bits, 2)
+
+    def indices(self, mask: int) -> Iterator[int]:
+        # reversed binary literal without the "0b" prefix, so that bit i is at position i
+        bits = bin(mask)[:1:-1]
+        i = bits.find("1")
+        while i != -1:
+            yield i
+            i = bits.find("1", i + 1)
+
+    def iter(self, mask: int) -> Iterator[Location]:
+        return map(self.locations.__getitem__, self.indices(mask))
+
+    def filter(self, mask: int, predicate: Callable[[Location], bool]) -> int:
+        bits = bytearray(b"0" * (len(self.locations) + 1))
+        for i in self.indices(mask):
+            if predicate(self.locations[i]):
+                bits[-1 - i] = ord("1")
+        return int(bits, 2)
+
+
 def balance_multiworld_progression(multiworld: MultiWorld) -> None:
     # A system to reduce situations where players have no checks remaining, popularly known as "BK mode."
     # Overall progression balancing algorithm:
@@ -764,14 +814,22 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
         logging.info(f"Balancing multiworld progression for {len(balanceable_players)} Players.")
         logging.debug(balanceable_players)
         state: CollectionState = CollectionState(multiworld)
-        checked_locations: set[Location] = set()
-        unchecked_locations: set[Location] = set(multiworld.get_locations())
-
-        total_locations_count: Counter[int] = Counter(
-            location.player
-            for location in multiworld.get_locations()
-            if not location.locked
-        )
+        # location sets are kept as bitsets over the multiworld's locations, see LocationBitset
+        bitset = LocationBitset(multiworld.get_locations())
+        checked_locations: int = 0
+        unchecked_locations: int = bitset.all
+        unlocked_mask: int = bitset.mask(location for location in bitset.locations if not location.locked)
+        player_locations: dict[int, list[Location]] = defaultdict(list)
+        for location in bitset.locations:
+            player_locations[location.player].append(location)
+        player_masks: dict[int, int] = {player: bitset.mask(locations)
+                                        for player, locations in player_locations.items()}
+
+        total_locations_count: Counter[int] = Counter({
+            player: (mask & unlocked_mask).bit_count()
+            for player, mask in player_masks.items()
+            if mask & unlocked_mask
+        })
         reachable_locations_count: dict[int, int] = {
             player: 0
             for player in multiworld.player_ids
@@ -785,9 +843,14 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
         sphere_num: int = 1
         moved_item_count: int = 0
 
-        def get_sphere_locations(sphere_state: CollectionState,
-                                 locations: set[Location]) -> set[Location]:
-            return {loc for loc in locations if sphere_state.can_reach(loc)}
+        def get_sphere_locations(sphere_state: CollectionState, locations: int) -> int:
+            return bitset.filter(locations, sphere_state.can_reach)
+
+        def count_reachable(reachables: dict[int, int], sphere: int) -> None:
+            sphere &= unlocked_mask
+            if sphere:
+                for player in reachables:
+                    reachables[player] += (sphere & player_masks[player]).bit_count()
 
         def item_percentage(player: int, num: int) -> float:
             return num / total_locations_count[player]
@@ -801,10 +864,8 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
             # This ensures that only shuffled locations get counted for progression balancing,
             #   i.e. the items the players will be checking.
             sphere_locations = get_sphere_locations(state, unchecked_locations)
-            for location in sphere_locations:
-                unchecked_locations.remove(location)
-                if not location.locked:
-                    reachable_locations_count[location.player] += 1
+            unchecked_locations &= ~sphere_locations
+            count_reachable(reachable_locations_count, sphere_locations)
 
             logging.debug(f"Sphere {sphere_num}")
             logging.debug(f"Reachable locations: {reachable_locations_count}")
@@ -831,13 +892,13 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                 }
                 if balancing_players:
                     balancing_state = state.copy()
-                    balancing_unchecked_locations = unchecked_locations.copy()
+                    balancing_unchecked_locations = unchecked_locations
                     balancing_reachables = reachable_locations_count.copy()
-                    balancing_sphere = sphere_locations.copy()
+                    balancing_sphere = sphere_locations
                     candidate_items: dict[int, set[Location]] = defaultdict(set)
                     while True:
                         # Check locations in the current sphere and gather progression items to swap earlier
-                        for location in balancing_sphere:
+                        for location in bitset.iter(balancing_sphere):
                             if location.advancement:
                                 balancing_state.collect(location.item, True, location)
                                 player = location.item.player
@@ -849,10 +910,8 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                                     candidate_items[player].add(location)
                                     logging.debug(f"Candidate item: {location.name}, {location.item.name}")
                         balancing_sphere = get_sphere_locations(balancing_state, balancing_unchecked_locations)
-                        for location in balancing_sphere:
-                            balancing_unchecked_locations.remove(location)
-                            if not location.locked:
-                                balancing_reachables[location.player] += 1
+                        balancing_unchecked_locations &= ~balancing_sphere
+                        count_reachable(balancing_reachables, balancing_sphere)
                         if multiworld.has_beaten_game(balancing_state) or all(
                                 item_percentage(player, reachables) >= threshold_percentages[player]
                                 for player, reachables in balancing_reachables.items()
@@ -861,13 +920,11 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                         elif not balancing_sphere:
                             raise RuntimeError("Not all required items reachable. Something went terribly wrong here.")
                     # Gather a set of locations which we can swap items into
-                    unlocked_locations: dict[int, set[Location]] = defaultdict(set)
-                    for l in unchecked_locations:
-                        if l not in balancing_unchecked_locations:
-                            unlocked_locations[l.player].add(l)
+                    unlocked_locations = unchecked_locations & ~balancing_unchecked_locations
                     items_to_replace: list[Location] = []
                     for player in balancing_players:
-                        locations_to_test = unlocked_locations[player]
+                        locations_to_test = unlocked_locations & player_masks.get(player, 0)
+                        sweep_locations = list(bitset.iter(locations_to_test))
                         items_to_test = list(candidate_items[player])
                         items_to_test.sort()
                         multiworld.random.shuffle(items_to_test)
@@ -880,14 +937,15 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                             ), items_to_test):
                                 reducing_state.collect(location.item, True, location)
 
-                            reducing_state.sweep_for_advancements(locations=locations_to_test)
+                            reducing_state.sweep_for_advancements(locations=sweep_locations)
 
                             if multiworld.has_beaten_game(balancing_state):
                                 if not multiworld.has_beaten_game(reducing_state):
                                     items_to_replace.append(testing)
                             else:
                                 reduced_sphere = get_sphere_locations(reducing_state, locations_to_test)
-                                p = item_percentage(player, reachable_locations_count[player] + len(reduced_sphere))
+                                p = item_percentage(player,
+                                                    reachable_locations_count[player] + reduced_sphere.bit_count())
                                 if p < threshold_percentages[player]:
                                     items_to_replace.append(testing)
 
@@ -895,7 +953,8 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
 
                     # sort then shuffle to maintain deterministic behaviour,
                     # while allowing use of set for better algorithm growth behaviour elsewhere
-                    replacement_locations = sorted(l for l in checked_locations if not l.advancement and not l.locked)
+                    replacement_locations = sorted(l for l in bitset.iter(checked_locations)
+                                                   if not l.advancement and not l.locked)
                     multiworld.random.shuffle(replacement_locations)
                     items_to_replace.sort()
                     multiworld.random.shuffle(items_to_replace)
@@ -918,14 +977,15 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
 
                     if old_moved_item_count < moved_item_count:
                         logging.debug(f"Moved {moved_item_count} items so far\n")
-                        unlocked = {fresh for player in balancing_players for fresh in unlocked_locations[player]}
-                        for location in get_sphere_locations(state, unlocked):
-                            unchecked_locations.remove(location)
-                            if not location.locked:
-                                reachable_locations_count[location.player] += 1
-                            sphere_locations.add(location)
-
-            for location in sphere_locations:
+                        unlocked = 0
+                        for player in balancing_players:
+                            unlocked |= unlocked_locations & player_masks.get(player, 0)
+                        fresh_locations = get_sphere_locations(state, unlocked)
+                        unchecked_locations &= ~fresh_locations
+                        count_reachable(reachable_locations_count, fresh_locations)
+                        sphere_locations |= fresh_locations
+
+            for location in bitset.iter(sphere_locations):
                 if location.advancement:
                     state.collect(location.item, True, location)
             checked_locations |= sphere_locations
@@ -36,7 +36,10 @@ if __name__ == "__main__":
     init_logging('Launcher')
 
 from worlds.LauncherComponents import Component, components, icon_paths, SuffixIdentifier, Type
-from worlds import failed_world_loads
+from worlds import AutoWorldRegister, failed_world_loads
+
+# worlds add their components when imported
+AutoWorldRegister.world_types.load_all()
 
 
 def open_host_yaml():
@@ -1,7 +1,9 @@
 import collections
-from collections.abc import Mapping
+from collections.abc import Iterator, Mapping
 import concurrent.futures
+import contextlib
 import logging
+import multiprocessing
 import os
 import tempfile
 import time
@@ -15,15 +17,35 @@ from Fill import FillError, balance_multiworld_progression, distribute_items_res
     parse_planned_blocks, distribute_planned_blocks, resolve_early_locations_for_planned
 from NetUtils import convert_to_base_types
 from Options import StartInventoryPool
-from Utils import __version__, output_path, restricted_dumps, version_tuple
+from Utils import GenerationProfiler, __version__, output_path, restricted_dumps, version_tuple
 from settings import get_settings
 from worlds import AutoWorld
 from worlds.generic.Rules import exclusion_rules, locality_rules
 
 __all__ = ["main"]
 
+_output_multiworld: MultiWorld | None = None
+"""The multiworld output is generated for, inherited by forked output processes."""
+
 
 def main(args, seed=None, baked_server_options: dict[str, object] | None = None):
+    sweep_threads = get_settings().generator.sweep_threads
+    sweep_executor = concurrent.futures.ThreadPoolExecutor(sweep_threads, "Sweep") if sweep_threads > 1 else None
+    profiler = GenerationProfiler() if get_settings().generator.profile_generation else None
+    try:
+        return _generate(args, seed, baked_server_options, sweep_executor, profiler)
+    finally:
+        # also shut down when generation fails, so the sweep threads do not outlive it
+        if sweep_executor:
+            sweep_executor.shutdown()
+        # a failed generation is as worth profiling as a successful one
+        if profiler and profiler.report_path:
+            profiler.write()
+            logging.info(f"Wrote generation profile to {profiler.report_path}")
+
+
+def _generate(args, seed, baked_server_options: dict[str, object] | None,
+              sweep_executor: concurrent.futures.Executor | None, profiler: GenerationProfiler | None = None):
     if not baked_server_options:
         baked_server_options = get_settings().server_options.as_dict()
     assert isinstance(baked_server_options, dict)
@@ -49,18 +71,27 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
         dump_player_options(multiworld)
     multiworld.set_item_links()
     multiworld.state = CollectionState(multiworld)
+    multiworld.sweep_executor = sweep_executor
+    if profiler:
+        multiworld.profiler = profiler
+        profiler.report_path = output_path(f"AP_{multiworld.seed_name}_profile.json")
+        profiler.player_names = multiworld.player_name
+        profiler.games = multiworld.game
     logger.info('Archipelago Version %s  -  Seed: %s\n', __version__, multiworld.seed)
 
-    logger.info(f"Found {len(AutoWorld.AutoWorldRegister.world_types)} World Types:")
-    longest_name = max(len(text) for text in AutoWorld.AutoWorldRegister.world_types)
+    # worlds are only imported once needed, so list only the ones used in this multiworld
+    world_types = {game: AutoWorld.AutoWorldRegister.world_types[game]
+                   for game in sorted(set(multiworld.game.values()))}
+    logger.info(f"Using {len(world_types)} World Types:")
+    longest_name = max(len(text) for text in world_types)
 
-    world_classes = AutoWorld.AutoWorldRegister.world_types.values()
+    world_classes = world_types.values()
 
     version_count = max(len(cls.world_version.as_simple_string()) for cls in world_classes)
     item_count = len(str(max(len(cls.item_names) for cls in world_classes)))
     location_count = len(str(max(len(cls.location_names) for cls in world_classes)))
 
-    for name, cls in AutoWorld.AutoWorldRegister.world_types.items():
+    for name, cls in world_types.items():
         if not cls.hidden and len(cls.item_names) > 0:
             logger.info(f" {name:{longest_name}}: "
                         f"v{cls.world_version.as_simple_string():{version_count}} | "
@@ -185,9 +216,10 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
         multiworld._all_state = None
 
     logger.info("Running Item Plando.")
-    resolve_early_locations_for_planned(multiworld)
-    distribute_planned_blocks(multiworld, [x for player in multiworld.plando_item_blocks
-                                           for x in multiworld.plando_item_blocks[player]])
+    with multiworld.profile_stage("item_plando"):
+        resolve_early_locations_for_planned(multiworld)
+        distribute_planned_blocks(multiworld, [x for player in multiworld.plando_item_blocks
+                                               for x in multiworld.plando_item_blocks[player]])
 
     logger.info('Running Pre Main Fill.')
 
@@ -195,15 +227,17 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
     logger.info(f'Filling the multiworld with {len(multiworld.itempool)} items.')
 
-    if multiworld.algorithm == 'flood':
-        flood_items(multiworld)  # different algo, biased towards early game progress items
-    elif multiworld.algorithm == 'balanced':
-        distribute_items_restrictive(multiworld, get_settings().generator.panic_method)
+    with multiworld.profile_stage("main_fill"):
+        if multiworld.algorithm == 'flood':
+            flood_items(multiworld)  # different algo, biased towards early game progress items
+        elif multiworld.algorithm == 'balanced':
+            distribute_items_restrictive(multiworld, get_settings().generator.panic_method)
 
     AutoWorld.call_all(multiworld, 'post_fill')
 
     if multiworld.players > 1 and not args.skip_prog_balancing:
-        balance_multiworld_progression(multiworld)
+        with multiworld.profile_stage("progression_balancing"):
+            balance_multiworld_progression(multiworld)
     else:
         logger.info("Progression balancing skipped.")
 
@@ -215,32 +249,46 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
     if args.skip_output:
         logger.info('Done. Skipped output/spoiler generation. Total Time: %s', time.perf_counter() - start)
+        _finish_generation(multiworld)
         return multiworld
 
     logger.info(f'Beginning output...')
     outfilebase = 'AP_' + multiworld.seed_name
 
     if args.spoiler_only:
-        if args.spoiler > 1:
-            logger.info('Calculating playthrough.')
-            multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
+        with multiworld.profile_stage("spoiler"):
+            if args.spoiler > 1:
+                logger.info('Calculating playthrough.')
+                multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
 
-        multiworld.spoiler.to_file(output_path('%s_Spoiler.txt' % outfilebase))
+            multiworld.spoiler.to_file(output_path('%s_Spoiler.txt' % outfilebase))
         logger.info('Done. Skipped multidata modification. Total time: %s', time.perf_counter() - start)
+        _finish_generation(multiworld)
         return multiworld
 
     output = tempfile.TemporaryDirectory()
     with output as temp_dir:
         output_players = [player for player in multiworld.player_ids if AutoWorld.World.generate_output.__code__
                           is not multiworld.worlds[player].generate_output.__code__]
-        with concurrent.futures.ThreadPoolExecutor(len(output_players) + 2) as pool:
-            check_accessibility_task = pool.submit(multiworld.fulfills_accessibility)
-
-            output_file_futures = [pool.submit(AutoWorld.call_stage, multiworld, "generate_output", temp_dir)]
+        output_processes = get_settings().generator.output_processes
+        process_players: list[int] = []
+        if output_processes > 1 and "fork" in multiprocessing.get_all_start_methods():
+            process_players = [player for player in output_players if multiworld.worlds[player].output_in_process]
+            output_players = [player for player in output_players if player not in process_players]
+        with multiworld.profile_stage("output"), \
+                _start_output_processes(multiworld, process_players, output_processes, temp_dir) as \
+                output_file_futures, \
+                concurrent.futures.ThreadPoolExecutor(len(output_players) + 2) as pool:
+            # charge the work of the output threads to the output stage
+            in_stage = multiworld.profiler.carry_stages if multiworld.profiler else lambda function: function
+            check_accessibility_task = pool.submit(in_stage(multiworld.fulfills_accessibility))
+
+            output_file_futures.append(pool.submit(in_stage(AutoWorld.call_stage), multiworld, "generate_output",
+                                                   temp_dir))
             for player in output_players:
                 # skip starting a thread for methods that say "pass".
                 output_file_futures.append(
-                    pool.submit(AutoWorld.call_single, multiworld, "generate_output", player, temp_dir))
+                    pool.submit(in_stage(AutoWorld.call_single), multiworld, "generate_output", player, temp_dir))
 
             # collect ER hint info
             er_hint_data: dict[int, dict[int, str]] = {}
@@ -312,10 +360,10 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
                 # embedded data package
                 data_package = {
-                    game_world.game: worlds.network_data_package["games"][game_world.game]
+                    game_world.game: worlds.get_game_data_package(game_world.game)
                     for game_world in multiworld.worlds.values()
                 }
-                data_package["Archipelago"] = worlds.network_data_package["games"]["Archipelago"]
+                data_package["Archipelago"] = worlds.get_game_data_package("Archipelago")
 
                 checks_in_area: dict[int, dict[str, int | list[int]]] = {}
 
@@ -353,13 +401,17 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
                 for key in ("slot_data", "er_hint_data"):
                     multidata[key] = convert_to_base_types(multidata[key])
 
-                serialized_multidata = zlib.compress(restricted_dumps(multidata), 9)
+                if get_settings().generator.columnar_multidata:
+                    with open(os.path.join(temp_dir, f'{outfilebase}.archipelago'), 'wb') as f:
+                        f.write(NetUtils.encode_columnar_multidata(multidata))  # includes version of format
+                else:
+                    serialized_multidata = zlib.compress(restricted_dumps(multidata), 9)
 
-                with open(os.path.join(temp_dir, f'{outfilebase}.archipelago'), 'wb') as f:
-                    f.write(bytes([3]))  # version of format
-                    f.write(serialized_multidata)
+                    with open(os.path.join(temp_dir, f'{outfilebase}.archipelago'), 'wb') as f:
+                        f.write(bytes([3]))  # version of format
+                        f.write(serialized_multidata)
 
-            output_file_futures.append(pool.submit(write_multidata))
+            output_file_futures.append(pool.submit(in_stage(write_multidata)))
             if not check_accessibility_task.result():
                 if not multiworld.can_beat_game():
                     raise FillError("Game appears as unbeatable. Aborting.", multiworld=multiworld)
@@ -372,12 +424,13 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
                     logger.info(f'Generating output files ({i}/{len(output_file_futures)}).')
                 future.result()
 
-        if args.spoiler > 1:
-            logger.info('Calculating playthrough.')
-            multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
+        with multiworld.profile_stage("spoiler"):
+            if args.spoiler > 1:
+                logger.info('Calculating playthrough.')
+                multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
 
-        if args.spoiler:
-            multiworld.spoiler.to_file(os.path.join(temp_dir, '%s_Spoiler.txt' % outfilebase))
+            if args.spoiler:
+                multiworld.spoiler.to_file(os.path.join(temp_dir, '%s_Spoiler.txt' % outfilebase))
 
         zipfilename = output_path(f"AP_{multiworld.seed_name}.zip")
         logger.info(f"Creating final archive at {zipfilename}")
@@ -387,4 +440,38 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
                 zf.write(file.path, arcname=file.name)
 
     logger.info('Done. Enjoy. Total Time: %s', time.perf_counter() - start)
+    _finish_generation(multiworld)
     return multiworld
+
+
+@contextlib.contextmanager
+def _start_output_processes(multiworld: MultiWorld, players: list[int], max_processes: int,
+                            temp_dir: str) -> Iterator[list[concurrent.futures.Future[None]]]:
+    """Runs generate_output of the players' worlds in forked processes, yielding their futures."""
+    if not players:
+        yield []
+        return
+    if multiworld.sweep_executor:
+        # a forked process inherits the locks held by other threads at the time of the fork, but not the threads to
+        # release them, so the sweep threads are stopped first. later sweeps run on the calling thread instead.
+        multiworld.sweep_executor.shutdown()
+        multiworld.sweep_executor = None
+    global _output_multiworld
+    _output_multiworld = multiworld
+    try:
+        # forked processes get a copy of the whole multiworld, so only the player has to be sent to them.
+        # all processes are forked on the first submit, before any output threads are started.
+        with concurrent.futures.ProcessPoolExecutor(min(max_processes, len(players)),
+                                                    multiprocessing.get_context("fork")) as pool:
+            yield [pool.submit(_generate_output_in_process, player, temp_dir) for player in players]
+    finally:
+        _output_multiworld = None
+
+
+def _generate_output_in_process(player: int, temp_dir: str) -> None:
+    assert _output_multiworld, "output process was not forked from a generating process"
+    AutoWorld.call_single(_output_multiworld, "generate_output", player, temp_dir)
+
+
+def _finish_generation(multiworld: MultiWorld) -> None:
+    multiworld.sweep_executor = None  # shut down by main
@@ -2,9 +2,12 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import bisect
 import collections
+import concurrent.futures
 import contextlib
 import copy
+import dataclasses
 import datetime
 import functools
 import hashlib
@@ -16,7 +19,7 @@ import operator
 import pickle
 import random
 import shlex
-import threading
+import struct
 import time
 import typing
 import weakref
@@ -34,17 +37,12 @@ if typing.TYPE_CHECKING:
 import colorama
 import websockets
 from websockets.extensions.permessage_deflate import PerMessageDeflate, ServerPerMessageDeflateFactory
-try:
-    # ponyorm is a requirement for webhost, not default server, so may not be importable
-    from pony.orm.dbapiprovider import OperationalError
-except ImportError:
-    OperationalError = ConnectionError
 
 import NetUtils
 import Utils
 from Utils import version_tuple, restricted_loads, Version, async_start, get_intended_text
 from NetUtils import Endpoint, ClientStatus, NetworkItem, decode, encode, NetworkPlayer, Permission, NetworkSlot, \
-    SlotType, LocationStore, MultiData, Hint, HintStatus
+    SlotType, LocationStore, MultiData, Hint, HintStatus, apply_save_delta
 from BaseClasses import ItemClassification
 
 
@@ -140,6 +138,134 @@ def get_saving_second(seed_name: str, interval: int = 60) -> int:
     return int(hashlib.sha256(seed_name.encode()).hexdigest(), 16) % interval
 
 
+# keys of the save that journal entries only contain changes of, or that never change
+journaled_save_keys = frozenset(("version", "connect_names", "location_checks", "received_items", "hints",
+                                 "stored_data"))
+save_journal_header = struct.Struct("<Q")  # generation of the snapshot the journal file belongs to
+save_journal_record = struct.Struct("<I")  # length of the compressed entry that follows
+
+
+def read_save_journal(data: bytes, generation: int) -> typing.Iterator[typing.Dict[str, typing.Any]]:
+    """Yields the entries of a save journal file, if it was started for the snapshot of `generation`.
+    A partially written last entry, as left behind by a crash, is skipped."""
+    if len(data) < save_journal_header.size or save_journal_header.unpack_from(data)[0] != generation:
+        return
+    position = save_journal_header.size
+    while position + save_journal_record.size <= len(data):
+        length, = save_journal_record.unpack_from(data, position)
+        position += save_journal_record.size
+        if position + length > len(data):
+            return
+        yield restricted_loads(zlib.decompress(data[position:position + length]))
+        position += length
+
+
+@dataclasses.dataclass
+class SaveMetrics:
+    saves: int = 0
+    snapshots: int = 0
+    failed: int = 0
+    skipped: int = 0  # autosaves skipped, because the previous one was still being written
+    last_size: int = 0
+    last_snapshot_time: float = 0.  # seconds the event loop was blocked to take a snapshot of the save
+    last_write_time: float = 0.  # seconds spent to serialize, compress and store the snapshot
+    total_snapshot_time: float = 0.
+    total_write_time: float = 0.
+
+
+class SaveResult(typing.NamedTuple):
+    snapshot: bool
+    generation: int
+    journal_entries: int  # entries in the journal of `generation` after this save
+    size: int
+    snapshot_time: float
+    write_time: float
+
+
+_save_executor: typing.Optional[concurrent.futures.ThreadPoolExecutor] = None
+
+
+def get_save_executor() -> concurrent.futures.ThreadPoolExecutor:
+    """Returns the executor that serializes and stores saves for all contexts of this process, one at a time."""
+    global _save_executor
+    if not _save_executor:
+        _save_executor = concurrent.futures.ThreadPoolExecutor(1, thread_name_prefix="Saver")
+    return _save_executor
+
+
+client_commands = frozenset({"Connect", "ConnectUpdate", "Sync", "LocationChecks", "LocationScouts", "CreateHints",
+                             "UpdateHint", "StatusUpdate", "Say", "Bounce", "Get", "Set", "SetNotify",
+                             "GetDataPackage", "TrackerFeed"})
+
+
+class Histogram:
+    """Counts observed durations into the buckets of a Prometheus histogram."""
+    buckets: typing.ClassVar[typing.Tuple[float, ...]] = (
+        0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5, 5.)
+
+    __slots__ = ("counts", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.sum = 0.
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+@dataclasses.dataclass
+class NetworkMetrics:
+    commands: typing.Counter[str] = dataclasses.field(default_factory=collections.Counter)
+    encode_seconds: Histogram = dataclasses.field(default_factory=Histogram)
+    send_seconds: Histogram = dataclasses.field(default_factory=Histogram)
+
+
+class SharedGameNames(typing.Mapping[int, str]):
+    """ID to name lookup of a game from a shared data package. Like the dicts built for other games,
+    it includes Archipelago's names and returns a placeholder for unknown IDs."""
+    __slots__ = ("names", "archipelago_names", "unknown")
+
+    def __init__(self, names: typing.Mapping[int, str], archipelago_names: typing.Mapping[int, str], unknown: str):
+        self.names = names
+        self.archipelago_names = archipelago_names
+        self.unknown = unknown
+
+    def __getitem__(self, code: int) -> str:
+        if code in self.names:
+            return self.names[code]
+        if code in self.archipelago_names:
+            return self.archipelago_names[code]
+        return self.unknown.format(code)
+
+    def __contains__(self, code: object) -> bool:
+        return code in self.names or code in self.archipelago_names
+
+    def __iter__(self) -> typing.Iterator[int]:
+        return itertools.chain(self.names, (code for code in self.archipelago_names if code not in self.names))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class NamesAndGroups(typing.Collection[str]):
+    """All names and group names of a game, without copying either."""
+    __slots__ = ("names", "groups")
+
+    def __init__(self, names: typing.Collection[str], groups: typing.Collection[str]):
+        self.names = names
+        self.groups = groups
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.names or name in self.groups
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return itertools.chain(self.names, (group for group in self.groups if group not in self.names))
+
+    def __len__(self) -> int:
+        return len(self.names) + sum(1 for group in self.groups if group not in self.names)
+
+
 class Client(Endpoint):
     __slots__ = (
         "__weakref__",
@@ -235,9 +361,13 @@ class Context:
     hints_used: typing.Dict[typing.Tuple[int, int], int]
     groups: typing.Dict[int, typing.Set[int]]
     save_version = 2
+    max_journal_entries = 100  # save journal entries before a new snapshot is written
+    compress_save_snapshot = True
     stored_data: typing.Dict[str, object]
     read_data: typing.Dict[str, object]
     stored_data_notification_clients: typing.Dict[str, typing.Set[Client]]
+    tracker_feed_clients: typing.Set[Client]
+    pending_tracker_updates: typing.Dict[str, typing.List[typing.Dict[str, typing.Any]]]
     slot_info: typing.Dict[int, NetworkSlot]
     generator_version = Version(0, 0, 0)
     checksums: typing.Dict[str, str]
@@ -245,8 +375,8 @@ class Context:
     item_name_groups: typing.Dict[str, typing.Dict[str, typing.Set[str]]]
     location_names: typing.Dict[str, typing.Dict[int, str]]
     location_name_groups: typing.Dict[str, typing.Dict[str, typing.Set[str]]]
-    all_item_and_group_names: typing.Dict[str, typing.Set[str]]
-    all_location_and_group_names: typing.Dict[str, typing.Set[str]]
+    all_item_and_group_names: typing.Dict[str, typing.Collection[str]]
+    all_location_and_group_names: typing.Dict[str, typing.Collection[str]]
     non_hintable_names: typing.Dict[str, typing.AbstractSet[str]]
     spheres: typing.List[typing.Dict[int, typing.Set[int]]]
     """ each sphere is { player: { location_id, ... } } """
@@ -266,6 +396,15 @@ class Context:
         self.shutdown_task = None
         self.data_filename = None
         self.save_filename = None
+        # changes since the last save, written as a journal entry by get_save_delta
+        self.unsaved_location_checks: typing.Dict[team_slot, typing.Set[int]] = collections.defaultdict(set)
+        self.unsaved_hints: typing.Set[team_slot] = set()
+        self.unsaved_stored_data: typing.Set[str] = set()
+        self.saved_received_items: typing.Dict[typing.Tuple[int, int, bool], int] = {}
+        self.journal_generation = 0
+        self.journal_entries: typing.Optional[int] = None  # entries since the last snapshot, None forces a snapshot
+        self.journal_size = 0
+        self.snapshot_size = 0
         self.saving = False
         self.player_names: typing.Dict[team_slot, str] = {}
         self.player_name_lookup: typing.Dict[str, team_slot] = {}
@@ -278,6 +417,7 @@ class Context:
         self.server = None
         self.countdown_timer = 0
         self.received_items = {}
+        self.pending_item_slots: typing.Set[team_slot] = set()  # slots with items not yet sent by send_new_items
         self.start_inventory = {}
         self.name_aliases: typing.Dict[team_slot, str] = {}
         self.location_checks = collections.defaultdict(set)
@@ -285,6 +425,8 @@ class Context:
         self.location_check_points = location_check_points
         self.hints_used = collections.defaultdict(int)
         self.hints: typing.Dict[team_slot, typing.Set[Hint]] = collections.defaultdict(set)
+        # (team, finding player, location) -> hint, for hints in the finding player's set of hints
+        self.hint_index: typing.Dict[typing.Tuple[int, int, int], Hint] = {}
         self.release_mode: str = release_mode
         self.remaining_mode: str = remaining_mode
         self.collect_mode: str = collect_mode
@@ -302,7 +444,10 @@ class Context:
         self.embedded_blacklist = {"host", "port"}
         self.client_ids: typing.Dict[typing.Tuple[int, int], datetime.datetime] = {}
         self.auto_save_interval = 60  # in seconds
-        self.auto_saver_thread: typing.Optional[threading.Thread] = None
+        self.auto_saver_task: typing.Optional[asyncio.Task] = None
+        self.pending_save: typing.Optional[concurrent.futures.Future] = None
+        self.save_metrics = SaveMetrics()
+        self.network_metrics = NetworkMetrics()
         self.save_dirty = False
         self.tags = ['AP']
         self.games: typing.Dict[int, str] = {}
@@ -313,6 +458,8 @@ class Context:
         self.random = random.Random()
         self.stored_data = {}
         self.stored_data_notification_clients = collections.defaultdict(weakref.WeakSet)
+        self.tracker_feed_clients = weakref.WeakSet()
+        self.pending_tracker_updates = collections.defaultdict(list)
         self.read_data = {}
         self.spheres = []
 
@@ -336,12 +483,13 @@ class Context:
         import worlds
         self.gamespackage = worlds.network_data_package["games"]
 
-        self.item_name_groups = {world_name: world.item_name_groups for world_name, world in
-                                 worlds.AutoWorldRegister.world_types.items()}
-        self.location_name_groups = {world_name: world.location_name_groups for world_name, world in
-                                     worlds.AutoWorldRegister.world_types.items()}
-        for world_name, world in worlds.AutoWorldRegister.world_types.items():
-            self.non_hintable_names[world_name] = world.hint_blacklist
+        self.item_name_groups = {}
+        self.location_name_groups = {}
+        for world_name in self.gamespackage:
+            static_data = worlds.get_game_static_data(world_name)
+            self.item_name_groups[world_name] = static_data.item_name_groups
+            self.location_name_groups[world_name] = static_data.location_name_groups
+            self.non_hintable_names[world_name] = static_data.hint_blacklist
 
         for game_package in self.gamespackage.values():
             # remove groups from data sent to clients
@@ -349,24 +497,30 @@ class Context:
             del game_package["location_name_groups"]
 
     def _init_game_data(self):
-        for game_name, game_package in self.gamespackage.items():
+        # only games of this multiworld are looked up, so there is no need to build lookups for any other game
+        games = set(self.games.values()) | {"Archipelago"}
+        for game_name in sorted(games, key=lambda game: game != "Archipelago"):  # Archipelago first
+            if game_name not in self.gamespackage:
+                continue
+            game_package = self.gamespackage[game_name]
             if "checksum" in game_package:
                 self.checksums[game_name] = game_package["checksum"]
-            for item_name, item_id in game_package["item_name_to_id"].items():
-                self.item_names[game_name][item_id] = item_name
-            for location_name, location_id in game_package["location_name_to_id"].items():
-                self.location_names[game_name][location_id] = location_name
+            for kind, names, unknown in (("item", self.item_names, "Unknown item (ID:{})"),
+                                         ("location", self.location_names, "Unknown location (ID:{})")):
+                name_to_id = game_package[f"{kind}_name_to_id"]
+                archipelago_names = {} if game_name == "Archipelago" else names["Archipelago"]
+                if isinstance(name_to_id, NetUtils.SharedNameTable):
+                    # shared between rooms and processes, look names up in place instead of building a dict
+                    names[game_name] = SharedGameNames(name_to_id.names_by_id(), archipelago_names, unknown)
+                else:
+                    for name, code in name_to_id.items():
+                        names[game_name][code] = name
+                    # Add Archipelago items and locations to each data package.
+                    names[game_name].update(archipelago_names)
             self.all_item_and_group_names[game_name] = \
-                set(game_package["item_name_to_id"]) | set(self.item_name_groups[game_name])
+                NamesAndGroups(game_package["item_name_to_id"], self.item_name_groups[game_name])
             self.all_location_and_group_names[game_name] = \
-                set(game_package["location_name_to_id"]) | set(self.location_name_groups.get(game_name, []))
-
-        archipelago_item_names = self.item_names["Archipelago"]
-        archipelago_location_names = self.location_names["Archipelago"]
-        for game in [game_name for game_name in self.gamespackage if game_name != "Archipelago"]:
-            # Add Archipelago items and locations to each data package.
-            self.item_names[game].update(archipelago_item_names)
-            self.location_names[game].update(archipelago_location_names)
+                NamesAndGroups(game_package["location_name_to_id"], self.location_name_groups.get(game_name, {}))
 
     def item_names_for_game(self, game: str) -> typing.Optional[typing.Dict[str, int]]:
         return self.gamespackage[game]["item_name_to_id"] if game in self.gamespackage else None
@@ -375,10 +529,17 @@ class Context:
         return self.gamespackage[game]["location_name_to_id"] if game in self.gamespackage else None
 
     # General networking
+    def encode_msgs(self, msgs: typing.Iterable[dict]) -> str:
+        start = time.perf_counter()
+        msg = self.dumper(msgs)
+        self.network_metrics.encode_seconds.observe(time.perf_counter() - start)
+        return msg
+
     async def send_msgs(self, endpoint: Endpoint, msgs: typing.Iterable[dict]) -> bool:
         if not endpoint.socket or not endpoint.socket.open:
             return False
-        msg = self.dumper(msgs)
+        msg = self.encode_msgs(msgs)
+        start = time.perf_counter()
         try:
             await endpoint.socket.send(msg)
         except websockets.ConnectionClosed:
@@ -386,6 +547,7 @@ class Context:
             await self.disconnect(endpoint)
             return False
         else:
+            self.network_metrics.send_seconds.observe(time.perf_counter() - start)
             if self.log_network:
                 self.logger.info(f"Outgoing message: {msg}")
             return True
@@ -393,6 +555,7 @@ class Context:
     async def send_encoded_msgs(self, endpoint: Endpoint, msg: str) -> bool:
         if not endpoint.socket or not endpoint.socket.open:
             return False
+        start = time.perf_counter()
         try:
             await endpoint.socket.send(msg)
         except websockets.ConnectionClosed:
@@ -400,6 +563,7 @@ class Context:
             await self.disconnect(endpoint)
             return False
         else:
+            self.network_metrics.send_seconds.observe(time.perf_counter() - start)
             if self.log_network:
                 self.logger.info(f"Outgoing message: {msg}")
             return True
@@ -409,19 +573,21 @@ class Context:
         for endpoint in endpoints:
             if endpoint.socket and endpoint.socket.open:
                 sockets.append(endpoint.socket)
+        start = time.perf_counter()
         try:
             websockets.broadcast(sockets, msg)
         except RuntimeError:
             self.logger.exception("Exception during broadcast_send_encoded_msgs")
             return False
         else:
+            self.network_metrics.send_seconds.observe(time.perf_counter() - start)
             if self.log_network:
                 self.logger.info(f"Outgoing broadcast: {msg}")
             return True
 
     def broadcast_all(self, msgs: typing.List[dict]):
         msg_is_text = all(msg["cmd"] == "PrintJSON" for msg in msgs)
-        data = self.dumper(msgs)
+        data = self.encode_msgs(msgs)
         endpoints = (
             endpoint
             for endpoint in self.endpoints
@@ -435,7 +601,7 @@ class Context:
 
     def broadcast_team(self, team: int, msgs: typing.List[dict]):
         msg_is_text = all(msg["cmd"] == "PrintJSON" for msg in msgs)
-        data = self.dumper(msgs)
+        data = self.encode_msgs(msgs)
         endpoints = (
             endpoint
             for endpoint in itertools.chain.from_iterable(self.clients[team].values())
@@ -444,7 +610,7 @@ class Context:
         async_start(self.broadcast_send_encoded_msgs(endpoints, data))
 
     def broadcast(self, endpoints: typing.Iterable[Client], msgs: typing.List[dict]):
-        msgs = self.dumper(msgs)
+        msgs = self.encode_msgs(msgs)
         async_start(self.broadcast_send_encoded_msgs(endpoints, msgs))
 
     async def disconnect(self, endpoint: Client):
@@ -486,8 +652,15 @@ class Context:
         self.data_filename = multidatapath
 
     @staticmethod
-    def decompress(data: bytes) -> dict:
+    def decompress(data: bytes, lazy: bool = False) -> typing.Mapping[str, typing.Any]:
+        """Decodes multidata. For the columnar format, locations are returned as a LocationStore already,
+        or a read-only view that decodes on access is returned if `lazy` is set."""
         format_version = data[0]
+        if format_version == NetUtils.COLUMNAR_MULTIDATA_VERSION:
+            multidata = NetUtils.ColumnarMultiData(data)
+            if lazy:
+                return multidata
+            return {**multidata, "locations": multidata.location_store()}
         if format_version > 3:
             raise Utils.VersionException("Incompatible multidata.")
         return restricted_loads(zlib.decompress(data[1:]))
@@ -535,7 +708,8 @@ class Context:
         self.seed_name = decoded_obj["seed_name"]
         self.random.seed(self.seed_name)
         self.connect_names = decoded_obj['connect_names']
-        self.locations = LocationStore(decoded_obj.pop("locations"))  # pre-emptively free memory
+        locations = decoded_obj.pop("locations")  # pre-emptively free memory
+        self.locations = locations if isinstance(locations, LocationStore) else LocationStore(locations)
         self.slot_data = decoded_obj['slot_data']
         for slot, data in self.slot_data.items():
             self.read_data[f"slot_data_{slot}"] = lambda data=data: data
@@ -548,6 +722,7 @@ class Context:
 
         for slot, hints in decoded_obj["precollected_hints"].items():
             self.hints[0, slot].update(hints)
+            self.index_hints(0, slot, hints)
 
         # declare slots that aren't players as done
         for slot, slot_info in self.slot_info.items():
@@ -571,9 +746,9 @@ class Context:
                 del data["location_name_groups"]
             del data["item_name_groups"]  # remove from data package, but keep in self.item_name_groups
         self._init_game_data()
-        for game_name, data in self.item_name_groups.items():
+        for game_name in self.item_name_groups:
             self.read_data[f"item_name_groups_{game_name}"] = lambda lgame=game_name: self.item_name_groups[lgame]
-        for game_name, data in self.location_name_groups.items():
+        for game_name in self.location_name_groups:
             self.read_data[f"location_name_groups_{game_name}"] = lambda lgame=game_name: self.location_name_groups[lgame]
 
         # sorted access spheres
@@ -593,17 +768,164 @@ class Context:
         return False
 
     def _save(self, exit_save: bool = False) -> bool:
+        if self.pending_save:
+            concurrent.futures.wait((self.pending_save,))
         try:
-            # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
-            encoded_save = pickle.dumps(self.get_save())
-            with open(self.save_filename, "wb") as f:
-                f.write(zlib.compress(encoded_save))
+            self.write_save(exit_save)
+        except Exception as e:
+            self.save_metrics.failed += 1
+            self.logger.exception(e)
+            return False
+        else:
+            return True
+
+    async def _save_async(self, exit_save: bool = False) -> bool:
+        """Like _save, but waits for a save that is still being written and writes this one without blocking the
+        event loop."""
+        if self.pending_save:
+            await asyncio.wait((asyncio.wrap_future(self.pending_save),))
+        try:
+            self._save_written(await asyncio.wrap_future(get_save_executor().submit(self._prepare_save(exit_save))))
         except Exception as e:
+            self.save_metrics.failed += 1
             self.logger.exception(e)
             return False
         else:
             return True
 
+    def write_save(self, compact: bool = False) -> None:
+        """Appends the changes since the last save to the save journal. If `compact` is set, or the journal got
+        too long, a snapshot of the whole save is written instead, which starts a new journal."""
+        self._save_written(self._prepare_save(compact)())
+
+    def save_in_background(self) -> bool:
+        """Takes a snapshot of the save and leaves writing it to the save executor.
+        Returns False if the previous save is still being written, in which case no new one is started.
+        Has to be called from the event loop, which the result of the save is handed back to."""
+        if self.pending_save and not self.pending_save.done():
+            self.save_metrics.skipped += 1
+            return False
+        self.save_dirty = False
+        self.pending_save = get_save_executor().submit(self._prepare_save())
+        asyncio.wrap_future(self.pending_save).add_done_callback(self._background_save_done)
+        return True
+
+    def _background_save_done(self, future: asyncio.Future) -> None:
+        exception = future.exception()
+        if exception:
+            self.save_metrics.failed += 1
+            self.logger.error("Saving failed.", exc_info=exception)
+            self.logger.info(f"Retry in {self.auto_save_interval} seconds.")
+            self.save_dirty = True
+        else:
+            self._save_written(future.result())
+
+    def _prepare_save(self, compact: bool = False) -> typing.Callable[[], SaveResult]:
+        """Takes a snapshot of either the changes since the last save or the whole save.
+        Returns a function that serializes and stores it without touching the live server state,
+        so it can be run on another thread. Its result has to be passed to _save_written on the event loop."""
+        start = time.perf_counter()
+        journal_entries, self.journal_entries = self.journal_entries, None  # if writing fails, snapshot next time
+        snapshot = compact or journal_entries is None or journal_entries >= self.max_journal_entries \
+            or self.journal_size > self.snapshot_size
+        if snapshot:
+            self.journal_generation += 1
+            self._reset_save_delta()
+            savedata = self.get_save()
+            savedata["journal_generation"] = self.journal_generation
+        else:
+            savedata = self.get_save_delta()
+        generation = self.journal_generation
+        snapshot_time = time.perf_counter() - start
+
+        def write() -> SaveResult:
+            write_start = time.perf_counter()
+            # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
+            data = pickle.dumps(savedata)
+            if self.compress_save_snapshot or not snapshot:
+                data = zlib.compress(data)
+            self._store_save(data, snapshot, generation, compact)
+            return SaveResult(snapshot, generation, 0 if snapshot else journal_entries + 1, len(data),
+                              snapshot_time, time.perf_counter() - write_start)
+
+        return write
+
+    def _save_written(self, result: SaveResult) -> None:
+        """Updates the journal bookkeeping and save metrics for a stored save."""
+        if result.generation == self.journal_generation:  # otherwise a newer snapshot was written in the meantime
+            if result.snapshot:
+                self.snapshot_size = result.size
+                self.journal_size = 0
+            else:
+                self.journal_size += result.size
+            self.journal_entries = result.journal_entries
+
+        metrics = self.save_metrics
+        metrics.saves += 1
+        metrics.snapshots += result.snapshot
+        metrics.last_size = result.size
+        metrics.last_snapshot_time = result.snapshot_time
+        metrics.last_write_time = result.write_time
+        metrics.total_snapshot_time += result.snapshot_time
+        metrics.total_write_time += result.write_time
+
+    def get_save_delta(self) -> typing.Dict[str, typing.Any]:
+        """Returns the changes to get_save() since the last save and starts tracking anew.
+        Only location checks, received items, hints and stored data are tracked, the rest is small and included whole.
+        """
+        location_checks, self.unsaved_location_checks = self.unsaved_location_checks, collections.defaultdict(set)
+        hint_slots, self.unsaved_hints = self.unsaved_hints, set()
+        stored_data_keys, self.unsaved_stored_data = self.unsaved_stored_data, set()
+        received_items: typing.Dict[typing.Tuple[int, int, bool], typing.Tuple[int, typing.List[NetworkItem]]] = {}
+        for key, items in self.received_items.items():
+            saved = self.saved_received_items.get(key, 0)
+            if len(items) > saved:
+                received_items[key] = saved, items[saved:]
+                self.saved_received_items[key] = len(items)
+        return {
+            "location_checks": dict(location_checks),
+            "received_items": received_items,
+            "hints": {key: set(self.hints[key]) for key in hint_slots},
+            "stored_data": {key: self.stored_data[key] for key in stored_data_keys},
+            "state": self._get_save_state(),
+        }
+
+    def _reset_save_delta(self) -> None:
+        self.unsaved_location_checks = collections.defaultdict(set)
+        self.unsaved_hints = set()
+        self.unsaved_stored_data = set()
+        self.saved_received_items = {key: len(items) for key, items in self.received_items.items()}
+
+    @property
+    def journal_filename(self) -> str:
+        return self.save_filename + "_journal"
+
+    def _store_save(self, data: bytes, snapshot: bool, generation: int, exit_save: bool) -> None:
+        """Stores either a save snapshot, which starts the journal of `generation`, or a journal entry."""
+        import os
+        if snapshot:
+            with open(self.save_filename + "_tmp", "wb") as f:
+                f.write(data)
+            os.replace(self.save_filename + "_tmp", self.save_filename)
+            with open(self.journal_filename, "wb") as f:
+                f.write(save_journal_header.pack(generation))
+        else:
+            with open(self.journal_filename, "ab") as f:
+                f.write(save_journal_record.pack(len(data)) + data)
+
+    def _read_save(self) -> typing.Dict[str, typing.Any]:
+        """Reads the save snapshot and replays the journal on top of it."""
+        with open(self.save_filename, "rb") as f:
+            savedata = restricted_loads(zlib.decompress(f.read()))
+        try:
+            with open(self.journal_filename, "rb") as f:
+                journal = f.read()
+        except FileNotFoundError:
+            journal = b""
+        for delta in read_save_journal(journal, savedata.get("journal_generation", 0)):
+            apply_save_delta(savedata, delta)
+        return savedata
+
     def init_save(self, enabled: bool = True):
         self.saving = enabled
         if self.saving:
@@ -613,9 +935,7 @@ class Context:
                 self.save_filename = name + '.apsave' if ext.lower() in ('.archipelago', '.zip') \
                     else self.data_filename + '_' + 'apsave'
             try:
-                with open(self.save_filename, 'rb') as f:
-                    save_data = restricted_loads(zlib.decompress(f.read()))
-                    self.set_save(save_data)
+                self.set_save(self._read_save())
             except FileNotFoundError:
                 self.logger.error('No save data found, starting a new game')
             except Exception as e:
@@ -623,73 +943,83 @@ class Context:
             self._start_async_saving()
 
     def _start_async_saving(self, atexit_save: bool = True):
-        if not self.auto_saver_thread:
-            def save_regularly():
-                # time.time() is platform dependent, so using the expensive datetime method instead
-                def get_datetime_second():
-                    now = datetime.datetime.now()
-                    return now.second + now.microsecond * 0.000001
-
-                second = get_saving_second(self.seed_name, self.auto_save_interval)
-                while not self.exit_event.is_set():
-                    try:
-                        next_wakeup = (second - get_datetime_second()) % self.auto_save_interval
-                        time.sleep(max(1.0, next_wakeup))
-                        if self.save_dirty:
-                            self.logger.debug("Saving via thread.")
-                            self._save()
-                    except OperationalError as e:
-                        self.logger.exception(e)
-                        self.logger.info(f"Saving failed. Retry in {self.auto_save_interval} seconds.")
-                    else:
-                        self.save_dirty = False
-                if not atexit_save:  # if atexit is used, that keeps a reference anyway
-                    queue_gc()
-
-            self.auto_saver_thread = threading.Thread(target=save_regularly, daemon=True)
-            self.auto_saver_thread.start()
+        if not self.auto_saver_task:
+            self.auto_saver_task = asyncio.create_task(self.save_regularly(atexit_save), name="AutoSaver")
 
             if atexit_save:
                 import atexit
                 atexit.register(self._save, True)  # make sure we save on exit too
 
+    async def save_regularly(self, atexit_save: bool = True):
+        # time.time() is platform dependent, so using the expensive datetime method instead
+        def get_datetime_second():
+            now = datetime.datetime.now()
+            return now.second + now.microsecond * 0.000001
+
+        second = get_saving_second(self.seed_name, self.auto_save_interval)
+        while not self.exit_event.is_set():
+            next_wakeup = (second - get_datetime_second()) % self.auto_save_interval
+            try:
+                await asyncio.wait_for(self.exit_event.wait(), max(1.0, next_wakeup))
+            except asyncio.TimeoutError:
+                if self.save_dirty:
+                    self.logger.debug("Saving in background.")
+                    try:
+                        self.save_in_background()
+                    except Exception as e:
+                        self.save_metrics.failed += 1
+                        self.logger.exception(e)
+                        self.logger.info(f"Saving failed. Retry in {self.auto_save_interval} seconds.")
+        if not atexit_save:  # if atexit is used, that keeps a reference anyway
+            queue_gc()
+
     def get_save(self) -> dict:
-        self.recheck_hints()
-        d = {
+        """Returns a snapshot of the save, which does not change along with the server state.
+        Containers the server mutates in place are copied, stored data values are never modified in place."""
+        d = self._get_save_state()
+        d.update({
             "version": self.save_version,
             "connect_names": self.connect_names,
-            "received_items": self.received_items,
+            "received_items": {key: list(items) for key, items in self.received_items.items()},
+            "hints": {key: set(hints) for key, hints in self.hints.items()},
+            "location_checks": {key: set(checks) for key, checks in self.location_checks.items()},
+            "stored_data": dict(self.stored_data),
+        })
+
+        return d
+
+    def _get_save_state(self) -> dict:
+        """Returns the part of get_save() that is not in journaled_save_keys, which save journal entries include whole.
+        """
+        return {
             "hints_used": dict(self.hints_used),
-            "hints": dict(self.hints),
-            "location_checks": dict(self.location_checks),
-            "name_aliases": self.name_aliases,
+            "name_aliases": dict(self.name_aliases),
             "client_game_state": dict(self.client_game_state),
             "client_activity_timers": tuple(
                 (key, value.timestamp()) for key, value in self.client_activity_timers.items()),
             "client_connection_timers": tuple(
                 (key, value.timestamp()) for key, value in self.client_connection_timers.items()),
             "random_state": self.random.getstate(),
-            "group_collected": dict(self.group_collected),
-            "stored_data": self.stored_data,
+            "group_collected": {group: set(players) for group, players in self.group_collected.items()},
             "game_options": {"hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
                              "server_password": self.server_password, "password": self.password,
                              "release_mode": self.release_mode,
                              "remaining_mode": self.remaining_mode, "collect_mode": self.collect_mode,
                              "countdown_mode": self.countdown_mode,
                              "item_cheat": self.item_cheat, "compatibility": self.compatibility}
-
         }
 
-        return d
-
     def set_save(self, savedata: dict):
         if self.connect_names != savedata["connect_names"]:
             raise Exception("This savegame does not appear to match the loaded multiworld.")
         if savedata["version"] > self.save_version:
             raise Exception("This savegame is newer than the server.")
         self.received_items = savedata["received_items"]
+        self.journal_generation = savedata.get("journal_generation", 0)
         self.hints_used.update(savedata["hints_used"])
         self.hints.update(savedata["hints"])
+        for (team, slot), hints in self.hints.items():
+            self.index_hints(team, slot, hints)
 
         self.name_aliases.update(savedata["name_aliases"])
         self.client_game_state.update(savedata["client_game_state"])
@@ -753,7 +1083,32 @@ class Context:
                         changed.add((hint_team,player))
                     if slot is not None and slot != player:
                         self.replace_hint(hint_team, player, hint, new_hint)
+                self.unsaved_hints.add((hint_team, hint_slot))
             self.hints[hint_team, hint_slot] = new_hints
+            self.index_hints(hint_team, hint_slot, new_hints)
+
+    def recheck_location_hints(self, team: int, slot: int, locations: typing.Iterable[int],
+                               changed: typing.Optional[typing.Set[team_slot]] = None) -> None:
+        """Refreshes only the hints for the specified locations of team/slot, looking them up in the hint index.
+        If a set is passed for 'changed', each (team,slot) pair that has at least one hint modified will be added to it.
+        """
+        for location in locations:
+            hint = self.hint_index.get((team, slot, location))
+            if hint is None:
+                continue
+            new_hint = hint.re_check(self, team)
+            if hint == new_hint:
+                continue
+            for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
+                if changed is not None:
+                    changed.add((team, player))
+                self.replace_hint(team, player, hint, new_hint)
+
+    def index_hints(self, team: int, slot: int, hints: typing.Iterable[Hint]) -> None:
+        """Adds hints of the set of team/slot to the hint index, if slot is their finding player."""
+        for hint in hints:
+            if hint.finding_player == slot:
+                self.hint_index[team, slot, hint.location] = hint
 
     def get_rechecked_hints(self, team: int, slot: int):
         self.recheck_hints(team, slot)
@@ -825,9 +1180,12 @@ class Context:
                 # we can check once if hint already exists
                 if hint not in self.hints[team, hint.finding_player]:
                     self.hints[team, hint.finding_player].add(hint)
+                    self.hint_index[team, hint.finding_player, hint.location] = hint
+                    self.unsaved_hints.add((team, hint.finding_player))
                     new_hint_events.add(hint.finding_player)
                     for player in self.slot_set(hint.receiving_player):
                         self.hints[team, player].add(hint)
+                        self.unsaved_hints.add((team, player))
                         new_hint_events.add(player)
 
             self.logger.info("Notice (Team #%d): %s" % (team + 1, format_hint(self, team, hint)))
@@ -843,15 +1201,15 @@ class Context:
                     async_start(self.send_msgs(client, client_hints))
 
     def get_hint(self, team: int, finding_player: int, seeked_location: int) -> typing.Optional[Hint]:
-        for hint in self.hints[team, finding_player]:
-            if hint.location == seeked_location and hint.finding_player == finding_player:
-                return hint
-        return None
+        return self.hint_index.get((team, finding_player, seeked_location))
     
     def replace_hint(self, team: int, slot: int, old_hint: Hint, new_hint: Hint) -> None:
         if old_hint in self.hints[team, slot]:
             self.hints[team, slot].remove(old_hint)
             self.hints[team, slot].add(new_hint)
+            self.unsaved_hints.add((team, slot))
+            if slot == new_hint.finding_player:
+                self.hint_index[team, slot, new_hint.location] = new_hint
     
     # "events"
 
@@ -877,16 +1235,55 @@ class Context:
         targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
         if targets:
             self.broadcast(targets, [{"cmd": "SetReply", "key": key, "value": self.hints[team, slot]}])
+        self.publish_tracker_update("hints", {"team": team, "player": slot, "hints": sorted(self.hints[team, slot])})
 
     def on_client_status_change(self, team: int, slot: int):
         key: str = f"_read_client_status_{team}_{slot}"
         targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
         if targets:
             self.broadcast(targets, [{"cmd": "SetReply", "key": key, "value": self.client_game_state[team, slot]}])
+        self.publish_tracker_update("player_status",
+                                    {"team": team, "player": slot, "status": self.client_game_state[team, slot]})
+
+    # tracker feed
+
+    def allows_tracker_feed(self, args: dict) -> bool:
+        """Returns whether a client may subscribe to the tracker feed with the arguments of its TrackerFeed."""
+        return not self.password or args.get("password") == self.password
+
+    def get_tracker_state(self) -> typing.Dict[str, typing.List[typing.Dict[str, typing.Any]]]:
+        """Returns the complete state the tracker feed sends updates for, in the format of TrackerUpdate."""
+        state: typing.Dict[str, typing.List[typing.Dict[str, typing.Any]]] = {
+            "player_checks_done": [], "player_items_received": [], "hints": [], "player_status": []}
+        for team, slot in sorted(self.player_names):
+            state["player_checks_done"].append(
+                {"team": team, "player": slot, "locations": sorted(self.location_checks.get((team, slot), ()))})
+            state["player_items_received"].append(
+                {"team": team, "player": slot, "items": self.received_items.get((team, slot, True), [])})
+            state["hints"].append({"team": team, "player": slot, "hints": sorted(self.hints.get((team, slot), ()))})
+            state["player_status"].append(
+                {"team": team, "player": slot,
+                 "status": self.client_game_state.get((team, slot), ClientStatus.CLIENT_UNKNOWN)})
+        return state
+
+    def publish_tracker_update(self, key: str, entry: typing.Dict[str, typing.Any]) -> None:
+        """Queues an entry for the next TrackerUpdate. Updates are sent once the current event loop iteration ends,
+        so that changes from processing one command go out in one packet."""
+        if not self.tracker_feed_clients:
+            return
+        if not self.pending_tracker_updates:
+            asyncio.get_running_loop().call_soon(self.send_tracker_updates)
+        self.pending_tracker_updates[key].append(entry)
+
+    def send_tracker_updates(self) -> None:
+        """Sends all queued tracker updates to the subscribers of the tracker feed."""
+        updates, self.pending_tracker_updates = self.pending_tracker_updates, collections.defaultdict(list)
+        if updates and self.tracker_feed_clients:
+            self.broadcast(self.tracker_feed_clients, [{"cmd": "TrackerUpdate", **updates}])
 
 
 def update_aliases(ctx: Context, team: int):
-    cmd = ctx.dumper([{"cmd": "RoomUpdate",
+    cmd = ctx.encode_msgs([{"cmd": "RoomUpdate",
                        "players": ctx.get_players_package()}])
 
     for clients in ctx.clients[team].values():
@@ -1068,19 +1465,25 @@ def get_start_inventory(ctx: Context, player: int, remote_start_inventory: bool)
 
 
 def send_new_items(ctx: Context):
-    for team, clients in ctx.clients.items():
-        for slot, clients in clients.items():
-            for client in clients:
-                if client.no_items:
-                    continue
-                start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
-                items = get_received_items(ctx, team, slot, client.remote_items)
-                if len(start_inventory) + len(items) > client.send_index:
-                    first_new_item = max(0, client.send_index - len(start_inventory))
-                    async_start(ctx.send_msgs(client, [{
-                        "cmd": "ReceivedItems",
-                        "index": client.send_index,
-                        "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
+    """Sends new items to the clients of the slots in ctx.pending_item_slots.
+    Clients of a slot that are at the same index with the same items handling get one shared message."""
+    pending_item_slots, ctx.pending_item_slots = ctx.pending_item_slots, set()
+    for team, slot in sorted(pending_item_slots):
+        batches: typing.Dict[typing.Tuple[bool, bool, int], typing.List[Client]] = {}
+        for client in ctx.clients[team].get(slot, ()):
+            if not client.no_items:
+                batches.setdefault((client.remote_start_inventory, client.remote_items, client.send_index),
+                                   []).append(client)
+        for (remote_start_inventory, remote_items, send_index), clients in batches.items():
+            start_inventory = get_start_inventory(ctx, slot, remote_start_inventory)
+            items = get_received_items(ctx, team, slot, remote_items)
+            if len(start_inventory) + len(items) > send_index:
+                first_new_item = max(0, send_index - len(start_inventory))
+                ctx.broadcast(clients, [{
+                    "cmd": "ReceivedItems",
+                    "index": send_index,
+                    "items": start_inventory[send_index:] + items[first_new_item:]}])
+                for client in clients:
                     client.send_index = len(start_inventory) + len(items)
 
 
@@ -1125,10 +1528,12 @@ def get_remaining(ctx: Context, team: int, slot: int) -> typing.List[typing.Tupl
 
 def send_items_to(ctx: Context, team: int, target_slot: int, *items: NetworkItem):
     for target in ctx.slot_set(target_slot):
+        ctx.pending_item_slots.add((team, target))
         for item in items:
             if item.player != target_slot:
                 get_received_items(ctx, team, target, False).append(item)
             get_received_items(ctx, team, target, True).append(item)
+        ctx.publish_tracker_update("player_items_received", {"team": team, "player": target, "items": list(items)})
 
 
 def register_location_checks(ctx: Context, team: int, slot: int, locations: typing.Iterable[int],
@@ -1166,6 +1571,9 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
         del sortable
 
         ctx.location_checks[team, slot] |= new_locations
+        ctx.unsaved_location_checks[team, slot] |= new_locations
+        ctx.publish_tracker_update("player_checks_done",
+                                   {"team": team, "player": slot, "locations": sorted(new_locations)})
         send_new_items(ctx)
         ctx.broadcast(ctx.clients[team][slot], [{
             "cmd": "RoomUpdate",
@@ -1173,7 +1581,7 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
             "checked_locations": new_locations,  # send back new checks only
         }])
         updated_slots: typing.Set[tuple[int, int]] = set()
-        ctx.recheck_hints(team, slot, updated_slots)
+        ctx.recheck_location_hints(team, slot, new_locations, updated_slots)
         for hint_team, hint_slot in updated_slots:
             ctx.on_changed_hints(hint_team, hint_slot)
         ctx.save()
@@ -1675,6 +2083,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
                 new_item = NetworkItem(names[item_name], -1, self.client.slot)
                 get_received_items(self.ctx, self.client.team, self.client.slot, False).append(new_item)
                 get_received_items(self.ctx, self.client.team, self.client.slot, True).append(new_item)
+                self.ctx.pending_item_slots.add((self.client.team, self.client.slot))
                 self.ctx.broadcast_text_all(
                     'Cheat console: sending "' + item_name + '" to ' + self.ctx.get_aliased_name(self.client.team,
                                                                                                  self.client.slot),
@@ -1695,6 +2104,8 @@ class ClientMessageProcessor(CommonCommandProcessor):
             hints = {hint.re_check(self.ctx, self.client.team) for hint in
                      self.ctx.hints[self.client.team, self.client.slot]}
             self.ctx.hints[self.client.team, self.client.slot] = hints
+            self.ctx.index_hints(self.client.team, self.client.slot, hints)
+            self.ctx.unsaved_hints.add((self.client.team, self.client.slot))
             self.ctx.notify_hints(self.client.team, list(hints), recipients=(self.client.slot,))
             self.output(f"A hint costs {self.ctx.get_hint_cost(self.client.slot)} points. "
                         f"You have {points_available} points.")
@@ -1852,6 +2263,14 @@ def get_slot_points(ctx: Context, team: int, slot: int) -> int:
             ctx.get_hint_cost(slot) * ctx.hints_used[team, slot])
 
 
+def get_sendable_game_package(game_package: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+    """Turns name tables of a shared data package into dicts, so the game package can be encoded."""
+    if isinstance(game_package["item_name_to_id"], NetUtils.SharedNameTable):
+        return {**game_package, "item_name_to_id": game_package["item_name_to_id"].to_dict(),
+                "location_name_to_id": game_package["location_name_to_id"].to_dict()}
+    return game_package
+
+
 async def process_client_cmd(ctx: Context, client: Client, args: dict):
     try:
         cmd: str = args["cmd"]
@@ -1866,6 +2285,8 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                                       "text": f"Command should be str, got {type(cmd)}"}])
         return
 
+    ctx.network_metrics.commands[cmd if cmd in client_commands else "unknown"] += 1
+
     if cmd == 'Connect':
         if not args or 'password' not in args or type(args['password']) not in [str, type(None)] or \
                 'game' not in args:
@@ -1942,14 +2363,14 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
     elif cmd == "GetDataPackage":
         exclusions = args.get("exclusions", [])
         if "games" in args:
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
+            games = {name: get_sendable_game_package(game_data) for name, game_data in ctx.gamespackage.items()
                      if name in set(args.get("games", []))}
             await ctx.send_msgs(client, [{"cmd": "DataPackage",
                                           "data": {"games": games}}])
         # TODO: remove exclusions behaviour around 0.5.0
         elif exclusions:
             exclusions = set(exclusions)
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
+            games = {name: get_sendable_game_package(game_data) for name, game_data in ctx.gamespackage.items()
                      if name not in exclusions}
 
             package = {"games": games}
@@ -1957,8 +2378,19 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                                           "data": package}])
 
         else:
+            games = {name: get_sendable_game_package(game_data) for name, game_data in ctx.gamespackage.items()}
             await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": ctx.gamespackage}}])
+                                          "data": {"games": games}}])
+
+    elif cmd == "TrackerFeed":
+        if not ctx.allows_tracker_feed(args):
+            await ctx.send_msgs(client, [{"cmd": "InvalidPacket", "type": "arguments", "text": cmd,
+                                          "original_cmd": cmd}])
+            return
+        # send out what is queued, as it is part of the state sent to the new subscriber already
+        ctx.send_tracker_updates()
+        ctx.tracker_feed_clients.add(client)
+        await ctx.send_msgs(client, [{"cmd": "TrackerUpdate", **ctx.get_tracker_state()}])
 
     elif client.auth:
         if cmd == "ConnectUpdate":
@@ -2151,7 +2583,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             tags = set(args.get("tags", []))
             slots = set(args.get("slots", []))
             args["cmd"] = "Bounced"
-            msg = ctx.dumper([args])
+            msg = ctx.encode_msgs([args])
 
             for bounceclient in ctx.endpoints:
                 if client.team == bounceclient.team and (ctx.games[bounceclient.slot] in games or
@@ -2180,13 +2612,15 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                                               "text": 'Set', "original_cmd": cmd}])
                 return
             args["cmd"] = "SetReply"
-            value = ctx.stored_data.get(args["key"], args.get("default", 0))
-            args["original_value"] = copy.copy(value)
+            args["original_value"] = original_value = ctx.stored_data.get(args["key"], args.get("default", 0))
+            # copy on write, as save snapshots share the stored values
+            value = copy.copy(original_value)
             args["slot"] = client.slot
             for operation in args["operations"]:
                 func = modify_functions[operation["operation"]]
                 value = func(value, operation["value"])
             ctx.stored_data[args["key"]] = args["value"] = value
+            ctx.unsaved_stored_data.add(args["key"])
             targets = set(ctx.stored_data_notification_clients[args["key"]])
             if args.get("want_reply", False):
                 targets.add(client)
@@ -2579,6 +3013,135 @@ async def console(ctx: Context):
             traceback.print_exc()
 
 
+def _format_labels(labels: typing.Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+
+class MetricsServer:
+    """Serves runtime metrics of the contexts hosted by this process over HTTP, in the Prometheus text format.
+    `get_contexts` returns the contexts to report by their room label."""
+    lag_interval = 1.  # seconds between event loop lag measurements
+
+    def __init__(self, get_contexts: typing.Callable[[], typing.Mapping[str, Context]]):
+        self.get_contexts = get_contexts
+        self.loop_lag = Histogram()
+        self.server: typing.Optional[asyncio.Server] = None
+        self.lag_task: typing.Optional[asyncio.Task] = None
+
+    async def start(self, host: typing.Optional[str], port: int) -> None:
+        self.server = await asyncio.start_server(self.handle_request, host, port)
+        self.lag_task = asyncio.create_task(self.measure_loop_lag(), name="MetricsLoopLag")
+
+    def close(self) -> None:
+        if self.server:
+            self.server.close()
+        if self.lag_task:
+            self.lag_task.cancel()
+
+    async def measure_loop_lag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            self.loop_lag.observe(max(0., loop.time() - start - self.lag_interval))
+
+    async def handle_request(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await reader.readline()
+            while (await reader.readline()).strip():
+                pass  # headers are not needed
+            method, path, *_ = request.decode("latin-1").split()
+            if method == "GET" and path.partition("?")[0] == "/metrics":
+                status, body = "200 OK", self.render().encode()
+            else:
+                status, body = "404 Not Found", b""
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (ValueError, ConnectionError):
+            pass  # malformed request or the scraper went away
+        finally:
+            writer.close()
+
+    def render(self) -> str:
+        contexts = self.get_contexts()
+        lines: typing.List[str] = []
+
+        def header(name: str, metric_type: str, description: str) -> None:
+            lines.append(f"# HELP archipelago_{name} {description}")
+            lines.append(f"# TYPE archipelago_{name} {metric_type}")
+
+        def sample(name: str, labels: typing.Dict[str, str], value: typing.Union[int, float]) -> None:
+            lines.append(f"archipelago_{name}{_format_labels(labels)} {value}")
+
+        def histogram(name: str, labels: typing.Dict[str, str], histogram: Histogram) -> None:
+            count = 0
+            for bound, bucket_count in zip(histogram.buckets + (math.inf,), histogram.counts):
+                count += bucket_count
+                sample(f"{name}_bucket", {**labels, "le": "+Inf" if bound == math.inf else str(bound)}, count)
+            sample(f"{name}_sum", labels, histogram.sum)
+            sample(f"{name}_count", labels, count)
+
+        room_metrics: typing.Tuple[typing.Tuple[str, str, str, typing.Callable[[Context], typing.Any]], ...] = (
+            ("clients", "gauge", "Connected clients", lambda ctx: len(ctx.endpoints)),
+            ("authenticated_clients", "gauge", "Connected clients that joined a slot",
+             lambda ctx: sum(1 for endpoint in ctx.endpoints if endpoint.auth)),
+            ("datastore_keys", "gauge", "Keys in the data storage", lambda ctx: len(ctx.stored_data)),
+            ("save_bytes", "gauge", "Size of the last written save snapshot or journal entry",
+             lambda ctx: ctx.save_metrics.last_size),
+            ("saves_total", "counter", "Saves written", lambda ctx: ctx.save_metrics.saves),
+            ("save_snapshots_total", "counter", "Saves written as a full snapshot",
+             lambda ctx: ctx.save_metrics.snapshots),
+            ("save_failures_total", "counter", "Saves that failed", lambda ctx: ctx.save_metrics.failed),
+            ("saves_skipped_total", "counter", "Autosaves skipped while the previous one was still being written",
+             lambda ctx: ctx.save_metrics.skipped),
+        )
+        for name, metric_type, description, get_value in room_metrics:
+            header(name, metric_type, description)
+            for room, ctx in contexts.items():
+                sample(name, {"room": room}, get_value(ctx))
+
+        save_durations = (
+            ("save_snapshot_seconds", "Event loop time spent taking save snapshots",
+             lambda metrics: metrics.total_snapshot_time),
+            ("save_write_seconds", "Time spent serializing, compressing and storing saves",
+             lambda metrics: metrics.total_write_time),
+        )
+        for name, description, get_total in save_durations:
+            header(name, "summary", description)
+            for room, ctx in contexts.items():
+                sample(f"{name}_sum", {"room": room}, get_total(ctx.save_metrics))
+                sample(f"{name}_count", {"room": room}, ctx.save_metrics.saves)
+
+        header("client_commands_total", "counter", "Commands received from clients")
+        for room, ctx in contexts.items():
+            for cmd, count in sorted(ctx.network_metrics.commands.items()):
+                sample("client_commands_total", {"room": room, "cmd": cmd}, count)
+
+        header("encode_seconds", "histogram", "Time spent encoding outgoing messages")
+        for room, ctx in contexts.items():
+            histogram("encode_seconds", {"room": room}, ctx.network_metrics.encode_seconds)
+        header("send_seconds", "histogram", "Time spent handing encoded messages to the clients' connections")
+        for room, ctx in contexts.items():
+            histogram("send_seconds", {"room": room}, ctx.network_metrics.send_seconds)
+
+        header("rooms", "gauge", "Rooms hosted by this process")
+        sample("rooms", {}, len(contexts))
+        header("event_loop_lag_seconds", "histogram", "Delay of the event loop in running a scheduled wakeup")
+        histogram("event_loop_lag_seconds", {}, self.loop_lag)
+        try:
+            import psutil
+        except ImportError:
+            pass  # psutil is a requirement for webhost, not default server
+        else:
+            header("resident_memory_bytes", "gauge", "Resident memory of this process")
+            sample("resident_memory_bytes", {}, psutil.Process().memory_info().rss)
+        return "\n".join(lines) + "\n"
+
+
 def parse_args() -> argparse.Namespace:
     from settings import get_settings
 
@@ -2645,6 +3208,10 @@ def parse_args() -> argparse.Namespace:
     #0 -> recommended for tournaments to force a level playing field, only allow an exact version match
     """)
     parser.add_argument('--log_network', default=defaults["log_network"], action="store_true")
+    parser.add_argument('--metrics_port', default=defaults["metrics_port"], type=int,
+                        help="serve runtime metrics on this port over HTTP, in the Prometheus text format. "
+                             "0 to disable.")
+    parser.add_argument('--metrics_host', default=defaults["metrics_host"])
     args = parser.parse_args()
     return args
 
@@ -2737,6 +3304,11 @@ async def main(args: argparse.Namespace):
                                                  'No password' if not ctx.password else 'Password: %s' % ctx.password))
 
     await ctx.server
+    metrics_server: typing.Optional[MetricsServer] = None
+    if args.metrics_port:
+        metrics_server = MetricsServer(lambda: {ctx.seed_name: ctx})
+        await metrics_server.start(args.metrics_host, args.metrics_port)
+        logging.info(f"Serving metrics at http://{args.metrics_host}:{args.metrics_port}/metrics")
     console_task = asyncio.create_task(console(ctx))
     if ctx.auto_shutdown:
         ctx.shutdown_task = asyncio.create_task(auto_shutdown(ctx, [console_task]))
@@ -2762,6 +3334,8 @@ async def main(args: argparse.Namespace):
 
     await ctx.exit_event.wait()
     console_task.cancel()
+    if metrics_server:
+        metrics_server.close()
     if ctx.shutdown_task:
         await ctx.shutdown_task
 
@@ -1,15 +1,20 @@
 from __future__ import annotations
 
-from collections.abc import Mapping, Sequence
+from array import array
+import bisect
+from collections.abc import Iterator, Mapping, Sequence
 import typing
 import enum
+import struct
+import sys
 import warnings
+import zlib
 from json import JSONEncoder, JSONDecoder
 
 if typing.TYPE_CHECKING:
     from websockets import WebSocketServerProtocol as ServerConnection
 
-from Utils import ByValue, Version
+from Utils import ByValue, Version, VersionException, restricted_dumps, restricted_loads
 
 
 class HintStatus(ByValue, enum.IntEnum):
@@ -427,6 +432,15 @@ class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tu
         if len(self.get(0, {})):
             raise ValueError("Invalid player id 0 for location")
 
+    @classmethod
+    def from_columns(cls, starts: Sequence[int], locations: Sequence[int], items: Sequence[int],
+                     receivers: Sequence[int], flags: Sequence[int]) -> _LocationStore:
+        if not len(items) == len(receivers) == len(flags) == len(locations):
+            raise ValueError("Location columns differ in length")
+        entries = list(zip(locations, zip(items, receivers, flags)))
+        return cls({sender: dict(entries[start:end])
+                    for sender, (start, end) in enumerate(zip(starts, starts[1:]), 1)})
+
     def find_item(self, slots: typing.Set[int], seeked_item_id: int
                   ) -> typing.Generator[typing.Tuple[int, int, int, int, int], None, None]:
         for finding_player, check_data in self.items():
@@ -474,6 +488,20 @@ class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tu
                         location_id not in checked])
 
 
+def apply_save_delta(savedata: dict[str, typing.Any], delta: dict[str, typing.Any]) -> None:
+    """Applies a save journal entry, as created by MultiServer's Context.get_save_delta, to a save in the format of
+    Context.get_save. Applying the same entry twice has no further effect."""
+    location_checks = savedata.setdefault("location_checks", {})
+    for key, locations in delta["location_checks"].items():
+        location_checks[key] = location_checks.get(key, set()) | locations
+    received_items = savedata.setdefault("received_items", {})
+    for key, (start, items) in delta["received_items"].items():
+        received_items.setdefault(key, [])[start:start + len(items)] = items
+    savedata.setdefault("hints", {}).update(delta["hints"])
+    savedata.setdefault("stored_data", {}).update(delta["stored_data"])
+    savedata.update(delta["state"])
+
+
 class MinimumVersions(typing.TypedDict):
     server: tuple[int, int, int]
     clients: dict[int, tuple[int, int, int]]
@@ -510,6 +538,474 @@ class MultiData(typing.TypedDict):
     race_mode: int
 
 
+COLUMNAR_MULTIDATA_VERSION = 4
+"""Format version byte of .archipelago files written by :func:`encode_columnar_multidata`."""
+
+_columnar_header = struct.Struct("<B7xI4x")
+_columnar_section = struct.Struct("<32sQQ")
+# typecode of each fixed-width column, stored little endian
+_columnar_types: dict[str, str] = {
+    "locations.starts": "q",  # per sender 1..n, index of its first entry, plus the total entry count
+    "locations.ids": "q",  # entries are sorted by sender, then location id
+    "locations.items": "q",
+    "locations.receivers": "I",
+    "locations.flags": "I",
+    "spheres.starts": "q",  # per sphere, index of its first entry, plus the total entry count
+    "spheres.players": "I",
+    "spheres.locations": "q",
+    "slot_info.ids": "I",
+    "slot_info.names": "I",  # index into the string table
+    "slot_info.games": "I",  # index into the string table
+    "slot_info.types": "I",
+    "slot_info.member_starts": "q",
+    "slot_info.members": "I",
+    "strings.starts": "q",
+    "strings.data": "B",  # utf-8
+}
+
+
+def _to_column(typecode: str, values: typing.Iterable[int]) -> bytes:
+    column = array(typecode, values)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column.tobytes()
+
+
+def _pack_sections(format_version: int, sections: list[tuple[str, bytes]]) -> bytes:
+    offset = _columnar_header.size + _columnar_section.size * len(sections)
+    table: list[bytes] = []
+    for name, data in sections:
+        if len(name.encode()) > _columnar_section.size - 16:
+            raise ValueError(f"Section name {name} is too long.")
+        offset = (offset + 7) & ~7  # align every section to 8 bytes
+        table.append(_columnar_section.pack(name.encode(), offset, len(data)))
+        offset += len(data)
+
+    output = bytearray(_columnar_header.pack(format_version, len(sections)))
+    output += b"".join(table)
+    for name, data in sections:
+        output += bytes(-len(output) % 8)
+        output += data
+    return bytes(output)
+
+
+def _unpack_sections(buffer: memoryview, format_version: int) -> dict[str, tuple[int, int]]:
+    """Returns offset and length of each section by name, in order."""
+    version, count = _columnar_header.unpack_from(buffer)
+    if version != format_version:
+        raise VersionException("Incompatible data format.")
+    sections: dict[str, tuple[int, int]] = {}
+    for index in range(count):
+        name, offset, length = _columnar_section.unpack_from(
+            buffer, _columnar_header.size + index * _columnar_section.size)
+        if offset + length > len(buffer):
+            raise ValueError("Truncated data.")
+        sections[name.rstrip(b"\0").decode()] = offset, length
+    return sections
+
+
+def _read_column(buffer: memoryview, section: tuple[int, int], typecode: str) -> Sequence[int]:
+    offset, length = section
+    column = buffer[offset:offset + length].cast(typecode)
+    if sys.byteorder == "big":
+        swapped = array(typecode, column)
+        swapped.byteswap()
+        return swapped
+    return column
+
+
+def _encode_strings(strings: typing.Iterable[str]) -> tuple[bytes, bytes]:
+    """Encodes strings into a column of start offsets, plus the total length, and the utf-8 data."""
+    encoded = [string.encode("utf-8") for string in strings]
+    starts = [0]
+    for string in encoded:
+        starts.append(starts[-1] + len(string))
+    return _to_column("q", starts), b"".join(encoded)
+
+
+def encode_columnar_multidata(multidata: Mapping[str, typing.Any]) -> bytes:
+    """
+    Serializes multidata into the columnar .archipelago format, including the version byte.
+
+    Locations, spheres and slot info are stored as fixed-width little endian arrays (names go into a string table),
+    so they can be read from an mmap without unpickling. Every other key is its own zlib compressed pickle,
+    which is only decoded when accessed through :class:`ColumnarMultiData`.
+    """
+    sections: list[tuple[str, bytes]] = []
+
+    locations: Mapping[int, Mapping[int, Sequence[int]]] = multidata["locations"]
+    starts: list[int] = [0]
+    entries: list[tuple[int, Sequence[int]]] = []
+    for sender in range(1, len(locations) + 1):
+        if sender not in locations:
+            raise ValueError("Player IDs not continuous")
+        entries.extend(sorted(locations[sender].items()))
+        starts.append(len(entries))
+    sections += [
+        ("locations.starts", _to_column("q", starts)),
+        ("locations.ids", _to_column("q", (location for location, _ in entries))),
+        ("locations.items", _to_column("q", (data[0] for _, data in entries))),
+        ("locations.receivers", _to_column("I", (data[1] for _, data in entries))),
+        ("locations.flags", _to_column("I", (data[2] if len(data) > 2 else 0 for _, data in entries))),
+    ]
+
+    if "spheres" in multidata:
+        starts = [0]
+        sphere_entries: list[tuple[int, int]] = []
+        for sphere in multidata["spheres"]:
+            sphere_entries.extend((player, location) for player, player_locations in sorted(sphere.items())
+                                  for location in sorted(player_locations))
+            starts.append(len(sphere_entries))
+        sections += [
+            ("spheres.starts", _to_column("q", starts)),
+            ("spheres.players", _to_column("I", (player for player, _ in sphere_entries))),
+            ("spheres.locations", _to_column("q", (location for _, location in sphere_entries))),
+        ]
+
+    if "slot_info" in multidata:
+        strings: dict[str, int] = {}
+        slots: list[tuple[int, NetworkSlot]] = list(multidata["slot_info"].items())
+        starts = [0]
+        members: list[int] = []
+        for _, slot in slots:
+            members.extend(slot.group_members)
+            starts.append(len(members))
+        sections += [
+            ("slot_info.ids", _to_column("I", (slot_id for slot_id, _ in slots))),
+            ("slot_info.names", _to_column("I", (strings.setdefault(slot.name, len(strings)) for _, slot in slots))),
+            ("slot_info.games", _to_column("I", (strings.setdefault(slot.game, len(strings)) for _, slot in slots))),
+            ("slot_info.types", _to_column("I", (slot.type for _, slot in slots))),
+            ("slot_info.member_starts", _to_column("q", starts)),
+            ("slot_info.members", _to_column("I", members)),
+        ]
+        string_starts, string_data = _encode_strings(strings)
+        sections += [
+            ("strings.starts", string_starts),
+            ("strings.data", string_data),
+        ]
+
+    for key, value in multidata.items():
+        if key not in ("locations", "spheres", "slot_info"):
+            sections.append((key, zlib.compress(restricted_dumps(value), 9)))
+
+    return _pack_sections(COLUMNAR_MULTIDATA_VERSION, sections)
+
+
+class ColumnarMultiData(Mapping[str, typing.Any]):
+    """
+    Read-only, lazily decoding view of multidata in the columnar .archipelago format.
+
+    `data` may be anything supporting the buffer protocol, including an mmap of the .archipelago file.
+    Decoded values are cached, so every key is only decoded once per instance.
+    """
+    _buffer: memoryview
+    _sections: dict[str, tuple[int, int]]
+    _keys: list[str]
+    _cache: dict[str, typing.Any]
+
+    def __init__(self, data: bytes | bytearray | memoryview | typing.Any) -> None:
+        self._buffer = memoryview(data).cast("B")
+        self._sections = _unpack_sections(self._buffer, COLUMNAR_MULTIDATA_VERSION)
+        self._keys = []
+        for name in self._sections:
+            key = name.split(".", 1)[0]
+            if key != "strings" and key not in self._keys:
+                self._keys.append(key)
+        self._cache = {}
+
+    def column(self, name: str) -> Sequence[int]:
+        """Returns the fixed-width column `name` without copying, if the platform is little endian."""
+        return _read_column(self._buffer, self._sections[name], _columnar_types[name])
+
+    def __getitem__(self, key: str) -> typing.Any:
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        if key not in self._keys:
+            raise KeyError(key)
+        if key == "locations":
+            value = _ColumnarLocations(self)
+        elif key == "spheres":
+            value = self._decode_spheres()
+        elif key == "slot_info":
+            value = self._decode_slot_info()
+        else:
+            offset, length = self._sections[key]
+            value = restricted_loads(zlib.decompress(self._buffer[offset:offset + length]))
+        self._cache[key] = value
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def location_store(self) -> LocationStore:
+        """Builds a :class:`LocationStore` directly from the location columns."""
+        return LocationStore.from_columns(self.column("locations.starts"), self.column("locations.ids"),
+                                          self.column("locations.items"), self.column("locations.receivers"),
+                                          self.column("locations.flags"))
+
+    def to_dict(self) -> MultiData:
+        """Decodes everything into the same dict the zlib-pickle format produces."""
+        multidata = dict(self)
+        multidata["locations"] = {player: dict(locations) for player, locations in multidata["locations"].items()}
+        return typing.cast(MultiData, multidata)
+
+    def _decode_spheres(self) -> list[dict[int, set[int]]]:
+        starts = self.column("spheres.starts")
+        players = self.column("spheres.players")
+        locations = self.column("spheres.locations")
+        spheres: list[dict[int, set[int]]] = []
+        for start, end in zip(starts, starts[1:]):
+            sphere: dict[int, set[int]] = {}
+            for player, location in zip(players[start:end], locations[start:end]):
+                sphere.setdefault(player, set()).add(location)
+            spheres.append(sphere)
+        return spheres
+
+    def _decode_slot_info(self) -> dict[int, NetworkSlot]:
+        string_starts = self.column("strings.starts")
+        offset, _ = self._sections["strings.data"]
+        data = self._buffer[offset:offset + string_starts[-1]]
+        strings = [str(data[start:end], "utf-8") for start, end in zip(string_starts, string_starts[1:])]
+        member_starts = self.column("slot_info.member_starts")
+        members = self.column("slot_info.members")
+        return {
+            slot_id: NetworkSlot(strings[name], strings[game], SlotType(slot_type),
+                                 list(members[start:end]) if start != end else ())
+            for slot_id, name, game, slot_type, start, end in zip(
+                self.column("slot_info.ids"), self.column("slot_info.names"), self.column("slot_info.games"),
+                self.column("slot_info.types"), member_starts, member_starts[1:])
+        }
+
+
+class _ColumnarLocations(Mapping[int, dict[int, tuple[int, int, int]]]):
+    """Locations of :class:`ColumnarMultiData`, decoding each sender only when it is accessed."""
+
+    def __init__(self, multidata: ColumnarMultiData) -> None:
+        self._starts = multidata.column("locations.starts")
+        self._columns = (multidata.column("locations.ids"), multidata.column("locations.items"),
+                         multidata.column("locations.receivers"), multidata.column("locations.flags"))
+        self._players: dict[int, dict[int, tuple[int, int, int]]] = {}
+
+    def __getitem__(self, sender: int) -> dict[int, tuple[int, int, int]]:
+        try:
+            return self._players[sender]
+        except KeyError:
+            pass
+        if not isinstance(sender, int) or not 0 < sender < len(self._starts):
+            raise KeyError(sender)
+        start, end = self._starts[sender - 1], self._starts[sender]
+        ids, items, receivers, flags = (column[start:end] for column in self._columns)
+        locations = self._players[sender] = dict(zip(ids, zip(items, receivers, flags)))
+        return locations
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(1, len(self._starts)))
+
+    def __len__(self) -> int:
+        return len(self._starts) - 1
+
+
+SHARED_DATA_PACKAGE_VERSION = 2
+"""Format version byte of files written by :func:`encode_shared_data_package`."""
+
+
+def encode_shared_data_package(games: Mapping[str, Mapping[str, typing.Any]],
+                               **per_game: Mapping[str, typing.Any]) -> bytes:
+    """
+    Serializes a data package, so processes can share one read-only copy of it through :class:`SharedDataPackage`.
+
+    Item and location names are stored as sorted tables, so name to id and id to name lookups work on an mmap
+    without decoding. Iterating them keeps the original order, which the data package checksum depends on. Every other
+    key of a game's package, as well as each game's value of the `per_game` mappings (such as item_name_groups), is a
+    pickle that is only decoded when accessed.
+    """
+    game_names = list(games)
+    game_starts, game_data = _encode_strings(game_names)
+    sections: list[tuple[str, bytes]] = [("games.starts", game_starts), ("games.data", game_data)]
+    for index, game in enumerate(game_names):
+        package = games[game]
+        for kind in ("item", "location"):
+            name_to_id: Mapping[str, int] = package[f"{kind}_name_to_id"]
+            by_name = sorted(name_to_id.items(), key=lambda entry: entry[0].encode("utf-8"))
+            by_id = sorted(range(len(by_name)), key=lambda name_index: by_name[name_index][1])
+            name_indices = {name: name_index for name_index, (name, _) in enumerate(by_name)}
+            name_starts, name_data = _encode_strings(name for name, _ in by_name)
+            sections += [
+                (f"{index}.{kind}.name_starts", name_starts),
+                (f"{index}.{kind}.names", name_data),
+                (f"{index}.{kind}.ids", _to_column("q", (code for _, code in by_name))),
+                (f"{index}.{kind}.sorted_ids", _to_column("q", (by_name[name_index][1] for name_index in by_id))),
+                (f"{index}.{kind}.id_names", _to_column("I", by_id)),
+                (f"{index}.{kind}.order", _to_column("I", (name_indices[name] for name in name_to_id))),
+            ]
+        sections.append((f"{index}.package", restricted_dumps({
+            key: value for key, value in package.items() if key not in ("item_name_to_id", "location_name_to_id")
+        })))
+        for key, values in per_game.items():
+            if game in values:
+                sections.append((f"{index}.{key}", restricted_dumps(values[game])))
+    return _pack_sections(SHARED_DATA_PACKAGE_VERSION, sections)
+
+
+class SharedDataPackage(Mapping[str, dict[str, typing.Any]]):
+    """
+    Read-only view of a data package written by :func:`encode_shared_data_package`, by game.
+
+    `data` may be anything supporting the buffer protocol, usually an mmap that is shared by multiple processes.
+    The name to id mappings of each game's package are :class:`SharedNameTable`, which do not copy the names.
+    """
+    _buffer: memoryview
+    _sections: dict[str, tuple[int, int]]
+    _games: dict[str, int]
+    _cache: dict[str, dict[str, typing.Any]]
+
+    def __init__(self, data: bytes | bytearray | memoryview | typing.Any) -> None:
+        self._buffer = memoryview(data).cast("B")
+        self._sections = _unpack_sections(self._buffer, SHARED_DATA_PACKAGE_VERSION)
+        starts = self._column("games.starts", "q")
+        names = self._bytes("games.data")
+        self._games = {str(names[start:end], "utf-8"): index
+                       for index, (start, end) in enumerate(zip(starts, starts[1:]))}
+        self._cache = {}
+
+    def _column(self, name: str, typecode: str) -> Sequence[int]:
+        return _read_column(self._buffer, self._sections[name], typecode)
+
+    def _bytes(self, name: str) -> memoryview:
+        offset, length = self._sections[name]
+        return self._buffer[offset:offset + length]
+
+    def __getitem__(self, game: str) -> dict[str, typing.Any]:
+        try:
+            return self._cache[game]
+        except KeyError:
+            pass
+        index = self._games[game]
+        package = restricted_loads(self._bytes(f"{index}.package"))
+        for kind in ("item", "location"):
+            package[f"{kind}_name_to_id"] = SharedNameTable(
+                self._column(f"{index}.{kind}.name_starts", "q"), self._bytes(f"{index}.{kind}.names"),
+                self._column(f"{index}.{kind}.ids", "q"), self._column(f"{index}.{kind}.sorted_ids", "q"),
+                self._column(f"{index}.{kind}.id_names", "I"), self._column(f"{index}.{kind}.order", "I"))
+        self._cache[game] = package
+        return package
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._games)
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def per_game(self, key: str) -> Mapping[str, typing.Any]:
+        """Returns a view of the `key` values passed to :func:`encode_shared_data_package`, by game."""
+        return _SharedPerGame(self, key)
+
+    def _load_per_game(self, key: str, game: str) -> typing.Any:
+        return restricted_loads(self._bytes(f"{self._games[game]}.{key}"))
+
+    def _has_per_game(self, key: str, game: str) -> bool:
+        return game in self._games and f"{self._games[game]}.{key}" in self._sections
+
+
+class _SharedPerGame(Mapping[str, typing.Any]):
+    """Values of one key of :class:`SharedDataPackage` by game, decoding each game's value only when accessed."""
+
+    def __init__(self, package: SharedDataPackage, key: str) -> None:
+        self._package = package
+        self._key = key
+        self._cache: dict[str, typing.Any] = {}
+
+    def __getitem__(self, game: str) -> typing.Any:
+        try:
+            return self._cache[game]
+        except KeyError:
+            pass
+        if not self._package._has_per_game(self._key, game):
+            raise KeyError(game)
+        value = self._cache[game] = self._package._load_per_game(self._key, game)
+        return value
+
+    def __contains__(self, game: object) -> bool:
+        return isinstance(game, str) and self._package._has_per_game(self._key, game)
+
+    def __iter__(self) -> Iterator[str]:
+        return (game for game in self._package if self._package._has_per_game(self._key, game))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class SharedNameTable(Mapping[str, int]):
+    """Name to id mapping of :class:`SharedDataPackage`, looked up by binary search over the sorted names."""
+
+    def __init__(self, name_starts: Sequence[int], names: memoryview, ids: Sequence[int],
+                 sorted_ids: Sequence[int], id_names: Sequence[int], order: Sequence[int]) -> None:
+        self._name_starts = name_starts
+        self._names = names
+        self._ids = ids
+        self._sorted_ids = sorted_ids
+        self._id_names = id_names
+        self._order = order
+
+    def _name(self, index: int) -> bytes:
+        return bytes(self._names[self._name_starts[index]:self._name_starts[index + 1]])
+
+    def __getitem__(self, name: str) -> int:
+        if not isinstance(name, str):
+            raise KeyError(name)
+        key = name.encode("utf-8")
+        low, high = 0, len(self._ids)
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._ids) and self._name(low) == key:
+            return self._ids[low]
+        raise KeyError(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return (str(self._name(index), "utf-8") for index in self._order)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def to_dict(self) -> dict[str, int]:
+        """Returns the mapping as dict, in its original order."""
+        return {str(self._name(index), "utf-8"): self._ids[index] for index in self._order}
+
+    def names_by_id(self) -> SharedIdTable:
+        """Returns the reverse mapping, id to name."""
+        return SharedIdTable(self)
+
+
+class SharedIdTable(Mapping[int, str]):
+    """Id to name mapping of a :class:`SharedNameTable`, looked up by binary search over the sorted ids."""
+
+    def __init__(self, names: SharedNameTable) -> None:
+        self._table = names
+
+    def __getitem__(self, code: int) -> str:
+        sorted_ids = self._table._sorted_ids
+        if isinstance(code, int):
+            index = bisect.bisect_left(sorted_ids, code)
+            if index < len(sorted_ids) and sorted_ids[index] == code:
+                return str(self._table._name(self._table._id_names[index]), "utf-8")
+        raise KeyError(code)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._table._sorted_ids)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+
 if typing.TYPE_CHECKING:  # type-check with pure python implementation until we have a typing stub
     LocationStore = _LocationStore
 else:
@@ -11,7 +11,7 @@ from CommonClient import CommonContext, server_loop, gui_enabled, \
     ClientCommandProcessor, logger, get_base_parser
 import Utils
 from Utils import async_start
-from worlds import network_data_package
+from worlds import get_game_data_package
 from worlds.oot import OOTWorld
 from worlds.oot.Rom import Rom, compress_rom_file
 from worlds.oot.N64Patch import apply_patch_file
@@ -50,7 +50,7 @@ deathlink_sent_this_death: we interacted with the multiworld on this death, wait
 
 """
 
-oot_loc_name_to_id = network_data_package["games"]["Ocarina of Time"]["location_name_to_id"]
+oot_loc_name_to_id = get_game_data_package("Ocarina of Time")["location_name_to_id"]
 
 script_version: int = 3
 
@@ -9,6 +9,7 @@ import subprocess
 import base64
 import logging
 import asyncio
+import contextlib
 import enum
 import typing
 
@@ -129,6 +130,10 @@ class SNIContext(CommonContext):
     snes_recv_queue: "asyncio.Queue[bytes]"
     snes_request_lock: asyncio.Lock
     snes_write_buffer: typing.List[typing.Tuple[int, bytes]]
+    snes_multi_read: bool
+    """whether GetAddress requests can read several ranges, turned off once such a request fails"""
+    snes_read_cache: typing.Optional[typing.List[typing.Tuple[int, memoryview]]]
+    """ranges read by snes_read_ranges within snes_read_snapshot, None outside of it"""
     snes_connector_lock: threading.Lock
     death_state: DeathState
     killing_player_task: "typing.Optional[asyncio.Task[None]]"
@@ -155,6 +160,8 @@ class SNIContext(CommonContext):
         self.snes_recv_queue = asyncio.Queue()
         self.snes_request_lock = asyncio.Lock()
         self.snes_write_buffer = []
+        self.snes_multi_read = True
+        self.snes_read_cache = None
         self.snes_connector_lock = threading.Lock()
         self.death_state = DeathState.alive  # for death link flop behaviour
         self.killing_player_task = None
@@ -515,10 +522,13 @@ async def snes_recv_loop(ctx: SNIContext) -> None:
             ctx.snes_autoreconnect_task = asyncio.create_task(snes_autoreconnect(ctx), name="snes auto-reconnect")
 
 
-async def snes_read(ctx: SNIContext, address: int, size: int) -> typing.Optional[bytes]:
-    try:
-        await ctx.snes_request_lock.acquire()
-
+async def _snes_get_address(ctx: SNIContext, requests: typing.Sequence[typing.Sequence[typing.Tuple[int, int]]]
+                            ) -> typing.Optional[bytes]:
+    """
+    Sends a GetAddress request per list of (address, size) operand pairs, without waiting for replies in between,
+    then collects the replies, which arrive in request order.
+    """
+    async with ctx.snes_request_lock:
         if (
             ctx.snes_state != SNESState.SNES_ATTACHED or
             ctx.snes_socket is None or
@@ -527,17 +537,23 @@ async def snes_read(ctx: SNIContext, address: int, size: int) -> typing.Optional
         ):
             return None
 
-        GetAddress_Request: SNESRequest = {
-            "Opcode": "GetAddress",
-            "Space": "SNES",
-            "Operands": [hex(address)[2:], hex(size)[2:]]
-        }
+        size = 0
         try:
-            await ctx.snes_socket.send(dumps(GetAddress_Request))
+            for request in requests:
+                operands: typing.List[str] = []
+                for address, read_size in request:
+                    operands += [hex(address)[2:], hex(read_size)[2:]]
+                    size += read_size
+                GetAddress_Request: SNESRequest = {
+                    "Opcode": "GetAddress",
+                    "Space": "SNES",
+                    "Operands": operands
+                }
+                await ctx.snes_socket.send(dumps(GetAddress_Request))
         except ConnectionClosed:
             return None
 
-        data: bytes = bytes()
+        data = bytearray()
         while len(data) < size:
             try:
                 data += await asyncio.wait_for(ctx.snes_recv_queue.get(), 5)
@@ -545,17 +561,106 @@ async def snes_read(ctx: SNIContext, address: int, size: int) -> typing.Optional
                 break
 
         if len(data) != size:
+            address = requests[0][0][0]
             snes_logger.error('Error reading %s, requested %d bytes, received %d' % (hex(address), size, len(data)))
             if len(data):
                 snes_logger.error(str(data))
                 snes_logger.warning('Communication Failure with SNI')
+            if ctx.snes_multi_read and any(len(request) > 1 for request in requests):
+                snes_logger.warning("Reading several ranges in one request failed, "
+                                    "reading them one request each from now on.")
+                ctx.snes_multi_read = False
             if ctx.snes_socket is not None and not ctx.snes_socket.closed:
                 await ctx.snes_socket.close()
             return None
 
-        return data
+        return bytes(data)
+
+
+def _find_read(reads: typing.Iterable[typing.Tuple[int, memoryview]], address: int,
+               size: int) -> typing.Optional[memoryview]:
+    for start, data in reads:
+        if start <= address and address + size <= start + len(data):
+            return data[address - start:address - start + size]
+    return None
+
+
+@contextlib.contextmanager
+def snes_read_snapshot(ctx: SNIContext) -> typing.Iterator[None]:
+    """
+    Within this block, snes_read answers from the ranges read by snes_read_ranges in it, until the next write.
+    The data doesn't change along with memory, so only use it around reads that belong to the same moment.
+    Reading a range again with snes_read_ranges refreshes it.
+    """
+    previous_cache = ctx.snes_read_cache
+    if previous_cache is None:
+        ctx.snes_read_cache = []
+    try:
+        yield
     finally:
-        ctx.snes_request_lock.release()
+        ctx.snes_read_cache = previous_cache
+
+
+async def snes_read(ctx: SNIContext, address: int, size: int) -> typing.Optional[bytes]:
+    if ctx.snes_read_cache:
+        cached = _find_read(ctx.snes_read_cache, address, size)
+        if cached is not None:
+            return bytes(cached)
+    return await _snes_get_address(ctx, [[(address, size)]])
+
+
+async def snes_read_ranges(ctx: SNIContext,
+                           ranges: typing.Sequence[typing.Tuple[int, int]]) -> typing.Optional[typing.List[memoryview]]:
+    """
+    Reads several (address, size) ranges at once, returning a memoryview per range, or None if reading fails.
+
+    Adjacent and overlapping ranges are merged, then requested as multi-operand GetAddress requests of up to
+    SNES_READ_CHUNK_SIZE bytes each, all sent before waiting for the first reply.
+    Within snes_read_snapshot, snes_read answers from this data until the next write.
+    """
+    from worlds.AutoSNIClient import SNES_READ_CHUNK_SIZE
+
+    if not ranges:
+        return []
+
+    merged: typing.List[typing.Tuple[int, int]] = []
+    for address, size in sorted(ranges):
+        if merged and address <= merged[-1][0] + merged[-1][1]:
+            start, merged_size = merged[-1]
+            merged[-1] = (start, max(merged_size, address + size - start))
+        else:
+            merged.append((address, size))
+
+    requests: typing.List[typing.List[typing.Tuple[int, int]]] = [[]]
+    request_size = 0
+    for address, size in merged:
+        for offset in range(0, size, SNES_READ_CHUNK_SIZE):
+            chunk_size = min(SNES_READ_CHUNK_SIZE, size - offset)
+            if requests[-1] and (not ctx.snes_multi_read or request_size + chunk_size > SNES_READ_CHUNK_SIZE):
+                requests.append([])
+                request_size = 0
+            requests[-1].append((address + offset, chunk_size))
+            request_size += chunk_size
+
+    data = await _snes_get_address(ctx, requests)
+    if data is None:
+        return None
+
+    view = memoryview(data)
+    reads: typing.List[typing.Tuple[int, memoryview]] = []
+    offset = 0
+    for address, size in merged:
+        reads.append((address, view[offset:offset + size]))
+        offset += size
+    if ctx.snes_read_cache is not None:
+        ctx.snes_read_cache[:0] = reads  # newer reads answer first
+
+    results: typing.List[memoryview] = []
+    for address, size in ranges:
+        result = _find_read(reads, address, size)
+        assert result is not None, (address, size)
+        results.append(result)
+    return results
 
 
 async def snes_write(ctx: SNIContext, write_list: typing.List[typing.Tuple[int, bytes]]) -> bool:
@@ -566,6 +671,9 @@ async def snes_write(ctx: SNIContext, write_list: typing.List[typing.Tuple[int,
                 not ctx.snes_socket.open or ctx.snes_socket.closed:
             return False
 
+        if ctx.snes_read_cache is not None:
+            ctx.snes_read_cache = []
+
         PutAddress_Request: SNESRequest = {"Opcode": "PutAddress", "Operands": [], 'Space': 'SNES'}
         try:
             for address, data in write_list:
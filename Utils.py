@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import concurrent.futures
+import contextlib
 import json
 import typing
 import builtins
@@ -15,6 +16,8 @@ import io
 import collections
 import importlib
 import logging
+import threading
+import time
 import warnings
 
 from argparse import Namespace
@@ -1374,3 +1377,126 @@ def get_all_causes(ex: Exception) -> str:
     top = causes[-1]
     others = "".join(f"\n{' ' * (i + 1)}Which caused: {c}" for i, c in enumerate(reversed(causes[:-1])))
     return f"{top}{others}"
+
+
+def get_peak_rss() -> Optional[int]:
+    """Returns the highest resident set size of this process so far in bytes, or None if it can't be determined."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # reported in bytes on macOS and in KiB everywhere else
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class GenerationProfiler:
+    """
+    Records wall time, CPU time, peak RSS and CollectionState copies of the stages of a generation,
+    as well as of the world calls made during each stage.
+    World calls are timed with the CPU time of the calling thread, stages with the CPU time of the whole process.
+    Each thread runs its own stages, see carry_stages to charge work handed to another thread to the current stages.
+    """
+    stages: typing.List[Dict[str, Any]]
+    """Stages in the order they started. Nested stages have a higher depth than the stage they ran in."""
+    worlds: Dict[int, Dict[str, Any]]
+    """Totals of all world calls per player."""
+    state_copies: int
+    """Number of CollectionState copies made so far, counted by CollectionState.copy."""
+    report_path: Optional[str]
+    """Where write puts the report, set once the generation is named"""
+    player_names: Mapping[int, str]
+    games: Mapping[int, str]
+
+    def __init__(self) -> None:
+        self.stages = []
+        self.worlds = {}
+        self.state_copies = 0
+        self.report_path = None
+        self.player_names = {}
+        self.games = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def _running(self) -> typing.List[Dict[str, Any]]:
+        """Stages running in the current thread, innermost last."""
+        running = getattr(self._local, "running", None)
+        if running is None:
+            running = self._local.running = []
+        return running
+
+    @property
+    def thread_state_copies(self) -> int:
+        """Number of CollectionState copies made so far by the current thread."""
+        return getattr(self._local, "state_copies", 0)
+
+    def count_state_copy(self) -> None:
+        with self._lock:
+            self.state_copies += 1
+        self._local.state_copies = self.thread_state_copies + 1
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> typing.Iterator[None]:
+        running = self._running
+        stage: Dict[str, Any] = {"name": name, "depth": len(running), "worlds": {}}
+        with self._lock:
+            self.stages.append(stage)
+        running.append(stage)
+        wall_time, cpu_time, state_copies = time.perf_counter(), time.process_time(), self.state_copies
+        try:
+            yield
+        finally:
+            running.remove(stage)
+            stage["wall_time"] = time.perf_counter() - wall_time
+            stage["cpu_time"] = time.process_time() - cpu_time
+            stage["state_copies"] = self.state_copies - state_copies
+            stage["peak_rss"] = get_peak_rss()
+
+    def carry_stages(self, function: typing.Callable[..., T]) -> typing.Callable[..., T]:
+        """Wraps function, so world calls it makes on another thread are charged to the current thread's stages."""
+        stages = list(self._running)
+
+        def run(*args: Any, **kwargs: Any) -> T:
+            previous = getattr(self._local, "running", None)
+            self._local.running = list(stages)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._local.running = previous
+
+        return run
+
+    def record_world_call(self, player: int, method_name: str, wall_time: float, cpu_time: float,
+                          state_copies: int, peak_rss_before: Optional[int]) -> None:
+        """Adds a world call to the totals of the world and of the innermost stage running in the current thread.
+        The peak RSS of a world is the process' peak after its latest call, its growth how much the peak rose while its
+        calls ran."""
+        peak_rss = get_peak_rss()
+        peak_rss_growth = peak_rss - peak_rss_before if peak_rss is not None and peak_rss_before is not None else 0
+        running = self._running
+        with self._lock:
+            world_totals = self.worlds.setdefault(player, {"wall_time": 0.0, "cpu_time": 0.0, "state_copies": 0,
+                                                           "peak_rss": None, "peak_rss_growth": 0, "calls": {}})
+            totals = [world_totals]
+            if running:
+                totals.append(running[-1]["worlds"].setdefault(
+                    player, {"wall_time": 0.0, "cpu_time": 0.0, "state_copies": 0, "peak_rss_growth": 0}))
+            for total in totals:
+                total["wall_time"] += wall_time
+                total["cpu_time"] += cpu_time
+                total["state_copies"] += state_copies
+                total["peak_rss_growth"] += peak_rss_growth
+            world_totals["peak_rss"] = peak_rss
+            calls = world_totals["calls"]
+            calls[method_name] = calls.get(method_name, 0.0) + wall_time
+
+    def write(self, path: Optional[str] = None) -> None:
+        """Writes the recorded data as JSON to path or report_path, labelling worlds with their player name and
+        game."""
+        path = path or self.report_path
+        assert path, "No file to write the report to"
+        worlds = {player: {"name": self.player_names.get(player), "game": self.games.get(player), **totals}
+                  for player, totals in self.worlds.items()}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"stages": self.stages, "worlds": worlds, "peak_rss": get_peak_rss()}, f, indent=1)
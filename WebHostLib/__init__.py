@@ -43,6 +43,13 @@ app.config["SELFLAUNCHCERT"] = None  # can point to a SSL Certificate to encrypt
 app.config["SELFLAUNCHKEY"] = None  # can point to a SSL Certificate Key to encrypt Room websocket connections
 app.config["SELFGEN"] = True  # application process is in charge of scheduling Generations.
 app.config["GAME_PORTS"] = ["49152-65535", 0]
+# if set, room hoster N serves runtime metrics of its rooms in the Prometheus text format on this port + N
+app.config["HOSTER_METRICS_PORT"] = 0
+app.config["HOSTER_METRICS_HOST"] = "127.0.0.1"
+# if set, the autolauncher drains room hosters and moves rooms as listed in this yaml file, see read_hoster_control
+app.config["HOSTER_CONTROL_FILE"] = None
+# approximate memory in bytes for seeds, data packages and saves kept decoded across tracker requests
+app.config["TRACKER_DATA_CACHE_SIZE"] = 64 * 1024 * 1024
 # at what amount of worlds should scheduling be used, instead of rolling in the web-thread
 app.config["JOB_THRESHOLD"] = 1
 # after what time in seconds should generation be aborted, freeing the queue slot. Can be set to None to disable.
@@ -1,21 +1,33 @@
 from __future__ import annotations
 
+import bisect
+import collections
+import hashlib
 import json
 import logging
 import multiprocessing
+import os
+import queue
+import time
 import typing
-from datetime import timedelta
+from datetime import datetime, timedelta
 from threading import Event, Thread
 from typing import Any
 from uuid import UUID
 
 from pony.orm import db_session, select, commit, PrimaryKey, desc
 
-from Utils import restricted_loads, utcnow
+from Utils import parse_yaml, restricted_loads, utcnow
+from . import to_python
 from .locker import Locker, AlreadyRunningException
 
 _stop_event = Event()
 
+schedule_interval = 0.25
+full_scan_interval = 30
+rebalance_interval = 60
+activity_slack = timedelta(seconds=5)  # rooms may commit activity out of order
+
 
 def stop() -> None:
     """Stops previously launched threads"""
@@ -118,6 +130,201 @@ def cleanup(config: dict[str, Any]):
         logging.info(f"{rooms} Rooms, {seeds} Seeds and {slots} Slots have been deleted.")
 
 
+def get_active_rooms(max_room_timeout: int, since: datetime | None = None) -> list[tuple[UUID, datetime]]:
+    """Returns id and last activity of rooms within their timeout, only of those active since `since` if given."""
+    cutoff = utcnow() - timedelta(seconds=max_room_timeout)
+    if since and since > cutoff:
+        cutoff = since
+    rooms = select(room for room in Room if room.last_activity >= cutoff).order_by(desc(Room.last_port))
+    # we have to filter twice, as the per-room timeout can't currently be PonyORM transpiled.
+    return [(room.id, room.last_activity) for room in rooms
+            if room.last_activity >= utcnow() - timedelta(seconds=room.timeout + 5)]
+
+
+def _ring_hash(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hashing of room ids onto hoster indices.
+
+    Every hoster owns many points on the ring, so rooms spread evenly, and adding or removing a hoster only moves the
+    rooms of the ring segments it gains or loses, instead of reshuffling every room.
+    """
+    points_per_node = 64
+
+    def __init__(self, nodes: typing.Iterable[int]):
+        points = sorted((_ring_hash(f"{node}:{point}".encode()), node)
+                        for node in nodes for point in range(self.points_per_node))
+        self._hashes = [point_hash for point_hash, _ in points]
+        self._nodes = [node for _, node in points]
+        self.node_count = len(set(self._nodes))
+
+    def preference(self, key: UUID) -> list[int]:
+        """Returns all nodes, ordered by preference for key."""
+        nodes: list[int] = []
+        start = bisect.bisect(self._hashes, _ring_hash(key.bytes))
+        for offset in range(len(self._nodes)):
+            node = self._nodes[(start + offset) % len(self._nodes)]
+            if node not in nodes:
+                nodes.append(node)
+                if len(nodes) == self.node_count:
+                    break
+        return nodes
+
+
+class RoomScheduler:
+    """Assigns rooms to hosters and moves them between hosters.
+
+    A room goes to the first hoster in its consistent hash preference that is not overloaded. Load is relative to the
+    average of all hosters, over the CPU, RSS and connected clients they report. Rooms are moved by shutting them
+    down, which saves them, and starting them on the target hoster once the old hoster reports them shut down.
+    """
+    placement_load = 1.25  # hosters above this multiple of the average load are skipped when placing a room
+    migration_load = 1.5  # hosters above this multiple of the average load hand off a room on rebalance
+    migration_timeout = 60  # seconds a hoster gets to shut down a room that is being moved
+
+    hosters: list[MultiworldInstance]
+    assignments: dict[UUID, int]
+    migrations: dict[UUID, tuple[int, float]]
+    overdue_migrations: set[UUID]
+    draining: set[int]
+
+    def __init__(self, hosters: list[MultiworldInstance]):
+        self.hosters = hosters
+        self.ring = HashRing(range(len(hosters)))
+        self.assignments = {}  # hoster index by room id
+        self.migrations = {}  # target hoster index and deadline by room id
+        self.overdue_migrations = set()  # rooms that were left in place, but may still shut down
+        self.draining = set()
+        self._queue: collections.deque[UUID] = collections.deque()
+        self._queued: set[UUID] = set()
+
+    def enqueue(self, room_id: UUID) -> None:
+        """Queues a room to be started, if it is not hosted or queued already."""
+        if room_id not in self.assignments and room_id not in self._queued:
+            self._queued.add(room_id)
+            self._queue.append(room_id)
+
+    def relative_loads(self) -> list[float]:
+        """Returns the load of each hoster as multiple of the average, taking the highest of its load metrics."""
+        loads = [hoster.load for hoster in self.hosters]
+        relative = [0.] * len(loads)
+        for metric in ("cpu_percent", "rss", "clients"):
+            values = [getattr(load, metric) if load else 0 for load in loads]
+            mean = sum(values) / len(values)
+            if mean:
+                for index, value in enumerate(values):
+                    relative[index] = max(relative[index], value / mean)
+        return relative
+
+    def select_hoster(self, room_id: UUID, relative_loads: list[float]) -> int:
+        preference = self.ring.preference(room_id)
+        preference = [index for index in preference if index not in self.draining] or preference
+        for index in preference:
+            if relative_loads[index] <= self.placement_load:
+                return index
+        return min(preference, key=relative_loads.__getitem__)
+
+    def update(self) -> None:
+        """Collects reports of the hosters, finishes room moves and starts queued rooms."""
+        for index, hoster in enumerate(self.hosters):
+            hoster.update_load()
+            for room_id in hoster.collect_shut_down():
+                if self.assignments.get(room_id) == index:
+                    del self.assignments[room_id]
+                migration = self.migrations.pop(room_id, None)
+                if migration:
+                    self._start(room_id, migration[0])
+                elif room_id in self.overdue_migrations:
+                    # its activity was set into the past on shutdown, so the database scans won't bring it back
+                    logging.info(f"Room {room_id} shut down late to be moved, starting it again.")
+                    self.overdue_migrations.discard(room_id)
+                    self.enqueue(room_id)
+        now = time.monotonic()
+        for room_id, (_, deadline) in list(self.migrations.items()):
+            if deadline < now:
+                logging.warning(f"Room {room_id} did not shut down to be moved, leaving it in place.")
+                del self.migrations[room_id]
+                self.overdue_migrations.add(room_id)
+        if self._queue:
+            relative_loads = self.relative_loads()
+            while self._queue:
+                room_id = self._queue.popleft()
+                self._queued.discard(room_id)
+                if room_id not in self.assignments:
+                    self._start(room_id, self.select_hoster(room_id, relative_loads))
+
+    def _start(self, room_id: UUID, index: int) -> None:
+        self.overdue_migrations.discard(room_id)
+        self.assignments[room_id] = index
+        self.hosters[index].start_room(room_id)
+
+    def migrate(self, room_id: UUID, target: int) -> None:
+        """Moves a hosted room to the hoster with index target."""
+        source = self.assignments.get(room_id)
+        if source is None or source == target or room_id in self.migrations:
+            return
+        logging.info(f"Moving room {room_id} from {self.hosters[source].name} to {self.hosters[target].name}.")
+        self.migrations[room_id] = target, time.monotonic() + self.migration_timeout
+        self.hosters[source].stop_room(room_id)
+
+    def drain(self, index: int) -> None:
+        """Moves all rooms off the hoster with index and stops placing rooms on it."""
+        self.draining.add(index)
+        relative_loads = self.relative_loads()
+        for room_id, hoster_index in list(self.assignments.items()):
+            if hoster_index == index:
+                self.migrate(room_id, self.select_hoster(room_id, relative_loads))
+
+    def apply_control(self, drain: set[int], migrate: dict[UUID, int]) -> None:
+        """Drains the hosters in drain, lets the other hosters take new rooms again and moves the rooms in migrate."""
+        valid = range(len(self.hosters))
+        for index in (drain | set(migrate.values())).difference(valid):
+            logging.warning(f"Hoster control names hoster {index}, but there are only {len(self.hosters)}.")
+        self.draining.intersection_update(drain)
+        for index in sorted(drain.intersection(valid)):
+            self.drain(index)
+        for room_id, target in migrate.items():
+            if target in valid:
+                self.migrate(room_id, target)
+
+    def rebalance(self) -> None:
+        """Moves one room off the most loaded hoster, if it is overloaded.
+
+        The room is chosen to move at most half of the client difference to the least loaded hoster,
+        so that the move does not overload the target in turn.
+        """
+        relative_loads = self.relative_loads()
+        source = max(range(len(self.hosters)), key=relative_loads.__getitem__)
+        targets = [index for index in range(len(self.hosters)) if index != source and index not in self.draining]
+        source_load = self.hosters[source].load
+        if relative_loads[source] <= self.migration_load or not targets or not source_load:
+            return
+        target = min(targets, key=relative_loads.__getitem__)
+        if relative_loads[target] > self.placement_load:
+            return
+        target_load = self.hosters[target].load
+        movable_clients = (source_load.clients - (target_load.clients if target_load else 0)) // 2
+        candidates = [(clients, room_id) for room_id, clients in source_load.room_clients.items()
+                      if 0 < clients <= movable_clients and self.assignments.get(room_id) == source
+                      and room_id not in self.migrations]
+        if candidates:
+            self.migrate(max(candidates)[1], target)
+
+
+def read_hoster_control(path: str) -> tuple[set[int], dict[UUID, int]]:
+    """Reads the HOSTER_CONTROL_FILE, a yaml mapping that may contain
+    drain: list of hoster indices to move all rooms off and to keep new rooms away from
+    migrate: mapping of room id, as in the room's url, to the index of the hoster to move that room to
+    """
+    with open(path, encoding="utf-8-sig") as f:
+        control = parse_yaml(f.read()) or {}
+    drain = {int(index) for index in control.get("drain") or ()}
+    migrate = {to_python(room): int(index) for room, index in (control.get("migrate") or {}).items()}
+    return drain, migrate
+
+
 def autohost(config: dict):
     def keep_running():
         stop_event = _stop_event
@@ -130,16 +337,41 @@ def autohost(config: dict):
                     hosters.append(hoster)
                     hoster.start()
 
-                while not stop_event.wait(0.1):
+                scheduler = RoomScheduler(hosters)
+                # operators drain hosters and move rooms by editing this file, which is read again when it changes
+                control_file = config["HOSTER_CONTROL_FILE"]
+                control_mtime: float | None = None
+                # only rooms with newer activity are looked up, besides a full scan every full_scan_interval
+                activity_seen: datetime | None = None
+                next_full_scan = time.monotonic()
+                next_rebalance = next_full_scan + rebalance_interval
+                while not stop_event.wait(schedule_interval):
+                    now = time.monotonic()
+                    since = activity_seen - activity_slack if activity_seen else None
+                    if now >= next_full_scan:
+                        since = None
+                        next_full_scan = now + full_scan_interval
                     with db_session:
-                        rooms = select(
-                            room for room in Room if
-                            room.last_activity >= utcnow() - timedelta(
-                                seconds=config["MAX_ROOM_TIMEOUT"])).order_by(desc(Room.last_port))
-                        for room in rooms:
-                            # we have to filter twice, as the per-room timeout can't currently be PonyORM transpiled.
-                            if room.last_activity >= utcnow() - timedelta(seconds=room.timeout + 5):
-                                hosters[room.id.int % len(hosters)].start_room(room.id)
+                        for room_id, last_activity in get_active_rooms(config["MAX_ROOM_TIMEOUT"], since):
+                            scheduler.enqueue(room_id)
+                            if not activity_seen or last_activity > activity_seen:
+                                activity_seen = last_activity
+                    if control_file:
+                        try:
+                            mtime = os.stat(control_file).st_mtime
+                            if mtime != control_mtime:
+                                control_mtime = mtime
+                                scheduler.apply_control(*read_hoster_control(control_file))
+                        except FileNotFoundError:
+                            if control_mtime is not None:
+                                control_mtime = None
+                                scheduler.apply_control(set(), {})
+                        except Exception as e:
+                            logging.exception(f"Could not apply hoster control file {control_file}: {e}")
+                    scheduler.update()
+                    if now >= next_rebalance:
+                        scheduler.rebalance()
+                        next_rebalance = now + rebalance_interval
 
         except AlreadyRunningException:
             logging.info("Autohost reports as already running, not starting another.")
@@ -194,8 +426,13 @@ class MultiworldInstance():
         self.key = config["SELFLAUNCHKEY"]
         self.host = config["HOST_ADDRESS"]
         self.game_ports = config["GAME_PORTS"]
+        self.metrics_host = config["HOSTER_METRICS_HOST"]
+        self.metrics_port = config["HOSTER_METRICS_PORT"] and config["HOSTER_METRICS_PORT"] + id
         self.rooms_to_start = multiprocessing.Queue()
         self.rooms_shutting_down = multiprocessing.Queue()
+        self.rooms_to_stop = multiprocessing.Queue()
+        self.load_reports = multiprocessing.Queue()
+        self.load: typing.Optional[HosterLoad] = None
         self.name = f"MultiHoster{id}"
 
     def start(self):
@@ -203,22 +440,46 @@ class MultiworldInstance():
             return False
 
         process = multiprocessing.Process(group=None, target=run_server_process,
-                                          args=(self.name, self.ponyconfig, get_static_server_data(),
+                                          args=(self.name, self.ponyconfig, get_static_server_data_file(),
                                                 self.cert, self.key, self.host, self.game_ports,
-                                                self.rooms_to_start, self.rooms_shutting_down),
+                                                self.rooms_to_start, self.rooms_shutting_down,
+                                                self.metrics_host, self.metrics_port,
+                                                self.rooms_to_stop, self.load_reports),
                                           name=self.name)
         process.start()
         self.process = process
 
     def start_room(self, room_id):
-        while not self.rooms_shutting_down.empty():
-            self.room_ids.remove(self.rooms_shutting_down.get(block=True, timeout=None))
         if room_id in self.room_ids:
             pass  # should already be hosted currently.
         else:
             self.room_ids.add(room_id)
             self.rooms_to_start.put(room_id)
 
+    def stop_room(self, room_id):
+        """Shuts down a hosted room, saving it. It is reported by collect_shut_down once done."""
+        if room_id in self.room_ids:
+            self.rooms_to_stop.put(room_id)
+
+    def collect_shut_down(self) -> list[UUID]:
+        """Returns the rooms that shut down since the last call."""
+        shut_down = []
+        while True:
+            try:
+                room_id = self.rooms_shutting_down.get_nowait()
+            except queue.Empty:
+                return shut_down
+            self.room_ids.discard(room_id)
+            shut_down.append(room_id)
+
+    def update_load(self) -> None:
+        """Takes the latest load reported by the hoster process."""
+        while True:
+            try:
+                self.load = self.load_reports.get_nowait()
+            except queue.Empty:
+                return
+
     def stop(self):
         if self.process:
             self.process.terminate()
@@ -233,5 +494,5 @@ class MultiworldInstance():
 
 
 from .models import Room, Generation, STATE_QUEUED, STATE_STARTED, STATE_ERROR, db, Seed, Slot
-from .customserver import run_server_process, get_static_server_data
+from .customserver import HosterLoad, run_server_process, get_static_server_data_file
 from .generate import gen_game
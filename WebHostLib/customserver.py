@@ -5,9 +5,11 @@ import collections
 import datetime
 import functools
 import itertools
+import hashlib
 import logging
+import mmap
 import multiprocessing
-import pickle
+import os
 import random
 import socket
 import threading
@@ -22,14 +24,16 @@ from pony.orm import commit, db_session, select
 
 import Utils
 
+from NetUtils import SharedDataPackage, encode_shared_data_package
 from MultiServer import (
     Context, server, auto_shutdown, ServerCommandProcessor, ClientMessageProcessor, load_server_cert,
-    server_per_message_deflate_factory,
+    server_per_message_deflate_factory, MetricsServer,
 )
 from Utils import restricted_loads, cache_argsless
 
+from . import to_url
 from .locker import Locker
-from .models import Command, GameDataPackage, Room, db
+from .models import Command, GameDataPackage, Room, SaveJournalEntry, db, load_room_save
 
 
 class CustomClientMessageProcessor(ClientMessageProcessor):
@@ -66,6 +70,8 @@ class DBCommandProcessor(ServerCommandProcessor):
 
 class WebHostContext(Context):
     room_id: int
+    tracker: typing.Optional[str]  # URL form of the room's tracker id, which grants access to its tracker feed
+    compress_save_snapshot = False  # Room.multisave holds the plain pickle
 
     def __init__(self, static_server_data: dict, logger: logging.Logger):
         # static server data is used during _load_game_data to load required data,
@@ -76,7 +82,9 @@ class WebHostContext(Context):
                                              "enabled", 0, 2, logger=logger)
         del self.static_server_data
         self.main_loop = asyncio.get_running_loop()
+        self.db_command_processor: typing.Optional[DBCommandProcessor] = None  # set once commands are accepted
         self.video = {}
+        self.tracker = None
         self.tags = ["AP", "WebHost"]
 
     def __del__(self):
@@ -89,25 +97,6 @@ class WebHostContext(Context):
             setattr(self, key, value)
         self.non_hintable_names = collections.defaultdict(frozenset, self.non_hintable_names)
 
-    async def listen_to_db_commands(self):
-        cmdprocessor = DBCommandProcessor(self)
-
-        while not self.exit_event.is_set():
-            await self.main_loop.run_in_executor(None, self._process_db_commands, cmdprocessor)
-            try:
-                await asyncio.wait_for(self.exit_event.wait(), 5)
-            except asyncio.TimeoutError:
-                pass
-
-    def _process_db_commands(self, cmdprocessor):
-        with db_session:
-            commands = select(command for command in Command if command.room.id == self.room_id)
-            if commands:
-                for command in commands:
-                    self.main_loop.call_soon_threadsafe(cmdprocessor, command.commandtext)
-                    command.delete()
-                commit()
-
     @db_session
     def load(self, room_id: int):
         self.room_id = room_id
@@ -116,6 +105,8 @@ class WebHostContext(Context):
             self.port = room.last_port
         else:
             self.port = 0
+        if room.tracker:
+            self.tracker = to_url(room.tracker)
 
         multidata = self.decompress(room.seed.multidata)
         game_data_packages = {}
@@ -159,24 +150,29 @@ class WebHostContext(Context):
         self.saving = enabled
         if self.saving:
             with db_session:
-                savegame_data = Room.get(id=self.room_id).multisave
+                savegame_data = load_room_save(Room.get(id=self.room_id))
                 if savegame_data:
-                    self.set_save(restricted_loads(savegame_data))
+                    self.set_save(savegame_data)
             self._start_async_saving(atexit_save=False)
-        asyncio.create_task(self.listen_to_db_commands())
+        self.db_command_processor = DBCommandProcessor(self)
+
+    def allows_tracker_feed(self, args: dict) -> bool:
+        return self.tracker is not None and args.get("tracker") == self.tracker
 
     @db_session
-    def _save(self, exit_save: bool = False) -> bool:
+    def _store_save(self, data: bytes, snapshot: bool, generation: int, exit_save: bool) -> None:
         room = Room.get(id=self.room_id)
-        # Does not use Utils.restricted_dumps because we'd rather make a save than not make one
-        room.multisave = pickle.dumps(self.get_save())
+        if snapshot:
+            room.multisave = data
+            room.save_journal.select().delete(bulk=True)
+        else:
+            SaveJournalEntry(room=room, generation=generation, data=data)
         # saving only occurs on activity, so we can "abuse" this information to mark this as last_activity
         if not exit_save:  # we don't want to count a shutdown as activity, which would restart the server again
             room.last_activity = Utils.utcnow()
-        return True
 
-    def get_save(self) -> dict:
-        d = super(WebHostContext, self).get_save()
+    def _get_save_state(self) -> dict:
+        d = super(WebHostContext, self)._get_save_state()
         d["video"] = [(tuple(playerslot), videodata) for playerslot, videodata in self.video.items()]
         return d
 
@@ -277,10 +273,12 @@ class RandomPortSocketCreator:
 @cache_argsless
 def get_static_server_data() -> dict:
     import worlds
+    static_data = {world_name: worlds.get_game_static_data(world_name)
+                   for world_name in worlds.network_data_package["games"]}
     data = {
         "non_hintable_names": {
-            world_name: world.hint_blacklist
-            for world_name, world in worlds.AutoWorldRegister.world_types.items()
+            world_name: game_data.hint_blacklist
+            for world_name, game_data in static_data.items()
         },
         "gamespackage": {
             world_name: {
@@ -291,20 +289,130 @@ def get_static_server_data() -> dict:
             for world_name, game_package in worlds.network_data_package["games"].items()
         },
         "item_name_groups": {
-            world_name: world.item_name_groups
-            for world_name, world in worlds.AutoWorldRegister.world_types.items()
+            world_name: game_data.item_name_groups
+            for world_name, game_data in static_data.items()
         },
         "location_name_groups": {
-            world_name: world.location_name_groups
-            for world_name, world in worlds.AutoWorldRegister.world_types.items()
+            world_name: game_data.location_name_groups
+            for world_name, game_data in static_data.items()
         },
     }
 
     return data
 
 
+@cache_argsless
+def get_static_server_data_file() -> str:
+    """Writes the static server data to a file, which every room hoster maps read-only, and returns its path."""
+    data = get_static_server_data()
+    encoded = encode_shared_data_package(data["gamespackage"], item_name_groups=data["item_name_groups"],
+                                         location_name_groups=data["location_name_groups"],
+                                         non_hintable_names=data["non_hintable_names"])
+    # named by content, so a file that running hosters of another WebHost have mapped is never replaced
+    path = Utils.cache_path("webhost", f"static_server_data_{hashlib.sha256(encoded).hexdigest()[:16]}.bin")
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(encoded)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def load_static_server_data(path: str) -> dict:
+    """Maps the file written by get_static_server_data_file, to be used like get_static_server_data."""
+    with open(path, "rb") as f:
+        shared = SharedDataPackage(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    return {
+        "non_hintable_names": dict(shared.per_game("non_hintable_names")),
+        "gamespackage": shared,
+        "item_name_groups": shared.per_game("item_name_groups"),
+        "location_name_groups": shared.per_game("location_name_groups"),
+    }
+
+
+db_command_interval = 1  # seconds between polls for commands of all rooms of a hoster
+
+
+def take_db_commands(room_ids: typing.Collection[typing.Any], is_running: typing.Callable[[typing.Any], bool]) \
+        -> typing.List[typing.Tuple[typing.Any, str]]:
+    """Fetches and deletes the commands sent to any of the rooms, in one query. Returns room id and command text.
+    Commands of rooms that are no longer running by the time they are taken are left for the room's next start."""
+    with db_session:
+        commands = select(command for command in Command if command.room.id in room_ids).order_by(Command.id)[:]
+        commands = [command for command in commands if is_running(command.room.id)]
+        if not commands:
+            return []
+        taken = [(command.room.id, command.commandtext) for command in commands]
+        for command in commands:
+            command.delete()
+        commit()
+    return taken
+
+
+def return_db_commands(commands: typing.Iterable[typing.Tuple[typing.Any, str]]) -> None:
+    """Puts back commands taken by take_db_commands, for rooms that stopped before they could be delivered."""
+    with db_session:
+        for room_id, commandtext in commands:
+            room = Room.get(id=room_id)
+            if room:
+                Command(room=room, commandtext=commandtext)
+
+
+async def deliver_db_commands(contexts: typing.Mapping[typing.Any, WebHostContext]) -> None:
+    """Polls the commands of all hosted rooms together and hands them to their room's command processor."""
+    loop = asyncio.get_running_loop()
+
+    def is_running(room_id: typing.Any) -> bool:
+        ctx = contexts.get(room_id)
+        return bool(ctx and ctx.db_command_processor and not ctx.exit_event.is_set())
+
+    while True:
+        room_ids = [room_id for room_id in contexts if is_running(room_id)]
+        if room_ids:
+            try:
+                commands = await loop.run_in_executor(None, take_db_commands, room_ids, is_running)
+            except Exception as e:
+                logging.exception(e)
+            else:
+                undelivered: typing.List[typing.Tuple[typing.Any, str]] = []
+                for room_id, commandtext in commands:
+                    processor = contexts[room_id].db_command_processor if is_running(room_id) else None
+                    if processor:
+                        processor(commandtext)
+                    else:
+                        undelivered.append((room_id, commandtext))
+                if undelivered:
+                    try:
+                        await loop.run_in_executor(None, return_db_commands, undelivered)
+                    except Exception as e:
+                        logging.exception(e)
+        await asyncio.sleep(db_command_interval)
+
+
+class HosterLoad(typing.NamedTuple):
+    """Load of a room hoster process, as reported to the room scheduler of the autolauncher."""
+    cpu_percent: float
+    rss: int
+    clients: int
+    room_clients: typing.Dict[typing.Any, int]  # connected clients by room id
+
+
+load_report_interval = 5
+
+
+async def report_load(contexts: typing.Mapping[typing.Any, WebHostContext],
+                      load_reports: multiprocessing.Queue) -> None:
+    """Periodically puts the HosterLoad of this process into load_reports."""
+    process = psutil.Process()
+    process.cpu_percent()  # starts the measurement
+    while True:
+        await asyncio.sleep(load_report_interval)
+        room_clients = {room_id: len(ctx.endpoints) for room_id, ctx in contexts.items()}
+        load_reports.put(HosterLoad(process.cpu_percent(), process.memory_info().rss,
+                                    sum(room_clients.values()), room_clients))
+
+
 def set_up_logging(room_id) -> logging.Logger:
-    import os
     # logger setup
     logger = logging.getLogger(f"RoomLogger {room_id}")
 
@@ -334,10 +442,13 @@ def tear_down_logging(room_id):
         del logging.Logger.manager.loggerDict[logger_name]
 
 
-def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
+def run_server_process(name: str, ponyconfig: dict, static_server_data_file: str,
                        cert_file: typing.Optional[str], cert_key_file: typing.Optional[str],
                        host: str, game_ports: Iterable[str | int],
-                       rooms_to_run: multiprocessing.Queue, rooms_shutting_down: multiprocessing.Queue):
+                       rooms_to_run: multiprocessing.Queue, rooms_shutting_down: multiprocessing.Queue,
+                       metrics_host: str = "127.0.0.1", metrics_port: int = 0,
+                       rooms_to_stop: typing.Optional[multiprocessing.Queue] = None,
+                       load_reports: typing.Optional[multiprocessing.Queue] = None):
     from setproctitle import setproctitle
 
     setproctitle(name)
@@ -359,6 +470,7 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
 
     if "worlds" in sys.modules:
         raise Exception("Worlds system should not be loaded in the custom server.")
+    static_server_data = load_static_server_data(static_server_data_file)
 
     import gc
 
@@ -382,12 +494,14 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
 
     loop = asyncio.get_event_loop()
     socket_creator = RandomPortSocketCreator(game_ports)
+    hosted_contexts: typing.Dict[typing.Any, WebHostContext] = {}  # by room id
 
     async def start_room(room_id):
         with Locker(f"RoomLocker {room_id}"):
             try:
                 logger = set_up_logging(room_id)
                 ctx = WebHostContext(static_server_data, logger)
+                hosted_contexts[room_id] = ctx
                 ctx.load(room_id)
                 ctx.init_save()
                 assert ctx.server is None
@@ -449,13 +563,12 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                 raise
             else:
                 if ctx.saving:
-                    ctx._save(True)
+                    await ctx._save_async(True)
                     setattr(asyncio.current_task(), "save", None)
             finally:
                 try:
-                    ctx.save_dirty = False  # make sure the saving thread does not write to DB after final wakeup
-                    ctx.exit_event.set()  # make sure the saving thread stops at some point
-                    # NOTE: async saving should probably be an async task and could be merged with shutdown_task
+                    ctx.save_dirty = False  # make sure the auto saver does not write to DB after final wakeup
+                    ctx.exit_event.set()  # make sure the auto saver stops at some point
 
                     if ctx.server and hasattr(ctx.server, "ws_server"):
                         ctx.server.ws_server.close()
@@ -466,12 +579,27 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                         room = Room.get(id=room_id)
                         room.last_activity = Utils.utcnow() - datetime.timedelta(minutes=1, seconds=room.timeout)
                     del room
+                    hosted_contexts.pop(room_id, None)
                     tear_down_logging(room_id)
                     logging.info(f"Shutting down room {room_id} on {name}.")
                 finally:
                     await asyncio.sleep(5)
                     rooms_shutting_down.put(room_id)
 
+    def stop_room(room_id) -> None:
+        ctx = hosted_contexts.get(room_id)
+        if ctx:
+            ctx.logger.info("Shutting down to move to another hoster.")
+            if ctx.server and hasattr(ctx.server, "ws_server"):
+                ctx.server.ws_server.close()
+            ctx.exit_event.set()
+
+    class Stopper(threading.Thread):
+        def run(self):
+            while 1:
+                room_id = rooms_to_stop.get(block=True, timeout=None)
+                loop.call_soon_threadsafe(stop_room, room_id)
+
     class Starter(threading.Thread):
         _tasks: typing.List[asyncio.Future]
 
@@ -493,9 +621,35 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                 logging.info(f"Starting room {next_room} on {name}.")
                 del task  # delete reference to task object
 
+    if metrics_port:
+        metrics_server = MetricsServer(lambda: {to_url(room_id): ctx for room_id, ctx in hosted_contexts.items()})
+        loop.run_until_complete(metrics_server.start(metrics_host, metrics_port))
+        logging.info(f"Serving metrics of {name} at http://{metrics_host}:{metrics_port}/metrics")
+
+    # tasks that run for the lifetime of the hoster, referenced here so they are not garbage collected
+    service_tasks: typing.List[asyncio.Task] = []
+
+    def service_done(task: asyncio.Task) -> None:
+        service_tasks.remove(task)
+        if not task.cancelled() and task.exception():
+            logging.error(f"{task.get_name()} on {name} stopped.", exc_info=task.exception())
+
+    def start_service(coroutine: typing.Coroutine[typing.Any, typing.Any, None], task_name: str) -> None:
+        task = loop.create_task(coroutine, name=task_name)
+        service_tasks.append(task)
+        task.add_done_callback(service_done)
+
+    start_service(deliver_db_commands(hosted_contexts), "CommandDelivery")
+    if load_reports:
+        start_service(report_load(hosted_contexts, load_reports), "LoadReporting")
+
     starter = Starter()
     starter.daemon = True
     starter.start()
+    if rooms_to_stop:
+        stopper = Stopper()
+        stopper.daemon = True
+        stopper.start()
     try:
         loop.run_forever()
     finally:
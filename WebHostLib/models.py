@@ -28,6 +28,7 @@ class Room(db.Entity):
     commands = Set('Command')
     seed = Required('Seed', index=True)
     multisave = Optional(buffer, lazy=True)
+    save_journal = Set('SaveJournalEntry')
     show_spoiler = Required(int, default=0)  # 0 -> never, 1 -> after completion, -> 2 always
     timeout = Required(int, default=lambda: 2 * 60 * 60)  # seconds since last activity to shutdown
     tracker = Optional(UUID, index=True)
@@ -52,6 +53,14 @@ class Command(db.Entity):
     commandtext = Required(str)
 
 
+class SaveJournalEntry(db.Entity):
+    """Changes to Room.multisave, replayed in order of id. Only entries of the multisave's generation apply."""
+    id = PrimaryKey(int, auto=True)
+    room = Required(Room, index=True)
+    generation = Required(int)
+    data = Required(buffer, lazy=True)
+
+
 class Generation(db.Entity):
     id = PrimaryKey(UUID, default=uuid4)
     owner = Required(UUID)
@@ -63,3 +72,18 @@ class Generation(db.Entity):
 class GameDataPackage(db.Entity):
     checksum = PrimaryKey(str)
     data = Required(bytes)
+
+
+def load_room_save(room: Room) -> dict:
+    """Returns the multisave of a room with its save journal replayed, or an empty dict if it was never saved."""
+    import zlib
+    from NetUtils import apply_save_delta
+    from Utils import restricted_loads
+
+    if not room.multisave:
+        return {}
+    savedata = restricted_loads(room.multisave)
+    generation = savedata.get("journal_generation", 0)
+    for entry in room.save_journal.select(lambda entry: entry.generation == generation).order_by(SaveJournalEntry.id):
+        apply_save_delta(savedata, restricted_loads(zlib.decompress(entry.data)))
+    return savedata
@@ -132,6 +132,55 @@ window.addEventListener('load', () => {
         return sleepSeconds || 60;
     }
 
+    // Checks and status received from the room's tracker feed, which are newer than the last saved state
+    const feedChecks = {};
+    const feedStatus = {};
+    const statusNames = {0: "Disconnected", 5: "Connected", 10: "Ready", 20: "Playing", 30: "Goal Completed"};
+    const applyFeed = (rows) => {
+        rows.each(function (i, row) {
+            const key = `${row.getAttribute('data-team')}-${row.getAttribute('data-player')}`;
+            if (key in feedStatus) {
+                $(row).find(".player-status").text(statusNames[feedStatus[key]] || "Unknown State");
+            }
+            if (key in feedChecks) {
+                const checksCell = $(row).find(".player-checks");
+                const total = parseInt(checksCell.attr("data-total"));
+                const done = feedChecks[key].size;
+                checksCell.attr("data-sort", done).text(`${done}/${total}`);
+                $(row).find(".player-percentage").text(total ? (done / total * 100).toFixed(2) : "100.00");
+            }
+        });
+    };
+
+    const feedAddress = document.getElementById('tracker-wrapper').getAttribute('data-feed');
+    if (feedAddress) {
+        const socket = new WebSocket(feedAddress);
+        socket.onopen = () => {
+            const tracker = document.getElementById('tracker-wrapper').getAttribute('data-tracker');
+            socket.send(JSON.stringify([{cmd: "TrackerFeed", tracker: tracker}]));
+        };
+        socket.onmessage = (event) => {
+            let changed = false;
+            for (const packet of JSON.parse(event.data)) {
+                if (packet.cmd !== "TrackerUpdate")
+                    continue;
+                for (const entry of packet.player_checks_done || []) {
+                    const key = `${entry.team}-${entry.player}`;
+                    feedChecks[key] = feedChecks[key] || new Set();
+                    entry.locations.forEach((location) => feedChecks[key].add(location));
+                    changed = true;
+                }
+                for (const entry of packet.player_status || []) {
+                    feedStatus[`${entry.team}-${entry.player}`] = entry.status;
+                    changed = true;
+                }
+            }
+            if (changed)
+                applyFeed($(".table tbody>tr[data-player]"));
+        };
+        socket.onerror = () => console.log("Could not follow the room's tracker feed, updating periodically only.");
+    }
+
     let update_on_view = false;
     const update = () => {
         if (document.hidden) {
@@ -145,6 +194,7 @@ window.addEventListener('load', () => {
                 if (status === "success") {
                     target.find(".table").each(function (i, new_table) {
                         const new_trs = $(new_table).find("tbody>tr");
+                        applyFeed(new_trs.filter("[data-player]"));
                         const footer_tr = $(new_table).find("tfoot>tr");
                         const old_table = tables.eq(i);
                         const topscroll = $(old_table.settings()[0].nScrollBody).scrollTop();
@@ -1,18 +1,21 @@
 import datetime
 import collections
+import sys
+import threading
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional, Set, Tuple, NamedTuple, Counter
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Set, Tuple, NamedTuple, Counter
 from uuid import UUID
 from email.utils import parsedate_to_datetime
 
 from flask import make_response, render_template, request, Request, Response
+from pony.orm import max as db_max, raw_sql, select
 from werkzeug.exceptions import abort
 
 from MultiServer import Context, get_saving_second
-from NetUtils import ClientStatus, Hint, NetworkItem, NetworkSlot, SlotType
-from Utils import restricted_loads, KeyedDefaultDict, utcnow
+from NetUtils import ClientStatus, ColumnarMultiData, Hint, NetworkItem, NetworkSlot, SlotType
+from Utils import cache_argsless, restricted_loads, KeyedDefaultDict, utcnow
 from . import app, cache
-from .models import GameDataPackage, Room
+from .models import GameDataPackage, Room, SaveJournalEntry, Seed, load_room_save
 
 # Multisave is currently updated, at most, every minute.
 TRACKER_CACHE_TIMEOUT_IN_SECONDS = 60
@@ -23,6 +26,9 @@ _player_trackers: Dict[str, Callable] = {}
 TeamPlayer = Tuple[int, int]
 ItemMetadata = Tuple[int, int, int]
 
+# measured size of fully decoded columnar multidata relative to its stored size
+COLUMNAR_MULTIDATA_DECODED_FACTOR = 12
+
 
 def _cache_results(func: Callable) -> Callable:
     """Stores the results of any computationally expensive methods after the initial call in TrackerData.
@@ -40,45 +46,204 @@ def _cache_results(func: Callable) -> Callable:
     return method_wrapper
 
 
+class TrackerDataCache:
+    """Thread-safe LRU cache for data shared between tracker requests of all rooms.
+
+    Each entry is weighed by an estimate of its size in memory, see `estimate_size`. Least recently used entries are
+    evicted once the summed size exceeds `max_size`.
+    """
+    max_size: int
+    size: int
+    _entries: "collections.OrderedDict[Hashable, Tuple[Any, int]]"
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.size = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """Returns the value stored for key and marks it as recently used, or None if it is not cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, size: int) -> None:
+        """Stores value for key, then evicts least recently used entries until the cache fits into max_size."""
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self.size -= old_entry[1]
+            if size > self.max_size:
+                return  # would only evict everything else
+            self._entries[key] = value, size
+            self.size += size
+            while self.size > self.max_size:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+def estimate_size(value: Any) -> int:
+    """Estimates the memory taken up by value, including the containers and objects it references."""
+    size = 0
+    seen: Set[int] = set()
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        size += sys.getsizeof(value)
+        if isinstance(value, dict):
+            stack.extend(value.keys())
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            stack.extend(value)
+        elif hasattr(value, "__dict__"):
+            stack.extend(vars(value).values())
+    return size
+
+
+@cache_argsless
+def get_tracker_data_cache() -> TrackerDataCache:
+    return TrackerDataCache(app.config["TRACKER_DATA_CACHE_SIZE"])
+
+
+class _LookupDict(KeyedDefaultDict):
+    """KeyedDefaultDict that returns the default for missing keys without storing it, so shared tables do not change
+    on lookups."""
+    def __missing__(self, key):
+        return self.default_factory(key)
+
+
+class GamePackageLookups(NamedTuple):
+    """Lookup tables of a game data package, as used by trackers. Shared between requests, so must not be modified."""
+    item_id_to_name: Dict[int, str]
+    location_id_to_name: Dict[int, str]
+    item_name_to_id: Dict[str, int]
+    location_name_to_id: Dict[str, int]
+
+
+class SeedTrackerData(NamedTuple):
+    """Immutable tracker data of a seed. Shared between requests, so must not be modified."""
+    multidata: Mapping[str, Any]
+    item_id_to_name: Dict[str, Dict[int, str]]
+    location_id_to_name: Dict[str, Dict[int, str]]
+    item_name_to_id: Dict[str, Dict[str, int]]
+    location_name_to_id: Dict[str, Dict[str, int]]
+
+
+def get_game_package_lookups(checksum: str) -> GamePackageLookups:
+    """Returns the tracker lookup tables of the stored game data package with checksum."""
+    tracker_data_cache = get_tracker_data_cache()
+    lookups: Optional[GamePackageLookups] = tracker_data_cache.get(("package", checksum))
+    if lookups is None:
+        data = GameDataPackage.get(checksum=checksum).data
+        game_package = restricted_loads(data)
+        lookups = GamePackageLookups(
+            _LookupDict(lambda code: f"Unknown Item (ID: {code})", {
+                id: name for name, id in game_package["item_name_to_id"].items()}),
+            _LookupDict(lambda code: f"Unknown Location (ID: {code})", {
+                id: name for name, id in game_package["location_name_to_id"].items()}),
+            game_package["item_name_to_id"],
+            game_package["location_name_to_id"],
+        )
+        tracker_data_cache.set(("package", checksum), lookups, estimate_size(lookups))
+    return lookups
+
+
+def get_seed_tracker_data(seed: Seed) -> SeedTrackerData:
+    """Returns the multidata of a seed with the lookup tables of its games. Only loads from the database on a miss."""
+    tracker_data_cache = get_tracker_data_cache()
+    seed_data: Optional[SeedTrackerData] = tracker_data_cache.get(("seed", seed.id))
+    if seed_data is None:
+        multidata = Context.decompress(seed.multidata, lazy=True)
+        seed_data = SeedTrackerData(
+            multidata,
+            # Generate inverse lookup tables from data package, useful for trackers.
+            _LookupDict(lambda game_name: {
+                game_name: _LookupDict(lambda code: f"Unknown Game {game_name} - Item (ID: {code})")
+            }),
+            _LookupDict(lambda game_name: {
+                game_name: _LookupDict(lambda code: f"Unknown Game {game_name} - Location (ID: {code})")
+            }),
+            # Normal lookup tables as well.
+            {},
+            {},
+        )
+        for game, game_package in multidata["datapackage"].items():
+            lookups = get_game_package_lookups(game_package["checksum"])
+            seed_data.item_id_to_name[game] = lookups.item_id_to_name
+            seed_data.location_id_to_name[game] = lookups.location_id_to_name
+            seed_data.item_name_to_id[game] = lookups.item_name_to_id
+            seed_data.location_name_to_id[game] = lookups.location_name_to_id
+        # the lookup tables are weighed in the entries of their game data packages,
+        # columnar multidata decodes lazily, so it is weighed as if fully decoded without decoding it
+        if isinstance(multidata, ColumnarMultiData):
+            size = len(seed.multidata) * COLUMNAR_MULTIDATA_DECODED_FACTOR
+        else:
+            size = estimate_size(multidata)
+        tracker_data_cache.set(("seed", seed.id), seed_data, size)
+    return seed_data
+
+
+def get_room_save_version(room: Room) -> Tuple[Any, ...]:
+    """Returns a value that changes whenever the save of a room changes, without loading the save itself."""
+    multisave_length = select(raw_sql("LENGTH(multisave)") for saved_room in Room
+                              if saved_room.id == room.id).first()
+    last_journal_entry = db_max(entry.id for entry in SaveJournalEntry if entry.room == room)
+    return room.last_activity, multisave_length, last_journal_entry
+
+
+def get_room_save(room: Room) -> Dict[str, Any]:
+    """Returns the multisave of a room, as load_room_save, but only loads it again once the save changed."""
+    tracker_data_cache = get_tracker_data_cache()
+    version = get_room_save_version(room)
+    cached_save: Optional[Tuple[Tuple[Any, ...], Dict[str, Any]]] = tracker_data_cache.get(("save", room.id))
+    if cached_save is not None and cached_save[0] == version:
+        return cached_save[1]
+    multisave = load_room_save(room)
+    tracker_data_cache.set(("save", room.id), (version, multisave), estimate_size(multisave))
+    return multisave
+
+
 @dataclass
 class TrackerData:
     """A helper dataclass that is instantiated each time an HTTP request comes in for tracker data.
 
     Provides helper methods to lazily load necessary data that each tracker require and caches any results so any
     subsequent helper method calls do not need to recompute results during the lifetime of this instance.
+    Data decoded from the seed, the game data packages and the room's save is shared with other requests through
+    the tracker data cache, so it must not be modified.
     """
     room: Room
-    _multidata: Dict[str, Any]
+    _multidata: Mapping[str, Any]
     _multisave: Dict[str, Any]
     _tracker_cache: Dict[str, Any]
 
     def __init__(self, room: Room):
         """Initialize a new RoomMultidata object for the current room."""
         self.room = room
-        self._multidata = Context.decompress(room.seed.multidata)
-        self._multisave = restricted_loads(room.multisave) if room.multisave else {}
+        seed_data = get_seed_tracker_data(room.seed)
+        self._multidata = seed_data.multidata
+        self._multisave = get_room_save(room)
         self._tracker_cache = {}
 
-        self.item_name_to_id: Dict[str, Dict[str, int]] = {}
-        self.location_name_to_id: Dict[str, Dict[str, int]] = {}
-
-        # Generate inverse lookup tables from data package, useful for trackers.
-        self.item_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
-            game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Item (ID: {code})")
-        })
-        self.location_id_to_name: Dict[str, Dict[int, str]] = KeyedDefaultDict(lambda game_name: {
-            game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Location (ID: {code})")
-        })
-        for game, game_package in self._multidata["datapackage"].items():
-            game_package = restricted_loads(GameDataPackage.get(checksum=game_package["checksum"]).data)
-            self.item_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Item (ID: {code})", {
-                id: name for name, id in game_package["item_name_to_id"].items()})
-            self.location_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Location (ID: {code})", {
-                id: name for name, id in game_package["location_name_to_id"].items()})
-
-            # Normal lookup tables as well.
-            self.item_name_to_id[game] = game_package["item_name_to_id"]
-            self.location_name_to_id[game] = game_package["location_name_to_id"]
+        self.item_name_to_id: Dict[str, Dict[str, int]] = seed_data.item_name_to_id
+        self.location_name_to_id: Dict[str, Dict[str, int]] = seed_data.location_name_to_id
+        self.item_id_to_name: Dict[str, Dict[int, str]] = seed_data.item_id_to_name
+        self.location_id_to_name: Dict[str, Dict[int, str]] = seed_data.location_id_to_name
 
     def get_seed_name(self) -> str:
         """Retrieves the seed name."""
@@ -362,7 +527,8 @@ def get_generic_game_tracker(tracker: UUID, tracked_team: int, tracked_player: i
 @app.route("/tracker/<suuid:tracker>", defaults={"game": "Generic"})
 @app.route("/tracker/<suuid:tracker>/<game>")
 def get_multiworld_tracker(tracker: UUID, game: str) -> Response:
-    key = f"{tracker}_{game}"
+    # the live feed's address depends on whether the page was requested over https
+    key = f"{tracker}_{game}_{request.scheme}"
     response: Optional[Response] = cache.get(key)
     if response:
         return response
@@ -110,7 +110,6 @@ cdef class LocationStore:
 
     def __init__(self, locations_dict: Dict[int, Dict[int, Sequence[int]]]) -> None:
         self._mem = Pool()
-        cdef object key
         self._keys = []
         self._items = []
         self._proxies = []
@@ -172,6 +171,64 @@ cdef class LocationStore:
                 self.sender_index[sender].count += 1
                 i += 1
 
+        self._build_caches(count, max_sender, sender_count)
+
+    @staticmethod
+    def from_columns(const int64_t[:] starts, const int64_t[:] locations, const int64_t[:] items,
+                     const uint32_t[:] receivers, const uint32_t[:] flags) -> LocationStore:
+        """
+        Builds the store from the location columns of the columnar multidata format, without creating python objects
+        per location. `starts` holds the index of the first entry of each sender 1..n followed by the entry count,
+        entries have to be sorted by sender, then location.
+        """
+        cdef LocationStore self = LocationStore.__new__(LocationStore)
+        self._mem = Pool()
+        self._keys = []
+        self._items = []
+        self._proxies = []
+
+        cdef size_t max_sender = starts.shape[0] - 1 if starts.shape[0] else 0
+        cdef size_t count = locations.shape[0]
+        cdef size_t sender
+        cdef size_t i
+        if starts.shape[0] < 2:
+            raise ValueError(f"Rejecting game with 0 players")
+        if max_sender > MAX_PLAYER_ID:
+            raise ValueError(f"Invalid player id {max_sender} for location")
+        if <size_t>items.shape[0] != count or <size_t>receivers.shape[0] != count or <size_t>flags.shape[0] != count:
+            raise ValueError("Location columns differ in length")
+        if starts[0] != 0 or <size_t>starts[max_sender] != count:
+            raise ValueError("Invalid location index")
+        if not count:
+            warnings.warn("Game has no locations")
+
+        if count:
+            self.entries = <LocationEntry*>self._mem.alloc(count, sizeof(LocationEntry))
+        self.sender_index = <IndexEntry*>self._mem.alloc(max_sender + 1, sizeof(IndexEntry))
+        self._raw_proxies = <PyObject**>self._mem.alloc(max_sender + 1, sizeof(PyObject*))
+
+        for sender in range(1, max_sender + 1):
+            if starts[sender] < starts[sender - 1]:
+                raise ValueError("Invalid location index")
+            self.sender_index[sender].start = starts[sender - 1]
+            self.sender_index[sender].count = starts[sender] - starts[sender - 1]
+            for i in range(self.sender_index[sender].start, <size_t>starts[sender]):
+                if receivers[i] < 1 or receivers[i] > MAX_PLAYER_ID:
+                    raise ValueError(f"Invalid player id {receivers[i]} for item")
+                if i > self.sender_index[sender].start and locations[i] <= locations[i - 1]:
+                    raise ValueError("Locations not sorted")
+                self.entries[i].sender = sender
+                self.entries[i].location = locations[i]
+                self.entries[i].item = items[i]
+                self.entries[i].receiver = receivers[i]
+                self.entries[i].flags = flags[i]
+
+        self._build_caches(count, max_sender, max_sender)
+        return self
+
+    cdef _build_caches(self, size_t count, size_t max_sender, size_t sender_count):
+        cdef object key
+        cdef size_t i
         # build pyobject caches
         self._proxies.append(None)  # player 0
         assert self.sender_index[0].count == 0
@@ -20,7 +20,7 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 ]]
 
-local SCRIPT_VERSION = 1
+local SCRIPT_VERSION = 2
 
 -- Set to log incoming requests
 -- Will cause lag due to large console output
@@ -34,9 +34,20 @@ will have a corresponding response in the same order.
 Every individual request and response is a JSON object with at minimum one
 field `type`. The value of `type` determines what other fields may exist.
 
+A message may instead be an object with an `id` and its list of `requests`,
+in which case the response is an object with the same `id` and the list of
+`responses`. This lets a client send several messages without waiting for the
+response to each, and match up the responses as they come in. Messages are
+processed in the order they are received, and all messages that arrived by the
+end of a frame are processed on that frame.
+
 To get the script version, instead of JSON, send "VERSION" to get the script
 version directly (e.g. "2").
 
+Memory ranges subscribed to with `WATCH` are sent to the client unprompted, as
+an object with a list of `watches`, at the end of every frame where their data
+changed. The first message after subscribing always includes the range.
+
 #### Ex. 1
 
 Request: `[{"type": "PING"}]`
@@ -55,6 +66,14 @@ Response: `[{"type": "LOCKED"}, {"type": "HASH_RESPONSE", "value": "F7D18982"}]`
 
 #### Ex. 3
 
+Request: `{"id": 7, "requests": [{"type": "HASH"}]}`
+
+Response: `{"id": 7, "responses": [{"type": "HASH_RESPONSE", "value": "F7D18982"}]}`
+
+---
+
+#### Ex. 4
+
 Request:
 
 ```json
@@ -75,7 +94,7 @@ Response:
 
 ---
 
-#### Ex. 4
+#### Ex. 5
 
 Request:
 
@@ -97,6 +116,16 @@ Response:
 
 ---
 
+#### Ex. 6
+
+Request: `{"id": 8, "requests": [{"type": "WATCH", "id": 0, "address": 500, "size": 4, "domain": "ROM"}]}`
+
+Response: `{"id": 8, "responses": [{"type": "WATCH_RESPONSE"}]}`
+
+Then, at the end of the frame: `{"watches": [{"id": 0, "value": "dGVzdA=="}]}`
+
+---
+
 ### Supported Request Types
 
 - `PING`  
@@ -178,6 +207,27 @@ Response:
     - `domain` (`string`): The name of the memory domain the address
     corresponds to
 
+- `WATCH`  
+    Subscribes to changes of an array of bytes at the provided address. Any
+    existing watch with the same id is replaced.
+
+    Expected Response Type: `WATCH_RESPONSE`
+
+    Additional Fields:
+    - `id` (`int`): An id chosen by the client, sent along with the data
+    - `address` (`int`): The address of the memory to watch
+    - `size` (`int`): The number of bytes to watch
+    - `domain` (`string`): The name of the memory domain the address
+    corresponds to
+
+- `UNWATCH`  
+    Ends a watch.
+
+    Expected Response Type: `UNWATCH_RESPONSE`
+
+    Additional Fields:
+    - `id` (`int`): The id of the watch
+
 - `DISPLAY_MESSAGE`  
     Adds a message to the message queue which will be displayed using
     `gui.addmessage` according to the message interval.
@@ -254,6 +304,12 @@ Response:
 - `WRITE_RESPONSE`  
     Acknowledges `WRITE`.
 
+- `WATCH_RESPONSE`  
+    Acknowledges `WATCH`.
+
+- `UNWATCH_RESPONSE`  
+    Acknowledges `UNWATCH`.
+
 - `DISPLAY_MESSAGE_RESPONSE`  
     Acknowledges `DISPLAY_MESSAGE`.
 
@@ -311,6 +367,8 @@ local locked = false
 
 local rom_hash = nil
 
+local watches = {}
+
 function queue_push (self, value)
     self[self.right] = value
     self.right = self.right + 1
@@ -451,6 +509,27 @@ request_handlers = {
         return res
     end,
 
+    ["WATCH"] = function (req)
+        local res = {}
+
+        -- Read once so that an invalid range is reported to the client
+        memory.read_bytes_as_array(req["address"], req["size"], req["domain"])
+
+        res["type"] = "WATCH_RESPONSE"
+        watches[req["id"]] = {address = req["address"], size = req["size"], domain = req["domain"], value = nil}
+
+        return res
+    end,
+
+    ["UNWATCH"] = function (req)
+        local res = {}
+
+        res["type"] = "UNWATCH_RESPONSE"
+        watches[req["id"]] = nil
+
+        return res
+    end,
+
     ["DISPLAY_MESSAGE"] = function (req)
         local res = {}
 
@@ -488,6 +567,7 @@ function process_request (req)
 end
 
 -- Receive data from AP client and send message back
+-- Returns true if a message was processed
 function send_receive ()
     local message, err = client_socket:receive()
 
@@ -497,15 +577,15 @@ function send_receive ()
             print("Connection to client closed")
         end
         current_state = STATE_NOT_CONNECTED
-        return
+        return false
     elseif err == "timeout" then
         unlock()
-        return
+        return false
     elseif err ~= nil then
         print(err)
         current_state = STATE_NOT_CONNECTED
         unlock()
-        return
+        return false
     end
 
     -- Reset timeout timer
@@ -522,7 +602,7 @@ function send_receive ()
         local res = {}
         local data = json.decode(message)
         local failed_guard_response = nil
-        for i, req in ipairs(data) do
+        for i, req in ipairs(data["requests"] or data) do
             if failed_guard_response ~= nil then
                 res[i] = failed_guard_response
             else
@@ -542,7 +622,35 @@ function send_receive ()
             end
         end
 
-        client_socket:send(json.encode(res).."\n")
+        if data["id"] ~= nil then
+            client_socket:send(json.encode({id = data["id"], responses = res}).."\n")
+        else
+            client_socket:send(json.encode(res).."\n")
+        end
+    end
+
+    return true
+end
+
+-- Send the client every watched range that changed since it was last sent
+function send_watch_updates ()
+    local updates = {}
+    for id, watch in pairs(watches) do
+        local status, data = pcall(memory.read_bytes_as_array, watch.address, watch.size, watch.domain)
+        if status then
+            local value = base64.encode(data)
+            if value ~= watch.value then
+                watch.value = value
+                updates[#updates + 1] = {id = id, value = value}
+            end
+        else
+            -- The range can't be read anymore, stop watching it
+            watches[id] = nil
+        end
+    end
+
+    if #updates > 0 then
+        client_socket:send(json.encode({watches = updates}).."\n")
     end
 end
 
@@ -603,15 +711,22 @@ function main ()
                     print("Client connected")
                     current_state = STATE_CONNECTED
                     client_socket = client
+                    watches = {}
                     server:close()
                     server = nil
                     client_socket:settimeout(0)
                 end
             end
         else
+            -- Process every message that has arrived, and keep waiting for more while locked
+            local received
             repeat
-                send_receive()
-            until not locked
+                received = send_receive()
+            until not locked and not received
+
+            if current_state == STATE_CONNECTED then
+                send_watch_updates()
+            end
 
             if timeout_timer <= 0 then
                 print("Client timed out")
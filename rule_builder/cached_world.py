@@ -3,7 +3,7 @@ from typing import ClassVar, cast
 
 from typing_extensions import override
 
-from BaseClasses import CollectionState, Item, MultiWorld, Region
+from BaseClasses import CollectionRule, CollectionState, Entrance, Item, MultiWorld, Region
 from worlds.AutoWorld import LogicMixin, World
 
 from .rules import Rule
@@ -32,8 +32,14 @@ class CachedRuleBuilderWorld(World):
     rule_caching_enabled: ClassVar[bool] = True
     """Flag to inform rules that the caching system for this world is enabled. It should not be overridden."""
 
+    incremental_reachability: ClassVar[bool] = True
+
+    entrance_item_dependencies: dict[Entrance, tuple[CollectionRule, frozenset[str] | None]]
+    """A mapping of entrance to its access rule and the item names that rule depends on, if only items are relevant"""
+
     def __init__(self, multiworld: MultiWorld, player: int) -> None:
         super().__init__(multiworld, player)
+        self.entrance_item_dependencies = {}
         self.rule_item_dependencies = defaultdict(set)
         self.rule_region_dependencies = defaultdict(set)
         self.rule_location_dependencies = defaultdict(set)
@@ -76,6 +82,29 @@ class CachedRuleBuilderWorld(World):
             for region_name in entrance.access_rule.region_dependencies():
                 self.rule_region_dependencies[region_name] |= rule_ids
 
+    @override
+    def get_entrance_item_dependencies(self, entrance: Entrance) -> frozenset[str] | None:
+        access_rule = entrance.access_rule
+        cached = self.entrance_item_dependencies.get(entrance)
+        if cached is not None and cached[0] is access_rule:
+            return cached[1]
+
+        dependencies: frozenset[str] | None = None
+        if (
+            isinstance(access_rule, Rule.Resolved)
+            and access_rule.player == self.player
+            and not access_rule.force_recalculate
+            and not access_rule.region_dependencies()
+            and not access_rule.location_dependencies()
+            and not access_rule.entrance_dependencies()
+        ):
+            item_names = set(access_rule.item_dependencies())
+            # collecting an item also changes the logical item it is mapped to
+            item_names.update(name for name, mapped_name in self.item_mapping.items() if mapped_name in item_names)
+            dependencies = frozenset(item_names)
+        self.entrance_item_dependencies[entrance] = (access_rule, dependencies)
+        return dependencies
+
     @override
     def collect(self, state: CollectionState, item: Item) -> bool:
         changed = super().collect(state, item)
@@ -3,6 +3,7 @@ Application settings / host.yaml interface using type hints.
 This is different from player options.
 """
 
+import io
 import os
 import os.path
 import shutil
@@ -24,28 +25,40 @@ __all__ = [
 
 no_gui = False
 skip_autosave = False
-_world_settings_name_cache: dict[str, str] = {}  # TODO: cache on disk and update when worlds change
+_world_settings_name_cache: dict[str, str] = {}
 _world_settings_name_cache_updated = False
 _lock = Lock()
 
 
 def _update_cache() -> None:
-    """Load all worlds and update world_settings_name_cache"""
+    """Update world_settings_name_cache from the world index, loading only worlds that are not indexed"""
     global _world_settings_name_cache_updated
     if _world_settings_name_cache_updated:
         return
 
     try:
         from worlds.AutoWorld import AutoWorldRegister
-        for world in AutoWorldRegister.world_types.values():
-            annotation = world.__annotations__.get("settings", None)
-            if annotation is None or annotation == "ClassVar[Optional['Group']]":
-                continue
-            _world_settings_name_cache[world.settings_key] = f"{world.__module__}.{world.__name__}"
+        _world_settings_name_cache.update(AutoWorldRegister.world_types.get_settings_names())
     finally:
         _world_settings_name_cache_updated = True
 
 
+def _split_sections(text: str) -> list[tuple[str, str]]:
+    """Splits a settings file into its top-level keys and their text, including the comments above each key"""
+    sections: list[tuple[str, str]] = []
+    comments = ""
+    for line in text.splitlines(keepends=True):
+        if line.startswith("#"):
+            comments += line
+        elif line[:1].isspace() or line.startswith("-") or not sections and not line.strip():
+            if sections:
+                sections[-1] = (sections[-1][0], sections[-1][1] + line)
+        else:
+            sections.append((line.split(":", 1)[0], comments + line))
+            comments = ""
+    return sections
+
+
 def fmt_doc(cls: type, level: int) -> str:
     comment = cls.__doc__
     assert comment, f"{cls} has no __doc__"
@@ -611,6 +624,12 @@ class ServerOptions(Group):
         OFF = 0
         ON = 1
 
+    class MetricsPort(int):
+        """Port to serve runtime metrics on over HTTP in the Prometheus text format, 0 to disable"""
+
+    class MetricsHost(str):
+        """Interface to serve runtime metrics on. Only reachable from this machine by default"""
+
     host: str | None = None
     port: int = 38281
     password: str | None = None
@@ -630,6 +649,8 @@ class ServerOptions(Group):
     auto_shutdown: AutoShutdown = AutoShutdown(0)
     compatibility: Compatibility = Compatibility(2)
     log_network: LogNetwork = LogNetwork(0)
+    metrics_port: MetricsPort = MetricsPort(0)
+    metrics_host: MetricsHost = MetricsHost("127.0.0.1")
 
 
 class GeneratorOptions(Group):
@@ -683,6 +704,30 @@ class GeneratorOptions(Group):
         OFF = 0
         ON = 1
 
+    class SweepThreads(int):
+        """
+        Number of threads used to check the locations of different players at the same time during sweeps.
+        0 or 1 checks them one after another. Only speeds up generation on free-threaded Python builds.
+        """
+
+    class OutputProcesses(int):
+        """
+        Number of processes used to generate the output of worlds that support it, like ROM patching, at the same time.
+        0 or 1 generates all output in threads of the generator process. Only available where processes can be forked.
+        """
+
+    class ProfileGeneration(Bool):
+        """
+        Record time, memory and state copies of each generation stage and world,
+        and write them as AP_<seed name>_profile.json next to the output
+        """
+
+    class ColumnarMultidata(Bool):
+        """
+        Write the .archipelago in the columnar format, which servers and trackers can read without unpickling it all.
+        Servers older than this version can't load it.
+        """
+
     class PanicMethod(str):
         """
         What to do if the current item placements appear unsolvable.
@@ -700,6 +745,10 @@ class GeneratorOptions(Group):
     race: Race = Race(0)
     plando_options: PlandoOptions = PlandoOptions("bosses, connections, texts")
     panic_method: PanicMethod = PanicMethod("swap")
+    sweep_threads: SweepThreads = SweepThreads(0)
+    output_processes: OutputProcesses = OutputProcesses(0)
+    profile_generation: ProfileGeneration | bool = False
+    columnar_multidata: ColumnarMultidata | bool = False
     loglevel: str = "info"
     logtime: bool = False
 
@@ -751,6 +800,8 @@ class Settings(Group):
     bizhawkclient_options: BizHawkClientOptions = BizHawkClientOptions()
 
     _filename: str | None = None
+    _import_worlds: bool = True
+    """False while auto-saving at exit, when worlds can no longer be imported"""
 
     def __getattribute__(self, key: str) -> Any:
         if key.startswith("_") or key in self.__class__.__dict__:
@@ -761,15 +812,19 @@ class Settings(Group):
             if key not in _world_settings_name_cache:
                 # find world that provides the settings class
                 _update_cache()
-                # check for missing keys to update _changed
-                for world_settings_name in _world_settings_name_cache:
-                    if world_settings_name not in dir(self):
-                        self._changed = True
+                # add missing keys now, as worlds are not imported when auto-saving at exit
+                if self._import_worlds:
+                    for world_settings_name in _world_settings_name_cache:
+                        if world_settings_name not in dir(self):
+                            self.__getattribute__(world_settings_name)  # sets _changed
             if key not in _world_settings_name_cache:
                 # not a world group
                 return super().__getattribute__(key)
             # directly import world and grab settings class
             world_mod, world_cls_name = _world_settings_name_cache[key].rsplit(".", 1)
+            if world_mod not in sys.modules and not super().__getattribute__("_import_worlds"):
+                # keep the settings of a world that was not imported as they were read
+                return super().__getattribute__(key)
             try:
                 world = cast(type, getattr(__import__(world_mod, fromlist=[world_cls_name]), world_cls_name))
             except AttributeError:
@@ -837,6 +892,8 @@ class Settings(Group):
                 assert "pytest" not in main_file and "unittest" not in main_file, \
                        f"Auto-saving {self._filename} during unittests"
             if self._filename and self.changed and not skip_autosave:
+                # importing a world during interpreter shutdown can fail, for example if it starts a thread pool
+                self._import_worlds = False
                 self.save()
 
         if not skip_autosave:
@@ -871,9 +928,22 @@ class Settings(Group):
     def dump(self, f: TextIO, level: int = 0) -> None:
         # load all world setting classes
         _update_cache()
-        for key in _world_settings_name_cache:
-            self.__getattribute__(key)  # load all worlds
-        super().dump(f, level)
+        if self._import_worlds:
+            for key in _world_settings_name_cache:
+                self.__getattribute__(key)  # load all worlds
+            super().dump(f, level)
+            return
+        # worlds that were not imported can't have changed their settings, so their sections are copied as they were
+        # read, as dumping them as plain dicts would lose their comments
+        unloaded = {key for key, value in self.__dict__.items() if isinstance(value, dict)}
+        read_sections: dict[str, str] = {}
+        if unloaded and self._filename and os.path.exists(self._filename):
+            with open(self._filename, encoding="utf-8-sig") as read_file:
+                read_sections = dict(_split_sections(read_file.read()))
+        buffer = io.StringIO()
+        super().dump(buffer, level)
+        for key, text in _split_sections(buffer.getvalue()):
+            f.write(read_sections[key] if key in unloaded and key in read_sections else text)
 
     @property
     def filename(self) -> str | None:
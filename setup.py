@@ -58,9 +58,12 @@ if __name__ == "__main__":
     ModuleUpdate.update(yes="--yes" in sys.argv or "-y" in sys.argv)
 
 from worlds.LauncherComponents import components, icon_paths
+from worlds.AutoWorld import AutoWorldRegister
 from Utils import version_tuple, is_windows, is_linux
 from Cython.Build import cythonize
 
+AutoWorldRegister.world_types.load_all()  # worlds add their components when imported
+
 
 non_apworlds: set[str] = {
     "A Link to the Past",
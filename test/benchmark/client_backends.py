@@ -0,0 +1,244 @@
+"""In-process stand-ins for SNI, the BizHawk connector script and the MultiServer, for benchmarking game clients."""
+
+import asyncio
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from websockets.server import serve
+
+
+class Memory:
+    """Sparse memory image, that reads 0 where nothing was written."""
+    page_size = 0x1000
+
+    def __init__(self, image: Optional[Dict[int, bytes]] = None) -> None:
+        self.pages: Dict[int, bytearray] = {}
+        for address, data in (image or {}).items():
+            self.write(address, data)
+
+    def read(self, address: int, size: int) -> bytes:
+        data = bytearray()
+        while size > 0:
+            page, offset = divmod(address, self.page_size)
+            chunk = min(size, self.page_size - offset)
+            if page in self.pages:
+                data += self.pages[page][offset:offset + chunk]
+            else:
+                data += bytes(chunk)
+            address += chunk
+            size -= chunk
+        return bytes(data)
+
+    def write(self, address: int, data: bytes) -> None:
+        while data:
+            page, offset = divmod(address, self.page_size)
+            chunk = min(len(data), self.page_size - offset)
+            self.pages.setdefault(page, bytearray(self.page_size))[offset:offset + chunk] = data[:chunk]
+            address += chunk
+            data = data[chunk:]
+
+
+class BackendStats:
+    round_trips: int
+    """Requests that the client has to wait on a response for"""
+    bytes_to_client: int
+    bytes_from_client: int
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.round_trips = 0
+        self.bytes_to_client = 0
+        self.bytes_from_client = 0
+
+
+class FakeSNI:
+    """Serves the usb2snes websocket protocol the way SNI does, for a single device with a memory image."""
+
+    def __init__(self, memory: Memory) -> None:
+        self.memory = memory
+        self.stats = BackendStats()
+        self.server: Any = None
+
+    async def start(self) -> str:
+        """Starts listening on a free port and returns the address to connect to"""
+        self.server = await serve(self.handle, "127.0.0.1", 0, ping_interval=None)
+        return f"127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, websocket: Any, *args: Any) -> None:
+        writes: List[Tuple[int, int]] = []
+        async for message in websocket:
+            self.stats.bytes_from_client += len(message)
+            if isinstance(message, bytes):
+                # data of the preceding PutAddress requests
+                while message and writes:
+                    address, size = writes.pop(0)
+                    self.memory.write(address, message[:size])
+                    if size > len(message):
+                        writes.insert(0, (address + len(message), size - len(message)))
+                    message = message[size:]
+                continue
+
+            request = json.loads(message)
+            opcode = request["Opcode"]
+            operands = request.get("Operands", [])
+            pairs = [(int(address, 16), int(size, 16)) for address, size in zip(operands[::2], operands[1::2])]
+            reply: Any = None
+            if opcode == "DeviceList":
+                reply = {"Results": ["Benchmark SNES"]}
+            elif opcode == "AppVersion":
+                reply = {"Results": ["SNI benchmark"]}
+            elif opcode == "GetAddress":
+                self.stats.round_trips += 1
+                reply = b"".join(self.memory.read(address, size) for address, size in pairs)
+            elif opcode == "PutAddress":
+                writes += pairs
+
+            if reply is not None:
+                if not isinstance(reply, bytes):
+                    reply = json.dumps(reply)
+                self.stats.bytes_to_client += len(reply)
+                await websocket.send(reply)
+
+
+class FakeBizHawk:
+    """Answers requests the way connector_bizhawk_generic.lua does, with a memory image per domain."""
+
+    def __init__(self, domains: Dict[str, Memory], domain_sizes: Dict[str, int], system: str,
+                 rom_hash: str = "BENCHMARK") -> None:
+        self.domains = domains
+        self.domain_sizes = domain_sizes
+        self.system = system
+        self.rom_hash = rom_hash
+        self.watches: Dict[int, Tuple[int, int, str, Optional[bytes]]] = {}
+        self.stats = BackendStats()
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.server: Optional[asyncio.Server] = None
+        self.handle_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> int:
+        """Starts listening on a free port and returns it"""
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        assert self.server is not None
+        if self.writer is not None:
+            self.writer.close()
+        if self.handle_task is not None:
+            await asyncio.wait([self.handle_task], timeout=1)
+        self.server.close()
+        await self.server.wait_closed()
+
+    def send(self, message: bytes) -> None:
+        assert self.writer is not None
+        self.stats.bytes_to_client += len(message)
+        self.writer.write(message)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.handle_task = asyncio.current_task()
+        while line := await reader.readline():
+            self.stats.bytes_from_client += len(line)
+            self.stats.round_trips += 1
+            if line == b"VERSION\n":
+                self.send(b"2\n")
+                continue
+
+            message = json.loads(line)
+            requests = message["requests"] if isinstance(message, dict) else message
+            responses: List[Dict[str, Any]] = []
+            failed_guard: Optional[Dict[str, Any]] = None
+            for request in requests:
+                if failed_guard is not None:
+                    responses.append(failed_guard)
+                    continue
+                response = self.process(request)
+                if response["type"] == "GUARD_RESPONSE" and not response["value"]:
+                    failed_guard = response
+                responses.append(response)
+
+            if isinstance(message, dict):
+                self.send(json.dumps({"id": message["id"], "responses": responses}).encode("utf-8") + b"\n")
+            else:
+                self.send(json.dumps(responses).encode("utf-8") + b"\n")
+
+    def process(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        request_type = request["type"]
+        if request_type in ("READ", "GUARD", "WRITE", "WATCH", "MEMORY_SIZE") and \
+                request["domain"] not in self.domains:
+            return {"type": "ERROR", "err": f"Unknown memory domain: {request['domain']}"}
+
+        if request_type == "PING":
+            return {"type": "PONG"}
+        if request_type == "SYSTEM":
+            return {"type": "SYSTEM_RESPONSE", "value": self.system}
+        if request_type == "PREFERRED_CORES":
+            return {"type": "PREFERRED_CORES_RESPONSE", "value": {}}
+        if request_type == "HASH":
+            return {"type": "HASH_RESPONSE", "value": self.rom_hash}
+        if request_type == "MEMORY_SIZE":
+            return {"type": "MEMORY_SIZE_RESPONSE", "value": self.domain_sizes.get(request["domain"], 0)}
+        if request_type == "GUARD":
+            expected_data = base64.b64decode(request["expected_data"])
+            actual_data = self.domains[request["domain"]].read(request["address"], len(expected_data))
+            return {"type": "GUARD_RESPONSE", "value": expected_data == actual_data, "address": request["address"]}
+        if request_type == "LOCK":
+            return {"type": "LOCKED"}
+        if request_type == "UNLOCK":
+            return {"type": "UNLOCKED"}
+        if request_type == "READ":
+            data = self.domains[request["domain"]].read(request["address"], request["size"])
+            return {"type": "READ_RESPONSE", "value": base64.b64encode(data).decode("ascii")}
+        if request_type == "WRITE":
+            self.domains[request["domain"]].write(request["address"], base64.b64decode(request["value"]))
+            return {"type": "WRITE_RESPONSE"}
+        if request_type == "WATCH":
+            self.watches[request["id"]] = (request["address"], request["size"], request["domain"], None)
+            return {"type": "WATCH_RESPONSE"}
+        if request_type == "UNWATCH":
+            self.watches.pop(request["id"], None)
+            return {"type": "UNWATCH_RESPONSE"}
+        if request_type == "DISPLAY_MESSAGE":
+            return {"type": "DISPLAY_MESSAGE_RESPONSE"}
+        if request_type == "SET_MESSAGE_INTERVAL":
+            return {"type": "SET_MESSAGE_INTERVAL_RESPONSE"}
+        return {"type": "ERROR", "err": f"Unknown command: {request_type}"}
+
+    def end_frame(self) -> None:
+        """Sends the watched ranges that changed, like the connector script does at the end of each frame"""
+        updates = []
+        for watch_id, (address, size, domain, value) in self.watches.items():
+            data = self.domains[domain].read(address, size)
+            if data != value:
+                self.watches[watch_id] = (address, size, domain, data)
+                updates.append({"id": watch_id, "value": base64.b64encode(data).decode("ascii")})
+        if updates and self.writer is not None:
+            self.send(json.dumps({"watches": updates}).encode("utf-8") + b"\n")
+
+
+class StubServerSocket:
+    """Takes the place of the client's connection to a MultiServer, and counts what the client sends."""
+    open = True
+    closed = False
+
+    def __init__(self) -> None:
+        self.messages = 0
+        self.bytes_sent = 0
+        self.commands: Dict[str, int] = {}
+
+    async def send(self, message: str) -> None:
+        self.bytes_sent += len(message)
+        for command in json.loads(message):
+            self.messages += 1
+            self.commands[command["cmd"]] = self.commands.get(command["cmd"], 0) + 1
+
+    async def close(self) -> None:
+        self.open = False
+        self.closed = True
@@ -0,0 +1,257 @@
+"""
+Benchmark of game clients against simulated emulators.
+
+Each scenario loads a scripted memory image into a fake SNI or BizHawk connector, connects the game's client to it and
+to a stub MultiServer, and then runs watcher iterations the way SNIClient and BizHawkClient do every tick.
+Reported are the round-trips to the emulator and bytes moved per tick, and the latency of each iteration.
+"""
+
+import dataclasses
+import typing
+
+
+@dataclasses.dataclass
+class Scenario:
+    game: str
+    memory: typing.Dict[str, typing.Dict[int, bytes]]
+    """Memory image by domain, as writes by address. SNI clients use the domain "SNES"."""
+    system: str = ""
+    """BizHawk system of the game, SNI games leave this empty"""
+    domain_sizes: typing.Dict[str, int] = dataclasses.field(default_factory=dict)
+    slot_data: typing.Dict[str, typing.Any] = dataclasses.field(default_factory=dict)
+    seed_name: str = "Benchmark"
+
+
+def alttp_scenario() -> Scenario:
+    from worlds.alttp.Client import ROMNAME_START, WRAM_START
+
+    return Scenario("A Link to the Past", {"SNES": {
+        ROMNAME_START: b"AP_benchmark",
+        WRAM_START + 0x10: bytes([0x07]),  # in dungeon
+    }})
+
+
+def smw_scenario() -> Scenario:
+    from worlds.smw.Client import SMW_GAME_STATE_ADDR, SMW_ROMHASH_START
+
+    return Scenario("Super Mario World", {"SNES": {
+        SMW_ROMHASH_START: b"SMW_benchmark",
+        SMW_GAME_STATE_ADDR: bytes([0x14]),  # in a level
+    }})
+
+
+def earthbound_scenario() -> Scenario:
+    from worlds.earthbound.Client import EB_ROMHASH_START, SAVE_FILE, WORLD_VERSION, EarthBoundClient
+
+    return Scenario("EarthBound", {"SNES": {
+        EB_ROMHASH_START: b"MOM2AP_benchmark",
+        WORLD_VERSION: EarthBoundClient.client_version.encode("utf-8"),
+        SAVE_FILE: bytes([1]),
+    }})
+
+
+def kdl3_scenario() -> Scenario:
+    from worlds.kdl3.client import KDL3_HALKEN, KDL3_NINTEN, KDL3_ROMNAME
+
+    return Scenario("Kirby's Dream Land 3", {"SNES": {
+        KDL3_ROMNAME: b"KDL3_benchmark",
+        KDL3_HALKEN: b"halken",
+        KDL3_NINTEN: b"ninten",
+    }})
+
+
+def pokemon_emerald_scenario() -> Scenario:
+    from worlds.pokemon_emerald.client import EXPECTED_ROM_NAME
+    from worlds.pokemon_emerald.data import data
+
+    save_block_1 = 0x02025A00
+    save_block_2 = 0x02024A54
+    return Scenario(
+        "Pokemon Emerald",
+        {
+            "ROM": {0x108: EXPECTED_ROM_NAME.encode("ascii")},
+            "System Bus": {
+                data.ram_addresses["gMain"] + 4: (data.ram_addresses["CB2_Overworld"] + 1).to_bytes(4, "little"),
+                data.ram_addresses["gSaveBlock1Ptr"]: save_block_1.to_bytes(4, "little"),
+                data.ram_addresses["gSaveBlock2Ptr"]: save_block_2.to_bytes(4, "little"),
+            },
+        },
+        system="GBA",
+        domain_sizes={"ROM": 0x2000000, "System Bus": 0x10000000},
+        slot_data={"goal": 0, "remote_items": 0, "dexsanity": 1, "death_link": 0, "legendary_hunt_catch": 0,
+                   "legendary_hunt_count": 1, "allowed_legendary_hunt_encounters": []},
+    )
+
+
+def mlss_scenario() -> Scenario:
+    return Scenario(
+        "Mario & Luigi Superstar Saga",
+        {
+            "ROM": {0xA0: b"MARIO&LUIGIUA8", 0xDF0000: b"Benchmark", 0xDF00A0: b"Benchmark"},
+            "EWRAM": {0x3060: b"MLSSAP"},
+            "IWRAM": {},
+        },
+        system="GBA",
+        domain_sizes={"ROM": 0x1000000, "EWRAM": 0x40000, "IWRAM": 0x8000},
+    )
+
+
+def ff1_scenario() -> Scenario:
+    from worlds.ff1.Client import rom_name_location, status_a_location
+
+    return Scenario(
+        "Final Fantasy",
+        {
+            "PRG ROM": {rom_name_location: b"FINAL FANTASY"},
+            "WRAM": {status_a_location: bytes([0x05])},
+            "RAM": {},
+        },
+        system="NES",
+        domain_sizes={"PRG ROM": 0x80000, "WRAM": 0x2000, "RAM": 0x800},
+    )
+
+
+scenarios: typing.List[typing.Callable[[], Scenario]] = [
+    alttp_scenario,
+    smw_scenario,
+    earthbound_scenario,
+    kdl3_scenario,
+    pokemon_emerald_scenario,
+    mlss_scenario,
+    ff1_scenario,
+]
+
+
+def run_clients_benchmark(iterations: int = 200) -> None:
+    import asyncio
+    import logging
+    import statistics
+    import time
+
+    from client_backends import FakeBizHawk, FakeSNI, Memory, StubServerSocket
+
+    from CommonClient import CommonContext
+    from NetUtils import Endpoint, NetworkPlayer, NetworkSlot, SlotType
+    from Utils import init_logging
+    from worlds import get_game_data_package
+    from worlds.AutoWorld import AutoWorldRegister
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+    logging.getLogger("websockets").setLevel(logging.WARNING)
+
+    def connect_slot(ctx: CommonContext, scenario: Scenario, server: StubServerSocket) -> None:
+        """Puts the context in the state of having connected to a slot of the scenario's game"""
+        data_package = get_game_data_package(scenario.game)
+        ctx.update_data_package({"games": {scenario.game: data_package}})
+        ctx.server = Endpoint(server)
+        ctx.auth = ctx.username = "Benchmark"
+        ctx.team = 0
+        ctx.slot = 1
+        ctx.slot_info = {0: NetworkSlot("Archipelago", "Archipelago", SlotType.player),
+                         1: NetworkSlot("Benchmark", scenario.game, SlotType.player)}
+        ctx.consume_players_package([NetworkPlayer(0, 1, "Benchmark", "Benchmark")])
+        ctx.missing_locations = set(data_package["location_name_to_id"].values())
+        ctx.checked_locations = set()
+        ctx.server_locations = set(ctx.missing_locations)
+        ctx.seed_name = scenario.seed_name
+        ctx.on_package("RoomInfo", {"cmd": "RoomInfo", "seed_name": scenario.seed_name})
+        ctx.on_package("Connected", {
+            "cmd": "Connected", "team": 0, "slot": 1, "slot_data": scenario.slot_data,
+            "missing_locations": sorted(ctx.missing_locations), "checked_locations": [],
+            "players": [NetworkPlayer(0, 1, "Benchmark", "Benchmark")], "slot_info": dict(ctx.slot_info),
+        })
+
+    async def run_sni(scenario: Scenario, server: StubServerSocket) -> typing.Tuple[FakeSNI, typing.List[float]]:
+        from SNIClient import SNIContext, snes_connect, snes_disconnect
+        from worlds.AutoSNIClient import AutoSNIClientRegister
+
+        sni = FakeSNI(Memory(scenario.memory["SNES"]))
+        address = await sni.start()
+        ctx = SNIContext(address, "", "")
+        try:
+            await snes_connect(ctx, address)
+            handler = AutoSNIClientRegister.game_handlers[scenario.game]
+            ctx.client_handler = handler
+            assert await handler.validate_rom(ctx), "ROM did not validate"
+            connect_slot(ctx, scenario, server)
+
+            times: typing.List[float] = []
+            sni.stats.reset()
+            for _ in range(iterations):
+                start = time.perf_counter()
+                # one pass of SNIClient.game_watcher
+                await handler.validate_rom(ctx)
+                await handler.game_watcher(ctx)
+                times.append(time.perf_counter() - start)
+            return sni, times
+        finally:
+            ctx.snes_reconnect_address = None
+            await snes_disconnect(ctx)
+            await sni.stop()
+
+    async def run_bizhawk(scenario: Scenario,
+                          server: StubServerSocket) -> typing.Tuple[FakeBizHawk, typing.List[float]]:
+        from worlds._bizhawk import ConnectionStatus, disconnect, get_hash
+        from worlds._bizhawk.client import AutoBizHawkClientRegister
+        from worlds._bizhawk.context import BizHawkClientContext
+
+        domains = {domain: Memory(image) for domain, image in scenario.memory.items()}
+        connector = FakeBizHawk(domains, scenario.domain_sizes, scenario.system)
+        port = await connector.start()
+        ctx = BizHawkClientContext(None, None)
+        try:
+            ctx.bizhawk_ctx._start_receiving(await asyncio.open_connection("127.0.0.1", port))
+            ctx.bizhawk_ctx.connection_status = ConnectionStatus.CONNECTED
+            handler = next(handlers[scenario.game] for systems, handlers
+                           in AutoBizHawkClientRegister.game_handlers.items() if scenario.game in handlers)
+            assert await handler.validate_rom(ctx), "ROM did not validate"
+            ctx.client_handler = handler
+            connect_slot(ctx, scenario, server)
+
+            times: typing.List[float] = []
+            connector.stats.reset()
+            for _ in range(iterations):
+                connector.end_frame()
+                start = time.perf_counter()
+                # one pass of BizHawkClient's _game_watcher
+                await get_hash(ctx.bizhawk_ctx)
+                await handler.game_watcher(ctx)
+                times.append(time.perf_counter() - start)
+            return connector, times
+        finally:
+            disconnect(ctx.bizhawk_ctx)
+            await connector.stop()
+
+    async def main() -> None:
+        for make_scenario in scenarios:
+            scenario = make_scenario()
+            # importing the world registers its client
+            AutoWorldRegister.world_types[scenario.game]
+            server = StubServerSocket()
+            try:
+                if scenario.system:
+                    backend, times = await run_bizhawk(scenario, server)
+                else:
+                    backend, times = await run_sni(scenario, server)
+            except Exception as e:
+                logger.exception(f"{scenario.game} failed: {e}")
+                continue
+
+            stats = backend.stats
+            milliseconds = sorted(t * 1000 for t in times)
+            logger.info(
+                f"{scenario.game} ({'BizHawk' if scenario.system else 'SNI'}), {iterations} ticks: "
+                f"{stats.round_trips / iterations:.1f} round-trips and "
+                f"{(stats.bytes_to_client + stats.bytes_from_client) / iterations:.0f} bytes per tick, "
+                f"latency mean {statistics.mean(milliseconds):.3f} ms, "
+                f"p95 {milliseconds[int(len(milliseconds) * 0.95)]:.3f} ms, max {milliseconds[-1]:.3f} ms, "
+                f"{server.messages} messages to the server")
+
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_clients_benchmark()
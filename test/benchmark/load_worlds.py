@@ -12,7 +12,8 @@ def run_load_worlds_benchmark():
 
     import BaseClasses, Launcher, Fill
 
-    from worlds import world_sources
+    from worlds import AutoWorldRegister, world_sources
+    AutoWorldRegister.world_types.load_all()
 
     init_logging("Benchmark Runner")
     logger = logging.getLogger("Benchmark")
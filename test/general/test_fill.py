@@ -3,7 +3,7 @@ import unittest
 
 from Options import Accessibility
 from test.general import generate_items, generate_locations, generate_test_multiworld
-from Fill import FillError, balance_multiworld_progression, fill_restrictive, \
+from Fill import FillError, LocationBitset, balance_multiworld_progression, fill_restrictive, \
     distribute_early_items, distribute_items_restrictive
 from BaseClasses import Entrance, LocationProgressType, MultiWorld, Region, Item, Location, \
     ItemClassification
@@ -880,3 +880,18 @@ class TestBalanceMultiworldProgression(unittest.TestCase):
 
         self.assertRegionContains(
             self.player1.regions[2], self.player2.prog_items[0])
+
+
+class TestLocationBitset(unittest.TestCase):
+    def test_round_trip(self):
+        """Tests that location sets survive conversion to and from bitsets in index order"""
+        multiworld = generate_test_multiworld()
+        player1 = generate_player_data(multiworld, 1, 70, 0)
+        bitset = LocationBitset(player1.locations)
+        subset = player1.locations[3:70:4]
+        mask = bitset.mask(reversed(subset))
+        self.assertEqual(list(bitset.iter(mask)), subset)
+        self.assertEqual(mask.bit_count(), len(subset))
+        self.assertEqual(list(bitset.iter(bitset.all)), player1.locations)
+        self.assertEqual(list(bitset.iter(0)), [])
+        self.assertEqual(bitset.filter(bitset.all, lambda location: location in subset), mask)
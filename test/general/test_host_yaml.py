@@ -105,3 +105,23 @@ class TestSettingsSave(unittest.TestCase):
             settings = Settings(filename)
             self.assertEqual(settings.server_options.release_mode, new_release_mode,
                              "Settings were not overwritten")
+
+    def test_save_without_importing_worlds(self) -> None:
+        """Test that saving at exit keeps the sections of worlds that were not imported as they were read"""
+        import settings
+        from unittest.mock import patch
+
+        section = "# Settings of a world that is not imported\nfake_options:\n  value: 1\n"
+        with TemporaryDirectory() as d:
+            filename = os.path.join(d, "host.yaml")
+            Settings(None).save(filename)
+            with open(filename, "a", encoding="utf-8") as f:
+                f.write(section)
+            with patch.dict(settings._world_settings_name_cache, {"fake_options": "worlds.not_a_world.FakeWorld"}):
+                host_settings = Settings(filename)
+                host_settings.server_options.release_mode = ServerOptions.ReleaseMode("enabled")
+                host_settings._import_worlds = False
+                host_settings.save()
+            with open(filename, encoding="utf-8") as f:
+                self.assertIn(section, f.read())
+            self.assertEqual(Settings(filename).server_options.release_mode, ServerOptions.ReleaseMode("enabled"))
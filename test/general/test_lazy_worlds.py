@@ -0,0 +1,88 @@
+import unittest
+import unittest.mock
+from typing import Any, ClassVar, Dict
+
+from Utils import Version
+from worlds import get_game_checksum, get_game_data_package, get_game_static_data, get_shared_data_package
+from worlds.AutoWorld import AutoWorldRegister, LazyWorld, LazyWorldTypes, World
+
+
+class TestLazyWorldTypes(unittest.TestCase):
+    def setUp(self) -> None:
+        self.world_types = LazyWorldTypes()
+        patcher = unittest.mock.patch.object(AutoWorldRegister, "world_types", self.world_types)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.loads = 0
+
+    def lazy_world(self, game: str, register: bool = True) -> LazyWorld:
+        def load() -> None:
+            self.loads += 1
+            if register:
+                class LazyTestWorld(World):
+                    game = game_name
+                    item_name_to_id: ClassVar[Dict[str, int]] = {}
+                    location_name_to_id: ClassVar[Dict[str, int]] = {}
+
+        game_name = game
+        manifest: Dict[str, Any] = {"game": game, "world_version": "1.2.3"}
+        return LazyWorld(load, Version(1, 2, 3), manifest, "lazy_options", "worlds.lazy.LazyTestWorld", "checksum")
+
+    def test_lookup_imports(self) -> None:
+        """Tests that indexed worlds are only imported once looked up, and get their manifest from the index"""
+        self.world_types.add_lazy("Lazy Game", self.lazy_world("Lazy Game"))
+        self.assertIn("Lazy Game", self.world_types)
+        self.assertEqual(list(self.world_types), ["Lazy Game"])
+        self.assertEqual(self.world_types.get_settings_names(), {"lazy_options": "worlds.lazy.LazyTestWorld"})
+        self.assertEqual(self.loads, 0)
+
+        world_type = self.world_types["Lazy Game"]
+        self.assertEqual(world_type.game, "Lazy Game")
+        self.assertEqual(world_type.world_version, Version(1, 2, 3))
+        self.assertEqual(world_type.manifest["world_version"], "1.2.3")
+        self.assertIs(self.world_types["Lazy Game"], world_type)
+        self.assertIsNone(self.world_types.get_lazy("Lazy Game"))
+        self.assertEqual(self.loads, 1)
+
+    def test_failed_import(self) -> None:
+        """Tests that a world failing to import is removed, as if it was never found"""
+        self.world_types.add_lazy("Broken Game", self.lazy_world("Broken Game", register=False))
+        self.assertIsNone(self.world_types.get("Broken Game"))
+        self.assertNotIn("Broken Game", self.world_types)
+        self.assertEqual(self.loads, 1)
+
+    def test_load_all(self) -> None:
+        """Tests that listing world types imports all of them"""
+        self.world_types.add_lazy("Lazy Game", self.lazy_world("Lazy Game"))
+        self.world_types.add_lazy("Broken Game", self.lazy_world("Broken Game", register=False))
+        self.assertEqual([world_type.game for world_type in self.world_types.values()], ["Lazy Game"])
+
+
+class TestDataPackage(unittest.TestCase):
+    def test_checksums(self) -> None:
+        """Tests that checksums match the data package, whether the world is imported yet or not"""
+        for game in AutoWorldRegister.world_types:
+            with self.subTest(game=game):
+                checksum = get_game_checksum(game)
+                self.assertEqual(checksum, get_game_data_package(game)["checksum"])
+                self.assertEqual(checksum, get_game_checksum(game))
+        self.assertIsNone(get_game_checksum("Unknown Game"))
+
+    def test_cached_data_package(self) -> None:
+        """Tests that the data package cached with the world index matches the worlds"""
+        shared = get_shared_data_package()
+        if shared is None:
+            self.skipTest("worlds were not loaded from the world index")
+        for game in shared:
+            with self.subTest(game=game):
+                world_type = AutoWorldRegister.world_types[game]
+                cached = dict(shared[game])
+                data_package = world_type.get_data_package_data()
+                for key in ("item_name_to_id", "location_name_to_id"):
+                    # the checksum depends on the order of names
+                    cached[key] = cached[key].to_dict()
+                    self.assertEqual(list(cached[key].items()), list(data_package[key].items()))
+                self.assertEqual(cached, data_package)
+                self.assertEqual(shared.per_game("item_name_groups")[game], world_type.item_name_groups)
+                self.assertEqual(shared.per_game("non_hintable_names")[game], world_type.hint_blacklist)
+                self.assertEqual(get_game_static_data(game).item_name_groups, world_type.item_name_groups)
@@ -0,0 +1,28 @@
+import concurrent.futures
+import multiprocessing
+import os
+import unittest
+import unittest.mock
+from tempfile import TemporaryDirectory
+
+from Main import _start_output_processes
+from . import TestWorld, setup_solo_multiworld
+
+
+def write_pid(world: TestWorld, output_directory: str) -> None:
+    with open(os.path.join(output_directory, f"{world.player}.txt"), "w") as f:
+        f.write(str(os.getpid()))
+
+
+@unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "processes can't be forked")
+class TestOutputProcesses(unittest.TestCase):
+    @unittest.mock.patch.object(TestWorld, "output_in_process", True)
+    @unittest.mock.patch.object(TestWorld, "generate_output", write_pid)
+    def test_output_in_forked_process(self) -> None:
+        multiworld = setup_solo_multiworld(TestWorld, ())
+        with TemporaryDirectory() as temp_dir:
+            with _start_output_processes(multiworld, [1], 2, temp_dir) as futures:
+                for future in concurrent.futures.as_completed(futures):
+                    future.result()
+            with open(os.path.join(temp_dir, "1.txt")) as f:
+                self.assertNotEqual(int(f.read()), os.getpid())
@@ -1,10 +1,11 @@
 import unittest
+import unittest.mock
 from dataclasses import dataclass, fields
 from typing import Any, ClassVar, cast
 
 from typing_extensions import override
 
-from BaseClasses import CollectionState, Item, ItemClassification, Location, MultiWorld, Region
+from BaseClasses import CollectionState, Entrance, Item, ItemClassification, Location, MultiWorld, Region
 from NetUtils import JSONMessagePart
 from Options import Choice, FreeText, Option, OptionSet, PerGameCommonOptions, Range, Toggle
 from rule_builder.cached_world import CachedRuleBuilderWorld
@@ -560,6 +561,37 @@ class TestCaching(CachedRuleBuilderTestCase):
         self.assertNotIn(id(entrance.access_rule), self.state.rule_builder_cache[1])
         self.assertTrue(entrance.can_reach(self.state))
 
+    def test_incremental_reachability(self) -> None:
+        entrance = self.world.get_entrance("Region 1 -> Region 2")
+        region = self.world.get_region("Region 2")
+        self.assertEqual(self.world.get_entrance_item_dependencies(entrance), {"Item 1"})
+        self.assertFalse(region.can_reach(self.state))
+
+        self.state.collect(self.world.create_item("Item 2"))  # unrelated to the blocked entrance
+        self.assertEqual(self.state.stale[1], {"Item 2"})
+        with unittest.mock.patch.object(Entrance, "can_reach", autospec=True, side_effect=Entrance.can_reach) as mock:
+            self.assertFalse(region.can_reach(self.state))
+            self.assertNotIn(unittest.mock.call(entrance, self.state), mock.call_args_list)
+
+        self.state.collect(self.world.create_item("Item 1"))  # entrance gets rechecked
+        with unittest.mock.patch.object(Entrance, "can_reach", autospec=True, side_effect=Entrance.can_reach) as mock:
+            self.assertTrue(region.can_reach(self.state))
+            self.assertIn(unittest.mock.call(entrance, self.state), mock.call_args_list)
+
+    def test_update_reachable_regions_directly(self) -> None:
+        region1 = self.world.get_region("Region 1")
+        region4 = Region("Region 4", self.player, self.multiworld)
+        self.multiworld.regions.append(region4)
+        self.state.collect(self.world.create_item("Item 2"))
+        self.assertFalse(self.world.get_region("Region 2").can_reach(self.state))
+        self.assertFalse(self.state.stale[1])
+
+        # connections added by hand, like entrance randomization does, are picked up by a direct update
+        entrance = self.world.create_entrance(region1, region4, Has("Item 2"))
+        self.state.blocked_connections[1].add(entrance)
+        self.state.update_reachable_regions(1)
+        self.assertIn(region4, self.state.reachable_regions[1])
+
 
 class TestCacheDisabled(RuleBuilderTestCase):
     multiworld: MultiWorld  # pyright: ignore[reportUninitializedInstanceVariable]
@@ -0,0 +1,42 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from BaseClasses import Entrance, Item, ItemClassification, Region
+from . import generate_locations, generate_test_multiworld
+
+
+class TestPlaythrough(unittest.TestCase):
+    def test_unneeded_copies_culled(self) -> None:
+        """Tests that the playthrough only keeps the items required to beat the game"""
+        multiworld = generate_test_multiworld()
+        menu = multiworld.get_region("Menu", 1)
+        goal = Region("Goal", 1, multiworld)
+        multiworld.regions.append(goal)
+        entrance = Entrance(1, "To Goal", menu)
+        menu.exits.append(entrance)
+        entrance.connect(goal)
+        entrance.access_rule = lambda state: state.has("Key", 1, 2)
+        menu_locations = generate_locations(20, 1, menu)
+        goal_locations = generate_locations(5, 1, goal, tag="_goal")
+        for i, location in enumerate(menu_locations):
+            # keys are spread among plenty of other progression, with one more key than needed
+            name = "Key" if i % 7 == 3 else "Spare"
+            multiworld.push_item(location, Item(name, ItemClassification.progression, None, 1), False)
+        for i, location in enumerate(goal_locations):
+            name = "Victory" if i == 2 else "Spare"
+            multiworld.push_item(location, Item(name, ItemClassification.progression, None, 1), False)
+        multiworld.completion_condition[1] = lambda state: state.has("Victory", 1)
+
+        multiworld.spoiler.create_playthrough(create_paths=False)
+        spheres = [sphere for name, sphere in multiworld.spoiler.playthrough.items() if name != "0"]
+        self.assertEqual([sorted(sphere.values()) for sphere in spheres], [["Key", "Key"], ["Victory"]])
+
+        with TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "spoiler.txt")
+            multiworld.spoiler.to_file(path)
+            with open(path, encoding="utf-8-sig") as f:
+                spoiler = f.read()
+        self.assertIn(f"\n\nPlaythrough:\n\n0: {{\n\n}}\n"
+                      f"1: {{\n  {menu_locations[17]}: Key\n  {menu_locations[3]}: Key\n}}\n"
+                      f"2: {{\n  {goal_locations[2]}: Victory\n}}", spoiler)
@@ -1,7 +1,11 @@
+import concurrent.futures
 import unittest
+import unittest.mock
+from collections import Counter
 
+from BaseClasses import CollectionState, Entrance, ItemCounts, Region
 from worlds.AutoWorld import AutoWorldRegister, call_all
-from . import setup_solo_multiworld
+from . import TestWorld, generate_items, generate_locations, generate_test_multiworld, setup_solo_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -27,3 +31,143 @@ class TestBase(unittest.TestCase):
                     with self.subTest("Step", step=step):
                         call_all(multiworld, step)
                         self.assertTrue(multiworld.get_all_state(False, allow_partial_entrances=True))
+
+
+class TestCopyOnWrite(unittest.TestCase):
+    def test_copy_on_write(self):
+        """Ensure states copied with copy_on_write only share a player's containers until they are modified."""
+        multiworld = generate_test_multiworld(2)
+        menu = multiworld.get_region("Menu", 1)
+        region = Region("Locked", 1, multiworld)
+        multiworld.regions.append(region)
+        entrance = Entrance(1, "Locked Entrance", menu)
+        menu.exits.append(entrance)
+        entrance.connect(region)
+        entrance.access_rule = lambda state: state.has("player1_progitem0", 1)
+        item1 = generate_items(1, 1, True)[0]
+        item2 = generate_items(1, 2, True)[0]
+
+        state = multiworld.state
+        state.collect(item2)
+        self.assertFalse(region.can_reach(state))
+        new_state = state.copy(copy_on_write=True)
+        self.assertEqual({1, 2}, new_state.shared_players)
+        self.assertIs(state.prog_items[1], new_state.prog_items[1])
+        self.assertFalse(new_state.stale[1])
+
+        new_state.collect(item1)
+        self.assertIsNot(state.prog_items[1], new_state.prog_items[1])
+        self.assertIs(state.prog_items[2], new_state.prog_items[2])
+        self.assertTrue(region.can_reach(new_state))
+        self.assertFalse(region.can_reach(state))
+        self.assertEqual(0, state.count(item1.name, 1))
+
+        state.collect(item2)
+        self.assertEqual(2, state.count(item2.name, 2))
+        self.assertEqual(1, new_state.count(item2.name, 2))
+
+
+class TestItemCounts(unittest.TestCase):
+    def test_item_counts(self):
+        """Ensure ItemCounts behaves like a Counter for indexed items and other names."""
+        counts = ItemCounts({"Sword": 0, "Shield": 1})
+        self.assertEqual(0, counts["Sword"])
+        self.assertNotIn("Sword", counts)
+        counts["Sword"] += 2
+        counts["Event"] += 1
+        self.assertEqual(2, counts["Sword"])
+        self.assertEqual(1, counts["Event"])
+        self.assertEqual({"Sword": 2, "Event": 1}, dict(counts))
+        self.assertEqual(2, len(counts))
+        self.assertEqual(3, counts.total())
+
+        copied = counts.copy()
+        copied["Shield"] = 1
+        del copied["Sword"]
+        self.assertNotIn("Sword", copied)
+        self.assertEqual(2, counts["Sword"])
+        self.assertEqual(0, counts["Shield"])
+        del copied["Other Event"]  # like Counter, deleting a missing item does nothing
+        self.assertEqual({"Shield": 1, "Event": 1}, dict(copied))
+
+    def test_compact_state(self):
+        """Ensure CollectionState uses ItemCounts for worlds that enable compact_item_counts."""
+        with unittest.mock.patch.object(TestWorld, "compact_item_counts", True), \
+                unittest.mock.patch.object(TestWorld, "item_name_to_index", {"player1_progitem0": 0}):
+            multiworld = generate_test_multiworld()
+            state = CollectionState(multiworld)
+        self.assertIsInstance(state.prog_items[1], ItemCounts)
+        item, other_item = generate_items(2, 1, True)
+        state.collect(item)
+        state.collect(other_item)
+        self.assertTrue(state.has_all([item.name, other_item.name], 1))
+        self.assertTrue(state.has_from_list([item.name, other_item.name], 1, 2))
+        state.remove(item)
+        self.assertFalse(state.has(item.name, 1))
+        self.assertEqual(1, state.copy().count(other_item.name, 1))
+        state.set_item("Absent Item", 1, 0)
+        self.assertFalse(state.has("Absent Item", 1))
+
+    def test_item_helpers(self):
+        """Ensure the item helpers of CollectionState give the same results for ItemCounts as for a Counter."""
+        multiworld = generate_test_multiworld()
+        state = CollectionState(multiworld)
+        item_name_to_index = {"Sword": 0, "Shield": 1, "Bow": 2}
+        contents = {"Sword": 2, "Bow": 1, "Event": 1}
+        counts = ItemCounts(item_name_to_index)
+        counts.update(contents)
+        names = ["Shield", "Sword", "Bow", "Event", "Other Event"]
+        with unittest.mock.patch.object(TestWorld, "item_name_groups", {"Weapons": frozenset({"Sword", "Bow"})}), \
+                unittest.mock.patch.object(TestWorld, "item_name_group_indices", {"Weapons": (0, 2)}):
+            for prog_items in (Counter(contents), counts):
+                state.prog_items[1] = prog_items
+                with self.subTest(prog_items=type(prog_items).__name__):
+                    self.assertEqual([False, True, True, True, False], [state.has(name, 1) for name in names])
+                    self.assertTrue(state.has("Sword", 1, 2))
+                    self.assertFalse(state.has("Sword", 1, 3))
+                    self.assertTrue(state.has_all(["Sword", "Bow", "Event"], 1))
+                    self.assertFalse(state.has_all(["Sword", "Shield"], 1))
+                    self.assertFalse(state.has_all(["Event", "Other Event"], 1))
+                    self.assertTrue(state.has_any(["Shield", "Event"], 1))
+                    self.assertFalse(state.has_any(["Shield", "Other Event"], 1))
+                    self.assertTrue(state.has_from_list(names, 1, 4))
+                    self.assertFalse(state.has_from_list(names, 1, 5))
+                    self.assertEqual(3, state.count_group("Weapons", 1))
+
+
+class TestParallelSweep(unittest.TestCase):
+    @staticmethod
+    def sweep(sweep_executor: concurrent.futures.Executor | None) -> tuple[list[str], list[int]]:
+        """Sweeps a multiworld where each player's items are locked behind their previous item, which another player
+        has, returning the collected items and the number of locations collected from by the end of each iteration."""
+        multiworld = generate_test_multiworld(3)
+        multiworld.sweep_executor = sweep_executor
+        items = {player: generate_items(3, player, True) for player in multiworld.player_ids}
+        for player in multiworld.player_ids:
+            other_player = player % multiworld.players + 1
+            for index, item in enumerate(items[other_player]):
+                location = generate_locations(1, player, multiworld.get_region("Menu", player), None,
+                                              f"_{index}")[0]
+                if index:
+                    required_item = items[player][index - 1].name
+                    location.access_rule = lambda state, name=required_item, p=player: state.has(name, p)
+                location.place_locked_item(item)
+        state = CollectionState(multiworld)
+        iterations = [len(state.advancements) for _ in state.sweep_for_advancements(yield_each_sweep=True)]
+        assert multiworld.fulfills_accessibility(CollectionState(multiworld))
+        return sorted(item for counter in state.prog_items.values() for item in counter), iterations
+
+    def test_parallel_sweep(self):
+        """Ensure sweeping with a sweep_executor collects the same items per iteration as a sequential sweep."""
+        with concurrent.futures.ThreadPoolExecutor(3) as executor, \
+                unittest.mock.patch.object(TestWorld, "thread_safe_rules", True), \
+                unittest.mock.patch.object(executor, "map", wraps=executor.map) as executor_map:
+            self.assertEqual(self.sweep(None), self.sweep(executor))
+        executor_map.assert_called()
+
+    def test_thread_unsafe_rules(self):
+        """Ensure the locations of worlds without thread_safe_rules are not checked on the sweep_executor."""
+        with concurrent.futures.ThreadPoolExecutor(3) as executor, \
+                unittest.mock.patch.object(executor, "map", wraps=executor.map) as executor_map:
+            self.assertEqual(self.sweep(None), self.sweep(executor))
+        executor_map.assert_not_called()
@@ -0,0 +1,63 @@
+import mmap
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from MultiServer import Context
+from NetUtils import ColumnarMultiData, LocationStore, NetworkSlot, SlotType, encode_columnar_multidata
+from Utils import VersionException
+
+sample_multidata = {
+    "slot_data": {1: {"goal": 2}, 2: {}},
+    "slot_info": {
+        1: NetworkSlot("Player1", "Game A", SlotType.player),
+        2: NetworkSlot("Player2", "Game Ä", SlotType.player),
+        3: NetworkSlot("Group", "Game A", SlotType.group, [1, 2]),
+    },
+    "locations": {
+        1: {11: (21, 2, 7), 12: (22, 2, 0), -13: (13, 1, 0)},
+        2: {},
+    },
+    "spheres": [{1: {-13}}, {1: {11, 12}}, {}],
+    "seed_name": "12345",
+}
+
+
+class TestColumnarMultiData(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        multidata = ColumnarMultiData(encode_columnar_multidata(sample_multidata))
+        self.assertEqual(set(multidata), set(sample_multidata))
+        self.assertEqual(multidata.to_dict(), sample_multidata)
+
+    def test_lazy(self) -> None:
+        multidata = ColumnarMultiData(encode_columnar_multidata(sample_multidata))
+        self.assertEqual(multidata["locations"][1][11], (21, 2, 7))
+        self.assertEqual(multidata["seed_name"], "12345")
+        self.assertNotIn("slot_data", multidata._cache)
+        with self.assertRaises(KeyError):
+            _ = multidata["locations"][3]
+        with self.assertRaises(KeyError):
+            _ = multidata["race_mode"]
+
+    def test_mmap(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "test.archipelago")
+            with open(path, "wb") as f:
+                f.write(encode_columnar_multidata(sample_multidata))
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                multidata = ColumnarMultiData(data)
+                self.assertEqual(multidata["slot_info"], sample_multidata["slot_info"])
+                store = multidata.location_store()
+                self.assertEqual(store[1][-13], (13, 1, 0))
+                del multidata
+
+    def test_incompatible_version(self) -> None:
+        with self.assertRaises(VersionException):
+            ColumnarMultiData(bytes([5]) + encode_columnar_multidata(sample_multidata)[1:])
+
+    def test_context_decompress(self) -> None:
+        data = encode_columnar_multidata(sample_multidata)
+        multidata = Context.decompress(data)
+        self.assertIsInstance(multidata["locations"], LocationStore)
+        self.assertEqual(multidata["spheres"], sample_multidata["spheres"])
+        self.assertIsInstance(Context.decompress(data, lazy=True), ColumnarMultiData)
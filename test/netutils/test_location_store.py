@@ -3,7 +3,7 @@ import os
 import typing
 import unittest
 import warnings
-from NetUtils import LocationStore, _LocationStore
+from NetUtils import ColumnarMultiData, LocationStore, _LocationStore, encode_columnar_multidata
 
 State = typing.Dict[typing.Tuple[int, int], typing.Set[int]]
 RawLocations = typing.Dict[int, typing.Dict[int, typing.Tuple[int, int, int]]]
@@ -256,6 +256,15 @@ class TestPurePythonLocationStoreConstructor(Base.TestLocationStoreConstructor):
         super().setUp()
 
 
+class TestPurePythonColumnarLocationStore(Base.TestLocationStore):
+    """Run base method tests for the pure python implementation built from multidata columns."""
+    def setUp(self) -> None:
+        multidata = ColumnarMultiData(encode_columnar_multidata({"locations": sample_data}))
+        self.store = _LocationStore.from_columns(*(multidata.column(f"locations.{column}") for column in
+                                                   ("starts", "ids", "items", "receivers", "flags")))
+        super().setUp()
+
+
 @unittest.skipIf(LocationStore is _LocationStore and not ci, "_speedups not available")
 class TestSpeedupsLocationStore(Base.TestLocationStore):
     """Run base method tests for cython implementation."""
@@ -265,6 +274,15 @@ class TestSpeedupsLocationStore(Base.TestLocationStore):
         super().setUp()
 
 
+@unittest.skipIf(LocationStore is _LocationStore and not ci, "_speedups not available")
+class TestSpeedupsColumnarLocationStore(Base.TestLocationStore):
+    """Run base method tests for cython implementation built from multidata columns."""
+    def setUp(self) -> None:
+        self.assertFalse(LocationStore is _LocationStore, "Failed to load _speedups")
+        self.store = ColumnarMultiData(encode_columnar_multidata({"locations": sample_data})).location_store()
+        super().setUp()
+
+
 @unittest.skipIf(LocationStore is _LocationStore and not ci, "_speedups not available")
 class TestSpeedupsLocationStoreConstructor(Base.TestLocationStoreConstructor):
     """Run base constructor tests and tests the additional constraints for cython implementation."""
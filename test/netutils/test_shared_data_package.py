@@ -0,0 +1,73 @@
+import unittest
+import unittest.mock
+
+from MultiServer import Context
+from NetUtils import SharedDataPackage, SharedNameTable, encode_shared_data_package
+
+sample_games = {
+    "Archipelago": {
+        "item_name_to_id": {"Nothing": -1},
+        "location_name_to_id": {"Cheat Console": -1, "Server": -2},
+        "checksum": "0",
+    },
+    "Game Ä": {
+        "item_name_to_id": {"Sword": 3, "Shield": 1, "Ärmor": 2, "Bow": 100},
+        "location_name_to_id": {"Chest": 10},
+        "checksum": "1",
+    },
+}
+sample_groups = {"Archipelago": {}, "Game Ä": {"Weapons": {"Sword", "Bow"}}}
+
+
+class TestSharedDataPackage(unittest.TestCase):
+    def setUp(self) -> None:
+        self.package = SharedDataPackage(encode_shared_data_package(
+            sample_games, item_name_groups=sample_groups, location_name_groups={"Game Ä": {}}))
+
+    def test_name_tables(self) -> None:
+        self.assertEqual(list(self.package), ["Archipelago", "Game Ä"])
+        for game, game_package in sample_games.items():
+            shared = self.package[game]
+            self.assertEqual(shared["checksum"], game_package["checksum"])
+            self.assertIsInstance(shared["item_name_to_id"], SharedNameTable)
+            for kind in ("item_name_to_id", "location_name_to_id"):
+                self.assertEqual(dict(shared[kind]), game_package[kind])
+                self.assertEqual(shared[kind].to_dict(), game_package[kind])
+                # the data package checksum depends on the order of names
+                self.assertEqual(list(shared[kind].to_dict().items()), list(game_package[kind].items()))
+                self.assertEqual(dict(shared[kind].names_by_id()),
+                                 {code: name for name, code in game_package[kind].items()})
+
+    def test_missing(self) -> None:
+        items = self.package["Game Ä"]["item_name_to_id"]
+        self.assertNotIn("Arrow", items)
+        self.assertNotIn("Ärmor ", items)
+        self.assertNotIn(3, items)
+        self.assertNotIn(4, items.names_by_id())
+        self.assertNotIn("Sword", items.names_by_id())
+        with self.assertRaises(KeyError):
+            _ = self.package["Game B"]
+
+    def test_per_game(self) -> None:
+        self.assertEqual(dict(self.package.per_game("item_name_groups")), sample_groups)
+        location_groups = self.package.per_game("location_name_groups")
+        self.assertEqual(list(location_groups), ["Game Ä"])
+        self.assertNotIn("Archipelago", location_groups)
+        self.assertIsNone(location_groups.get("Archipelago"))
+
+    def test_server_lookups(self) -> None:
+        with unittest.mock.patch.object(Context, "_load_game_data"):
+            ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.gamespackage = self.package
+        ctx.item_name_groups = self.package.per_game("item_name_groups")
+        ctx.location_name_groups = self.package.per_game("location_name_groups")
+        ctx.games = {1: "Game Ä"}
+        ctx._init_game_data()
+        item_names = ctx.item_names["Game Ä"]
+        self.assertEqual(item_names[2], "Ärmor")
+        self.assertEqual(item_names[-1], "Nothing")
+        self.assertEqual(item_names[4], "Unknown item (ID:4)")
+        self.assertNotIn(4, item_names)
+        self.assertEqual(ctx.location_names["Game Ä"][-2], "Server")
+        self.assertEqual(set(ctx.all_item_and_group_names["Game Ä"]), {"Sword", "Shield", "Ärmor", "Bow", "Weapons"})
+        self.assertEqual(len(ctx.all_item_and_group_names["Game Ä"]), 5)
@@ -0,0 +1,141 @@
+import asyncio
+import base64
+import json
+import unittest
+from typing import Any
+
+from worlds._bizhawk import BizHawkContext, ConnectionStatus, RequestFailedError, disconnect, get_script_version, \
+    get_watch_updates, ping, read, unwatch, watch, write
+
+
+class FakeConnector:
+    """Answers requests the way connector_bizhawk_generic.lua does, with a single memory domain."""
+
+    def __init__(self) -> None:
+        self.memory = bytearray(range(0x100))
+        self.watches: dict[int, tuple[int, int, str | None]] = {}
+        self.held: list[dict[str, Any]] = []
+        self.hold = 0
+        """Number of messages to collect before answering them, in reverse order"""
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        while line := await reader.readline():
+            if line == b"VERSION\n":
+                writer.write(b"2\n")
+                continue
+            message = json.loads(line)
+            self.held.append({"id": message["id"], "responses": [self.process(req) for req in message["requests"]]})
+            if len(self.held) >= self.hold:
+                for response in reversed(self.held):
+                    writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                self.held.clear()
+
+    def process(self, req: dict[str, Any]) -> dict[str, Any]:
+        if req["type"] == "PING":
+            return {"type": "PONG"}
+        if req["type"] == "READ":
+            data = self.memory[req["address"]:req["address"] + req["size"]]
+            return {"type": "READ_RESPONSE", "value": base64.b64encode(data).decode("ascii")}
+        if req["type"] == "WRITE":
+            data = base64.b64decode(req["value"])
+            self.memory[req["address"]:req["address"] + len(data)] = data
+            return {"type": "WRITE_RESPONSE"}
+        if req["type"] == "WATCH":
+            self.watches[req["id"]] = (req["address"], req["size"], None)
+            return {"type": "WATCH_RESPONSE"}
+        if req["type"] == "UNWATCH":
+            del self.watches[req["id"]]
+            return {"type": "UNWATCH_RESPONSE"}
+        return {"type": "ERROR", "err": f"Unknown command: {req['type']}"}
+
+    def end_frame(self) -> None:
+        """Sends the watched ranges that changed, like the connector does at the end of each frame"""
+        assert self.writer is not None
+        updates = []
+        for watch_id, (address, size, value) in self.watches.items():
+            data = base64.b64encode(self.memory[address:address + size]).decode("ascii")
+            if data != value:
+                self.watches[watch_id] = (address, size, data)
+                updates.append({"id": watch_id, "value": data})
+        if updates:
+            self.writer.write(json.dumps({"watches": updates}).encode("utf-8") + b"\n")
+
+
+class TestBizHawkConnector(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.connector = FakeConnector()
+        port = await self.connector.start()
+        self.ctx = BizHawkContext()
+        self.ctx._start_receiving(await asyncio.open_connection("127.0.0.1", port))
+        self.ctx.connection_status = ConnectionStatus.TENTATIVE
+
+    async def asyncTearDown(self) -> None:
+        disconnect(self.ctx)
+        self.connector.server.close()
+        await self.connector.server.wait_closed()
+
+    async def test_pipelined_requests(self) -> None:
+        """Tests that several requests can wait for their responses at once, and get the right ones back"""
+        self.assertEqual(await get_script_version(self.ctx), 2)
+        self.assertEqual(self.ctx.connection_status, ConnectionStatus.CONNECTED)
+
+        self.connector.hold = 3
+        results = await asyncio.gather(*(read(self.ctx, [(address, 4, "RAM")]) for address in (0, 4, 8)))
+        self.assertEqual(results, [[bytes(range(0, 4))], [bytes(range(4, 8))], [bytes(range(8, 12))]])
+
+    async def test_watch(self) -> None:
+        """Tests that watched memory is only reported when it changed"""
+        watch_id, other_watch_id = await watch(self.ctx, [(0x10, 4, "RAM"), (0x20, 1, "RAM")])
+        self.assertEqual(get_watch_updates(self.ctx, [watch_id]), {})
+
+        self.connector.end_frame()
+        await ping(self.ctx)
+        self.assertEqual(get_watch_updates(self.ctx, [watch_id]), {watch_id: bytes(range(0x10, 0x14))})
+
+        self.connector.end_frame()
+        await ping(self.ctx)
+        self.assertEqual(get_watch_updates(self.ctx, [watch_id]), {})
+
+        await write(self.ctx, [(0x12, [0xFF], "RAM")])
+        self.connector.end_frame()
+        await ping(self.ctx)
+        self.assertEqual(get_watch_updates(self.ctx, [watch_id]), {watch_id: b"\x10\x11\xFF\x13"})
+        # the other watch's update is kept for whoever asks for it
+        self.assertEqual(get_watch_updates(self.ctx, [other_watch_id]), {other_watch_id: bytes([0x20])})
+        self.assertEqual(self.ctx.watches[watch_id], b"\x10\x11\xFF\x13")
+
+        await unwatch(self.ctx, [watch_id, other_watch_id])
+        self.assertEqual(self.connector.watches, {})
+        self.assertNotIn(watch_id, self.ctx.watches)
+
+    async def test_connection_closed(self) -> None:
+        """Tests that requests waiting for a response fail once the connector closes the connection"""
+        await watch(self.ctx, [(0, 1, "RAM")])
+        self.connector.hold = 2
+        request = asyncio.create_task(ping(self.ctx))
+        await asyncio.sleep(0.1)
+        assert self.connector.writer is not None
+        self.connector.writer.close()
+
+        with self.assertRaises(RequestFailedError):
+            await request
+        self.assertEqual(self.ctx.connection_status, ConnectionStatus.NOT_CONNECTED)
+        self.assertEqual(self.ctx.watches, {})
+
+    async def test_receive_failure(self) -> None:
+        """Tests that requests waiting for a response fail right away if reading from the connector fails"""
+        self.connector.hold = 2
+        request = asyncio.create_task(ping(self.ctx))
+        await asyncio.sleep(0.1)
+        assert self.connector.writer is not None
+        self.connector.writer.write(b"x" * 0x20000 + b"\n")  # longer than the stream reader's limit
+
+        with self.assertRaises(RequestFailedError):
+            await asyncio.wait_for(request, timeout=1)
+        self.assertEqual(self.ctx.connection_status, ConnectionStatus.NOT_CONNECTED)
@@ -1,6 +1,8 @@
 # Tests for Generate.py (ArchipelagoGenerate.exe)
 
+import concurrent.futures
 import unittest
+import unittest.mock
 import os
 import os.path
 import sys
@@ -137,3 +139,44 @@ class TestGenerateWeights(TestGenerateMain):
                     result, getattr(namespace, option_name)[player].value,
                     "Generated results from weights file did not match expected value."
                 )
+
+
+class TestGenerateSweepExecutor(unittest.TestCase):
+    def test_shutdown_on_failure(self):
+        """Tests that the sweep executor is shut down when generation raises."""
+        from settings import get_settings
+        with unittest.mock.patch.object(get_settings().generator, "sweep_threads", 2), \
+                unittest.mock.patch.object(Main, "_generate", side_effect=RuntimeError), \
+                unittest.mock.patch.object(concurrent.futures.ThreadPoolExecutor, "shutdown") as shutdown:
+            with self.assertRaises(RuntimeError):
+                Main.main(None)
+        shutdown.assert_called_once()
+
+    def test_profile_on_failure(self):
+        """Tests that the generation profile is written when generation raises."""
+        from settings import get_settings
+
+        def fail(args, seed, baked_server_options, sweep_executor, profiler):
+            profiler.report_path = os.path.join(temp_dir, "profile.json")
+            raise RuntimeError
+
+        with TemporaryDirectory() as temp_dir, \
+                unittest.mock.patch.object(get_settings().generator, "profile_generation", True), \
+                unittest.mock.patch.object(Main, "_generate", side_effect=fail):
+            with self.assertRaises(RuntimeError):
+                Main.main(None)
+            self.assertTrue(os.path.exists(os.path.join(temp_dir, "profile.json")))
+
+    def test_shutdown_before_fork(self):
+        """Tests that the sweep threads are stopped before output processes are forked."""
+        sweep_executor = concurrent.futures.ThreadPoolExecutor(1)
+        multiworld = unittest.mock.Mock(sweep_executor=sweep_executor)
+
+        def start_pool(*args, **kwargs):
+            self.assertIsNone(multiworld.sweep_executor)
+            self.assertTrue(sweep_executor._shutdown)
+            raise RuntimeError
+
+        with unittest.mock.patch.object(concurrent.futures, "ProcessPoolExecutor", side_effect=start_pool):
+            with self.assertRaises(RuntimeError), Main._start_output_processes(multiworld, [1], 2, ""):
+                pass
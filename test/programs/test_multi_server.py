@@ -1,5 +1,12 @@
+import asyncio
+import concurrent.futures
+import os
 import unittest
-from MultiServer import Context, ServerCommandProcessor
+import unittest.mock
+from tempfile import TemporaryDirectory
+from MultiServer import Client, Context, MetricsServer, ServerCommandProcessor, journaled_save_keys, \
+    process_client_cmd, send_items_to, send_new_items
+from NetUtils import ClientStatus, Hint, HintStatus, NetworkItem
 
 
 class TestResolvePlayerName(unittest.TestCase):
@@ -38,3 +45,222 @@ class TestResolvePlayerName(unittest.TestCase):
         assert p.resolve_player("ABC") == (1, 2, "abc"), "case insensitive resolves when 1 match"
         assert p.resolve_player("abcd") == (1, 3, "abCD"), "case insensitive resolves when 1 match"
         assert not p.resolve_player("aB"), "partial name shouldn't resolve to player"
+
+
+class TestHintIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        with unittest.mock.patch.object(Context, "_load_game_data"):  # game data is not needed for hints
+            self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.hint = Hint(2, 1, 10, 100, False, status=HintStatus.HINT_PRIORITY)
+        self.other_hint = Hint(1, 2, 20, 200, False, status=HintStatus.HINT_PRIORITY)
+        for slot in (1, 2):
+            self.ctx.hints[0, slot] |= {self.hint, self.other_hint}
+            self.ctx.index_hints(0, slot, self.ctx.hints[0, slot])
+
+    def test_get_hint(self) -> None:
+        self.assertIs(self.ctx.get_hint(0, 1, 10), self.hint)
+        self.assertIs(self.ctx.get_hint(0, 2, 20), self.other_hint)
+        self.assertIsNone(self.ctx.get_hint(0, 2, 10))
+        self.assertIsNone(self.ctx.get_hint(1, 1, 10))
+
+    def test_recheck_location(self) -> None:
+        self.ctx.location_checks[0, 1] |= {10, 11}
+        changed = set()
+        self.ctx.recheck_location_hints(0, 1, {10, 11}, changed)
+        found_hint = self.hint._replace(found=True, status=HintStatus.HINT_FOUND)
+        self.assertEqual(changed, {(0, 1), (0, 2)})
+        self.assertEqual(self.ctx.hints[0, 1], {found_hint, self.other_hint})
+        self.assertEqual(self.ctx.hints[0, 2], {found_hint, self.other_hint})
+        self.assertEqual(self.ctx.get_hint(0, 1, 10), found_hint)
+
+        changed.clear()
+        self.ctx.recheck_location_hints(0, 1, {10}, changed)
+        self.assertFalse(changed, "an unchanged hint should not be reported")
+
+
+class TestSendNewItems(unittest.TestCase):
+    def setUp(self) -> None:
+        with unittest.mock.patch.object(Context, "_load_game_data"):  # game data is not needed for items
+            self.ctx = Context("", 0, "", "", 0, 0, False)
+        self.ctx.clients = {0: {1: [], 2: []}}
+        self.clients = []
+        for slot, items_handling in ((1, 0b011), (1, 0b011), (1, 0b001), (2, 0b111)):
+            client = Client(None, self.ctx)
+            client.team, client.slot, client.items_handling = 0, slot, items_handling
+            self.ctx.clients[0][slot].append(client)
+            self.clients.append(client)
+
+    def test_only_pending_slots(self) -> None:
+        item = NetworkItem(1, 10, 2)
+        with unittest.mock.patch.object(self.ctx, "broadcast") as broadcast:
+            send_items_to(self.ctx, 0, 1, item)
+            send_new_items(self.ctx)
+            send_new_items(self.ctx)
+        self.assertEqual(self.ctx.pending_item_slots, set())
+        # the two clients with the same items handling share a message, the slot 2 client is not visited
+        self.assertEqual(broadcast.call_args_list, [
+            unittest.mock.call(self.clients[:2], [{"cmd": "ReceivedItems", "index": 0, "items": [item]}]),
+            unittest.mock.call(self.clients[2:3], [{"cmd": "ReceivedItems", "index": 0, "items": [item]}]),
+        ])
+        self.assertEqual([client.send_index for client in self.clients], [1, 1, 1, 0])
+
+
+class TestSaveJournal(unittest.TestCase):
+    def setUp(self) -> None:
+        with unittest.mock.patch.object(Context, "_load_game_data"):  # game data is not needed for saves
+            self.ctx = Context("", 0, "", "", 0, 0, False)
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.ctx.save_filename = os.path.join(temp_dir.name, "test.apsave")
+        self.ctx.received_items[0, 1, True] = [NetworkItem(1, 10, 2)]
+        self.ctx.location_checks[0, 1] = {10}
+        self.ctx.write_save()
+
+    def change(self) -> None:
+        self.ctx.location_checks[0, 1].add(11)
+        self.ctx.unsaved_location_checks[0, 1].add(11)
+        self.ctx.received_items[0, 1, True].append(NetworkItem(2, 11, 2))
+        self.ctx.stored_data["key"] = 1
+        self.ctx.unsaved_stored_data.add("key")
+        self.ctx.hints[0, 1].add(Hint(1, 2, 20, 200, False))
+        self.ctx.unsaved_hints.add((0, 1))
+        self.ctx.hints_used[0, 1] = 1
+
+    def assert_restored(self, savedata: dict) -> None:
+        expected = self.ctx.get_save()
+        for key in ("location_checks", "received_items", "stored_data", "hints", "hints_used"):
+            self.assertEqual(savedata[key], expected[key], key)
+
+    def test_replay(self) -> None:
+        self.change()
+        self.ctx.write_save()
+        self.assertEqual(self.ctx.journal_entries, 1)
+        self.assert_restored(self.ctx._read_save())
+
+    def test_journal_entry_state(self) -> None:
+        """Journal entries include the unjournaled part of the save whole, without copying all of it."""
+        self.change()
+        with unittest.mock.patch.object(Context, "get_save") as get_save:
+            self.ctx.write_save()
+        get_save.assert_not_called()
+        state_keys = set(self.ctx._get_save_state())
+        self.assertTrue(state_keys.isdisjoint(journaled_save_keys))
+        self.assertEqual(state_keys | journaled_save_keys, set(self.ctx.get_save()))
+        self.assert_restored(self.ctx._read_save())
+
+    def test_compaction(self) -> None:
+        self.change()
+        self.ctx.write_save(compact=True)
+        self.assertEqual(self.ctx.journal_entries, 0)
+        with open(self.ctx.journal_filename, "rb") as f:
+            self.assertEqual(len(f.read()), 8, "compaction should leave an empty journal")
+        self.assert_restored(self.ctx._read_save())
+
+    def test_partial_entry(self) -> None:
+        self.change()
+        self.ctx.write_save()
+        with open(self.ctx.journal_filename, "r+b") as f:
+            f.truncate(os.path.getsize(self.ctx.journal_filename) - 1)
+        self.assertEqual(self.ctx._read_save()["location_checks"], {(0, 1): {10}})
+
+    def test_stale_journal(self) -> None:
+        """A journal that was not reset because of a crash during compaction has to be ignored."""
+        self.change()
+        self.ctx.write_save()
+        with open(self.ctx.journal_filename, "rb") as f:
+            journal = f.read()
+        self.ctx.hints[0, 1].clear()
+        self.ctx.write_save(compact=True)
+        with open(self.ctx.journal_filename, "wb") as f:
+            f.write(journal)
+        self.assertEqual(self.ctx._read_save()["hints"][0, 1], set())
+
+    def test_background_save(self) -> None:
+        async def save() -> None:
+            self.change()
+            self.assertTrue(self.ctx.save_in_background())
+            self.ctx.location_checks[0, 1].add(12)  # changes after the snapshot was taken belong to the next save
+            self.ctx.unsaved_location_checks[0, 1].add(12)
+            self.assertIsNotNone(self.ctx.pending_save)
+            self.ctx.pending_save.result()
+            self.assertEqual(self.ctx._read_save()["location_checks"], {(0, 1): {10, 11}})
+            self.assertEqual(self.ctx.save_metrics.saves, 1, "the result is handed back to the event loop")
+            self.assertTrue(await self.ctx._save_async())
+            self.assertEqual(self.ctx._read_save()["location_checks"], {(0, 1): {10, 11, 12}})
+            self.assertEqual(self.ctx.save_metrics.saves, 3)
+            self.assertIsNotNone(self.ctx.journal_entries, "successful saves are recorded for the next one")
+
+        asyncio.run(save())
+
+    def test_background_save_backpressure(self) -> None:
+        self.ctx.pending_save = concurrent.futures.Future()
+        self.ctx.save_dirty = True
+        self.assertFalse(self.ctx.save_in_background())
+        self.assertTrue(self.ctx.save_dirty, "skipped save has to be retried")
+        self.assertEqual(self.ctx.save_metrics.skipped, 1)
+
+
+class TestMetricsServer(unittest.IsolatedAsyncioTestCase):
+    async def test_metrics(self) -> None:
+        with unittest.mock.patch.object(Context, "_load_game_data"):
+            ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.stored_data["key"] = 1
+        ctx.network_metrics.commands["Set"] += 2
+        ctx.encode_msgs([{"cmd": "Bounced"}])
+        metrics_server = MetricsServer(lambda: {'a "room"': ctx})
+        await metrics_server.start("127.0.0.1", 0)
+        self.addCleanup(metrics_server.close)
+        port = metrics_server.server.sockets[0].getsockname()[1]
+
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        response = (await reader.read()).decode()
+        writer.close()
+        self.assertTrue(response.startswith("HTTP/1.1 200 OK"))
+        self.assertIn('\narchipelago_datastore_keys{room="a \\"room\\""} 1\n', response)
+        self.assertIn('\narchipelago_client_commands_total{room="a \\"room\\"",cmd="Set"} 2\n', response)
+        self.assertIn('\narchipelago_encode_seconds_count{room="a \\"room\\""} 1\n', response)
+        self.assertIn('\narchipelago_encode_seconds_bucket{room="a \\"room\\"",le="+Inf"} 1\n', response)
+        self.assertIn("\narchipelago_rooms 1\n", response)
+
+
+class TestTrackerFeed(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        with unittest.mock.patch.object(Context, "_load_game_data"):  # game data is not needed for the feed
+            self.ctx = Context("", 0, "", "secret", 0, 0, False)
+        self.ctx.player_names = {(0, 1): "Player1", (0, 2): "Player2"}
+        self.ctx.location_checks[0, 1] = {10}
+        self.client = Client(None, self.ctx)
+
+    async def subscribe(self, args: dict) -> list:
+        with unittest.mock.patch.object(self.ctx, "send_msgs", unittest.mock.AsyncMock()) as send_msgs:
+            await process_client_cmd(self.ctx, self.client, {"cmd": "TrackerFeed", **args})
+        (_, msgs), _ = send_msgs.call_args
+        return msgs
+
+    async def test_refused(self) -> None:
+        msgs = await self.subscribe({"password": "wrong"})
+        self.assertEqual(msgs[0]["cmd"], "InvalidPacket")
+        self.assertNotIn(self.client, self.ctx.tracker_feed_clients)
+
+    async def test_updates(self) -> None:
+        msgs = await self.subscribe({"password": "secret"})
+        self.assertEqual(msgs[0]["cmd"], "TrackerUpdate")
+        self.assertEqual(msgs[0]["player_checks_done"], [{"team": 0, "player": 1, "locations": [10]},
+                                                         {"team": 0, "player": 2, "locations": []}])
+
+        item = NetworkItem(1, 11, 2)
+        with unittest.mock.patch.object(self.ctx, "broadcast") as broadcast:
+            send_items_to(self.ctx, 0, 1, item)
+            self.ctx.client_game_state[0, 2] = ClientStatus.CLIENT_GOAL
+            self.ctx.on_client_status_change(0, 2)
+            await asyncio.sleep(0)
+        # both changes go out in one packet, to the subscribed client only
+        broadcast.assert_called_once()
+        (clients, (update,)), _ = broadcast.call_args
+        self.assertEqual(set(clients), {self.client})
+        self.assertEqual(update, {
+            "cmd": "TrackerUpdate",
+            "player_items_received": [{"team": 0, "player": 1, "items": [item]}],
+            "player_status": [{"team": 0, "player": 2, "status": ClientStatus.CLIENT_GOAL}],
+        })
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import unittest
+import unittest.mock
+from typing import Any, List
+
+from SNIClient import SNESState, SNIContext, snes_read, snes_read_ranges, snes_read_snapshot, snes_write
+from worlds.AutoSNIClient import SNES_READ_CHUNK_SIZE
+
+MEMORY = bytes(i % 251 for i in range(0x10000))
+
+
+class FakeSNI:
+    """Answers GetAddress requests from MEMORY, the way SNI does over its websocket."""
+    open = True
+    closed = False
+
+    def __init__(self, ctx: SNIContext) -> None:
+        self.ctx = ctx
+        self.requests: List[List[str]] = []
+        self.memory = bytearray(MEMORY)
+        self.multi_read = True
+        """whether to answer all ranges of a request, otherwise only the first one is answered"""
+
+    async def close(self) -> None:
+        self.open = False
+        self.closed = True
+
+    async def send(self, message: Any) -> None:
+        if isinstance(message, bytes):
+            return
+        request = json.loads(message)
+        if request["Opcode"] != "GetAddress":
+            return
+        operands = request["Operands"]
+        self.requests.append(operands)
+        if not self.multi_read:
+            operands = operands[:2]
+        for address, size in zip(operands[::2], operands[1::2]):
+            address, size = int(address, 16), int(size, 16)
+            self.ctx.snes_recv_queue.put_nowait(bytes(self.memory[address:address + size]))
+
+
+class TestSnesReadRanges(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.ctx = SNIContext("", "", "")
+        self.sni = FakeSNI(self.ctx)
+        self.ctx.snes_socket = self.sni  # type: ignore[assignment]
+        self.ctx.snes_state = SNESState.SNES_ATTACHED
+
+    async def test_merged_request(self) -> None:
+        """Tests that overlapping and adjacent ranges are read in one request and returned in the order asked for"""
+        ranges = [(0x120, 4), (0x100, 0x20), (0x110, 8), (0x300, 2)]
+        views = await snes_read_ranges(self.ctx, ranges)
+        assert views is not None
+        self.assertEqual([bytes(view) for view in views], [MEMORY[address:address + size] for address, size in ranges])
+        self.assertEqual(self.sni.requests, [["100", "24", "300", "2"]])
+
+    async def test_chunked_requests(self) -> None:
+        """Tests that big reads are split into requests of up to SNES_READ_CHUNK_SIZE bytes"""
+        size = SNES_READ_CHUNK_SIZE * 2 + 16
+        views = await snes_read_ranges(self.ctx, [(0x1000, size), (0x8000, 16)])
+        assert views is not None
+        self.assertEqual(bytes(views[0]), MEMORY[0x1000:0x1000 + size])
+        self.assertEqual(len(self.sni.requests), 3)
+        self.assertTrue(all(sum(int(size, 16) for size in request[1::2]) <= SNES_READ_CHUNK_SIZE
+                            for request in self.sni.requests))
+
+    async def test_single_operand_requests(self) -> None:
+        """Tests that each range gets its own request if multi-operand reads are not supported"""
+        self.ctx.snes_multi_read = False
+        views = await snes_read_ranges(self.ctx, [(0x10, 2), (0x20, 2)])
+        assert views is not None
+        self.assertEqual([bytes(view) for view in views], [MEMORY[0x10:0x12], MEMORY[0x20:0x22]])
+        self.assertEqual(self.sni.requests, [["10", "2"], ["20", "2"]])
+
+    async def test_multi_read_fallback(self) -> None:
+        """Tests that multi-operand reads are turned off once one fails"""
+        def time_out(awaitable: Any, timeout: float) -> None:  # instead of waiting for replies that don't come
+            awaitable.close()
+            raise asyncio.TimeoutError
+
+        self.sni.multi_read = False
+        with unittest.mock.patch("asyncio.wait_for", side_effect=time_out):
+            self.assertIsNone(await snes_read_ranges(self.ctx, [(0x10, 2), (0x20, 2)]))
+        self.assertFalse(self.ctx.snes_multi_read)
+
+        # reconnected
+        self.sni.open, self.sni.closed = True, False
+        self.ctx.snes_recv_queue = asyncio.Queue()
+        views = await snes_read_ranges(self.ctx, [(0x10, 2), (0x20, 2)])
+        assert views is not None
+        self.assertEqual([bytes(view) for view in views], [MEMORY[0x10:0x12], MEMORY[0x20:0x22]])
+
+    async def test_read_snapshot(self) -> None:
+        """Tests that snes_read reuses batched reads within snes_read_snapshot until the next write"""
+        await snes_read_ranges(self.ctx, [(0x100, 0x10)])
+        self.assertEqual(await snes_read(self.ctx, 0x104, 4), MEMORY[0x104:0x108])
+        self.assertEqual(len(self.sni.requests), 2)
+
+        with snes_read_snapshot(self.ctx):
+            await snes_read_ranges(self.ctx, [(0x100, 0x10)])
+            self.assertEqual(await snes_read(self.ctx, 0x104, 4), MEMORY[0x104:0x108])
+            self.assertEqual(len(self.sni.requests), 3)
+            self.assertTrue(await snes_write(self.ctx, [(0x104, b"\x00")]))
+            self.assertEqual(await snes_read(self.ctx, 0x104, 4), MEMORY[0x104:0x108])
+            self.assertEqual(len(self.sni.requests), 4)
+            await snes_read_ranges(self.ctx, [(0x100, 0x10)])
+        self.assertIsNone(self.ctx.snes_read_cache)
+        await snes_read(self.ctx, 0x104, 4)
+        self.assertEqual(len(self.sni.requests), 6)
+
+    async def test_read_snapshot_refresh(self) -> None:
+        """Tests that reading a range again within snes_read_snapshot answers snes_read with the newer data"""
+        with snes_read_snapshot(self.ctx):
+            await snes_read_ranges(self.ctx, [(0x100, 0x10)])
+            self.sni.memory[0x104] = 0xFF
+            self.assertEqual(await snes_read(self.ctx, 0x104, 1), MEMORY[0x104:0x105])
+            await snes_read_ranges(self.ctx, [(0x104, 1)])
+            self.assertEqual(await snes_read(self.ctx, 0x104, 1), b"\xff")
+            self.assertEqual(await snes_read(self.ctx, 0x105, 1), MEMORY[0x105:0x106])
+        self.assertEqual(len(self.sni.requests), 2)
@@ -0,0 +1,58 @@
+import json
+import os
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+
+from Utils import GenerationProfiler
+from test.general import TestWorld, setup_solo_multiworld
+from worlds.AutoWorld import call_all, call_single
+
+
+class GenerationProfilerTest(unittest.TestCase):
+    def test_nested_stages(self) -> None:
+        profiler = GenerationProfiler()
+        with profiler.stage("outer"):
+            profiler.count_state_copy()
+            with profiler.stage("inner"):
+                profiler.count_state_copy()
+                profiler.count_state_copy()
+        outer, inner = profiler.stages
+        self.assertEqual((outer["name"], outer["depth"], outer["state_copies"]), ("outer", 0, 3))
+        self.assertEqual((inner["name"], inner["depth"], inner["state_copies"]), ("inner", 1, 2))
+        self.assertGreaterEqual(outer["wall_time"], inner["wall_time"])
+
+    def test_world_calls(self) -> None:
+        multiworld = setup_solo_multiworld(TestWorld, ())
+        multiworld.profiler = profiler = GenerationProfiler()
+        call_all(multiworld, "pre_fill")
+        multiworld.state.copy()
+        stage, = profiler.stages
+        self.assertEqual(stage["name"], "pre_fill")
+        self.assertIn(1, stage["worlds"])
+        self.assertIn("pre_fill", profiler.worlds[1]["calls"])
+        self.assertEqual(profiler.state_copies, 1)
+
+        with TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "profile.json")
+            profiler.player_names, profiler.games = multiworld.player_name, multiworld.game
+            profiler.write(path)
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        self.assertEqual(data["worlds"]["1"]["game"], multiworld.game[1])
+        self.assertIn("peak_rss_growth", data["worlds"]["1"])
+        self.assertEqual(data["stages"][0]["name"], "pre_fill")
+
+    def test_threads(self) -> None:
+        """Tests that each thread runs its own stages, unless they are carried over to it"""
+        multiworld = setup_solo_multiworld(TestWorld, ())
+        multiworld.profiler = profiler = GenerationProfiler()
+        with profiler.stage("main"), ThreadPoolExecutor(1) as pool:
+            pool.submit(call_single, multiworld, "pre_fill", 1).result()
+            self.assertEqual(profiler.stages[0]["worlds"], {}, "calls of other threads were charged to this stage")
+            pool.submit(profiler.carry_stages(call_single), multiworld, "post_fill", 1).result()
+            pool.submit(multiworld.state.copy).result()
+        self.assertIn(1, profiler.stages[0]["worlds"])
+        self.assertEqual(profiler.stages[0]["state_copies"], 1)
+        self.assertEqual(profiler.thread_state_copies, 0)
+        self.assertEqual(set(profiler.worlds[1]["calls"]), {"pre_fill", "post_fill"})
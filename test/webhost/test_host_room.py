@@ -226,3 +226,50 @@ class TestHostFakeRoom(TestBase):
         for handler in handlers:
             if isinstance(handler, logging.FileHandler):
                 self.assertTrue(handler.stream is None or handler.stream.closed)
+
+    def test_load_room_save(self) -> None:
+        """Verify that the save journal of the multisave's generation is replayed on top of it."""
+        import pickle
+        import zlib
+        from pony.orm import db_session
+        from WebHostLib.models import Room, SaveJournalEntry, load_room_save
+
+        delta = {"location_checks": {(0, 1): {2}}, "received_items": {}, "hints": {}, "stored_data": {"key": 1},
+                 "state": {}}
+        with db_session:
+            room: Room = Room.get(id=self.room_id)
+            self.assertEqual(load_room_save(room), {})
+            room.multisave = pickle.dumps({"location_checks": {(0, 1): {1}}, "journal_generation": 2})
+            stale_delta = {**delta, "location_checks": {(0, 1): {3}}}
+            SaveJournalEntry(room=room, generation=1, data=zlib.compress(pickle.dumps(stale_delta)))
+            SaveJournalEntry(room=room, generation=2, data=zlib.compress(pickle.dumps(delta)))
+            savedata = load_room_save(room)
+        self.assertEqual(savedata["location_checks"], {(0, 1): {1, 2}})
+        self.assertEqual(savedata["stored_data"], {"key": 1})
+
+    def test_take_db_commands(self) -> None:
+        """Verify that commands of all given rooms are taken in order, and those of other rooms are left alone."""
+        from pony.orm import db_session, select
+        from WebHostLib.customserver import return_db_commands, take_db_commands
+        from WebHostLib.models import Command, Room
+
+        with db_session:
+            room: Room = Room.get(id=self.room_id)
+            other_room = Room(seed=room.seed, owner=room.owner, tracker=uuid4())
+            other_room_id = other_room.id
+            Command(room=room, commandtext="/first")
+            Command(room=other_room, commandtext="/other")
+            Command(room=room, commandtext="/second")
+        self.assertEqual(take_db_commands([self.room_id], lambda room_id: False), [],
+                         "rooms that stopped keep their commands")
+        self.assertEqual(take_db_commands([self.room_id], lambda room_id: True),
+                         [(self.room_id, "/first"), (self.room_id, "/second")])
+        with db_session:
+            self.assertFalse(select(command for command in Command
+                                    if command.room.id == self.room_id).exists())  # type: ignore
+            self.assertEqual([command.commandtext for command in Command.select()
+                              if command.room.id == other_room_id], ["/other"])
+
+        return_db_commands([(self.room_id, "/first")])
+        self.assertEqual(take_db_commands([self.room_id, other_room_id], lambda room_id: True),
+                         [(other_room_id, "/other"), (self.room_id, "/first")])
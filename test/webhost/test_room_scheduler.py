@@ -0,0 +1,146 @@
+import os
+import tempfile
+import unittest
+import uuid
+from typing import List, Optional, Set
+
+from WebHostLib import to_url
+from WebHostLib.autolauncher import HashRing, RoomScheduler, read_hoster_control
+from WebHostLib.customserver import HosterLoad
+
+
+class FakeHoster:
+    load: Optional[HosterLoad]
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.load = None
+        self.room_ids: Set[uuid.UUID] = set()
+        self.stopping: List[uuid.UUID] = []
+
+    def start_room(self, room_id: uuid.UUID) -> None:
+        self.room_ids.add(room_id)
+
+    def stop_room(self, room_id: uuid.UUID) -> None:
+        self.stopping.append(room_id)
+
+    def collect_shut_down(self) -> List[uuid.UUID]:
+        shut_down, self.stopping = self.stopping, []
+        self.room_ids.difference_update(shut_down)
+        return shut_down
+
+    def update_load(self) -> None:
+        pass
+
+
+class TestHashRing(unittest.TestCase):
+    def test_growing_moves_few_rooms(self) -> None:
+        """Verify that adding a hoster only moves rooms to the new hoster."""
+        room_ids = [uuid.UUID(int=i * 7919) for i in range(1000)]
+        before = HashRing(range(4))
+        after = HashRing(range(5))
+        moved = [room_id for room_id in room_ids if before.preference(room_id)[0] != after.preference(room_id)[0]]
+        self.assertTrue(all(after.preference(room_id)[0] == 4 for room_id in moved))
+        self.assertLess(len(moved), len(room_ids) / 3)
+        self.assertEqual(sorted(after.preference(room_ids[0])), [0, 1, 2, 3, 4])
+
+
+class TestRoomScheduler(unittest.TestCase):
+    def setUp(self) -> None:
+        self.hosters = [FakeHoster(f"MultiHoster{i}") for i in range(3)]
+        self.scheduler = RoomScheduler(self.hosters)  # type: ignore[arg-type]
+
+    def test_placement(self) -> None:
+        """Verify that rooms go to their preferred hoster, unless it is overloaded."""
+        room_id = uuid.uuid4()
+        preferred, second = self.scheduler.ring.preference(room_id)[:2]
+        self.hosters[preferred].load = HosterLoad(90., 1, 1, {})
+        self.scheduler.enqueue(room_id)
+        self.scheduler.enqueue(room_id)
+        self.scheduler.update()
+        self.assertEqual(self.scheduler.assignments, {room_id: second})
+        self.assertEqual(self.hosters[second].room_ids, {room_id})
+
+    def test_migrate(self) -> None:
+        """Verify that a moved room is started on the target once the source shut it down."""
+        room_id = uuid.uuid4()
+        self.scheduler.enqueue(room_id)
+        self.scheduler.update()
+        source = self.scheduler.assignments[room_id]
+        target = (source + 1) % len(self.hosters)
+        self.scheduler.migrate(room_id, target)
+        self.assertEqual(self.hosters[source].stopping, [room_id])
+        self.scheduler.update()
+        self.assertEqual(self.scheduler.assignments, {room_id: target})
+        self.assertEqual(self.hosters[target].room_ids, {room_id})
+        self.assertFalse(self.hosters[source].room_ids)
+
+    def test_late_migration(self) -> None:
+        """Verify that a room that shuts down after its move timed out is started again."""
+        room_id = uuid.uuid4()
+        self.scheduler.enqueue(room_id)
+        self.scheduler.update()
+        source = self.scheduler.assignments[room_id]
+        self.scheduler.migrate(room_id, (source + 1) % len(self.hosters))
+        stopping, self.hosters[source].stopping = self.hosters[source].stopping, []
+        self.scheduler.migrations[room_id] = self.scheduler.migrations[room_id][0], 0.
+        self.scheduler.update()
+        self.assertFalse(self.scheduler.migrations)
+        self.assertEqual(self.scheduler.assignments, {room_id: source})
+
+        self.hosters[source].stopping = stopping
+        self.scheduler.update()
+        self.assertIn(room_id, self.scheduler.assignments)
+        self.assertIn(room_id, self.hosters[self.scheduler.assignments[room_id]].room_ids)
+
+    def test_drain(self) -> None:
+        """Verify that draining moves all rooms off a hoster and keeps new rooms away from it."""
+        for _ in range(20):
+            self.scheduler.enqueue(uuid.uuid4())
+        self.scheduler.update()
+        self.scheduler.drain(0)
+        self.scheduler.update()
+        self.assertFalse(self.hosters[0].room_ids)
+        self.assertNotIn(0, self.scheduler.assignments.values())
+        self.assertEqual(len(self.scheduler.assignments), 20)
+
+    def test_rebalance(self) -> None:
+        """Verify that an overloaded hoster hands off the busiest room that does not overload the target."""
+        for _ in range(3):
+            self.scheduler.enqueue(uuid.uuid4())
+        self.scheduler.update()
+        for room_id in list(self.scheduler.assignments):
+            self.scheduler.assignments[room_id] = 0
+        big, medium, small = self.scheduler.assignments
+        self.hosters[0].load = HosterLoad(50., 100, 100, {big: 60, medium: 30, small: 10})
+        self.hosters[1].load = HosterLoad(5., 100, 0, {})
+        self.hosters[2].load = HosterLoad(5., 100, 10, {})
+        self.scheduler.rebalance()
+        self.assertEqual(self.hosters[0].stopping, [medium])
+        self.assertEqual(self.scheduler.migrations[medium][0], 1)
+
+    def test_control(self) -> None:
+        """Verify that the hoster control file drains hosters, moves rooms and lets removed hosters take rooms again."""
+        room_ids = [uuid.uuid4() for _ in range(20)]
+        for room_id in room_ids:
+            self.scheduler.enqueue(room_id)
+        self.scheduler.update()
+        moved = next(room_id for room_id in room_ids if self.scheduler.assignments[room_id] == 2)
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, "control.yaml")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"drain: [0, 5]\nmigrate:\n  {to_url(moved)}: 1\n")
+            drain, migrate = read_hoster_control(path)
+        self.assertEqual(drain, {0, 5})
+        self.assertEqual(migrate, {moved: 1})
+
+        with self.assertLogs(level="WARNING"):
+            self.scheduler.apply_control(drain, migrate)
+        self.scheduler.update()
+        self.assertFalse(self.hosters[0].room_ids)
+        self.assertEqual(self.scheduler.assignments[moved], 1)
+        self.assertEqual(self.scheduler.draining, {0})
+
+        self.scheduler.apply_control(set(), {})
+        self.assertFalse(self.scheduler.draining)
@@ -103,3 +103,60 @@ class TestTracker(TestBase):
                 self.assertEqual(response.status_code, 200)
             with self.client.open(url_for("api.tracker_slot_data", tracker=self.tracker_uuid)) as response:
                 self.assertEqual(response.status_code, 200)
+
+    def test_tracker_data_cache(self) -> None:
+        """Verify that tracker data is shared between requests and the save is reloaded once it changed."""
+        from pony.orm import db_session
+        from WebHostLib.models import Room
+        from WebHostLib.tracker import TrackerData
+
+        with db_session:
+            room = Room.get(id=self.room_id)
+            first = TrackerData(room)
+            second = TrackerData(room)
+            self.assertIs(first._multidata, second._multidata)
+            self.assertIs(first.item_id_to_name, second.item_id_to_name)
+            self.assertIs(first._multisave, second._multisave)
+            self.assertEqual(second.get_player_client_status(0, 1), 0)
+            game = next(iter(first.item_id_to_name))
+            self.assertEqual(first.item_id_to_name[game][-1000], "Unknown Item (ID: -1000)")
+            self.assertNotIn(-1000, second.item_id_to_name[game], "shared lookup tables must not change")
+
+            room.multisave = pickle.dumps({"client_game_state": {(0, 1): 30}})
+        with db_session:
+            third = TrackerData(Room.get(id=self.room_id))
+            self.assertIs(first._multidata, third._multidata)
+            self.assertEqual(third.get_player_client_status(0, 1), 30)
+
+    def test_tracker_data_cache_eviction(self) -> None:
+        """Verify that the least recently used entries are evicted once the cache exceeds its size."""
+        from WebHostLib.tracker import TrackerDataCache
+
+        tracker_data_cache = TrackerDataCache(10)
+        tracker_data_cache.set("a", 1, 4)
+        tracker_data_cache.set("b", 2, 4)
+        self.assertEqual(tracker_data_cache.get("a"), 1)
+        tracker_data_cache.set("c", 3, 4)
+        self.assertIsNone(tracker_data_cache.get("b"))
+        self.assertEqual((tracker_data_cache.get("a"), tracker_data_cache.get("c")), (1, 3))
+        self.assertEqual(tracker_data_cache.size, 8)
+        tracker_data_cache.set("d", 4, 11)
+        self.assertIsNone(tracker_data_cache.get("d"))
+        self.assertEqual(len(tracker_data_cache), 2)
+
+    def test_tracker_feed_address(self) -> None:
+        """Verify that the multiworld tracker links the tracker feed of the running room."""
+        from pony.orm import db_session
+        from WebHostLib.models import Room
+
+        with db_session:
+            Room.get(id=self.room_id).last_port = 38281
+        self.app.config["HOST_ADDRESS"] = "localhost"
+        self.addCleanup(self.app.config.__setitem__, "HOST_ADDRESS", "")
+        with self.app.test_request_context():
+            response = self.client.get(url_for("get_multiworld_tracker", tracker=self.tracker_uuid))
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(b'data-feed="ws://localhost:38281"', response.data)
+            response = self.client.get(url_for("get_multiworld_tracker", tracker=self.tracker_uuid),
+                                       base_url="https://localhost")
+            self.assertIn(b'data-feed="wss://localhost:38281"', response.data)
@@ -71,6 +71,9 @@ class AutoSNIClientRegister(abc.ABCMeta):
 
     @staticmethod
     async def get_handler(ctx: SNIContext) -> Optional[SNIClient]:
+        from .AutoWorld import AutoWorldRegister
+        # handlers are registered by their worlds, any of which could handle this rom
+        AutoWorldRegister.world_types.load_all()
         for _game, handler in AutoSNIClientRegister.game_handlers.items():
             try:
                 if await handler.validate_rom(ctx):
@@ -195,27 +198,9 @@ class SnesReader(Generic[_T_Enum]):
         returns `None` if reading fails,
         otherwise returns the data for the registered `Enum`
         """
-        from SNIClient import snes_read
-
-        reads: list[tuple[Read, bytes]] = []
-        for r in self._ranges:
-            if r.size < SNES_READ_CHUNK_SIZE:  # most common
-                response = await snes_read(ctx, r.address, r.size)
-                if response is None:
-                    return None
-                reads.append((r, response))
-            else:  # big read
-                # Problems were reported with big reads,
-                # so we chunk it into smaller pieces.
-                read_so_far = 0
-                collection: list[bytes] = []
-                while read_so_far < r.size:
-                    remaining_size = r.size - read_so_far
-                    chunk_size = min(SNES_READ_CHUNK_SIZE, remaining_size)
-                    response = await snes_read(ctx, r.address + read_so_far, chunk_size)
-                    if response is None:
-                        return None
-                    collection.append(response)
-                    read_so_far += chunk_size
-                reads.append((r, b"".join(collection)))
-        return SnesData(reads)
+        from SNIClient import snes_read_ranges
+
+        responses = await snes_read_ranges(ctx, [(r.address, r.size) for r in self._ranges])
+        if responses is None:
+            return None
+        return SnesData([(r, bytes(response)) for r, response in zip(self._ranges, responses)])
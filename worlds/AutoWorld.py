@@ -5,15 +5,15 @@ import logging
 import pathlib
 import sys
 import time
-from collections.abc import Callable, Iterable, Mapping
+from collections.abc import Callable, Iterable, Iterator, Mapping, MutableMapping
 from random import Random
-from typing import (Any, ClassVar, Dict, FrozenSet, List, Optional, Self, Set, TextIO, Tuple,
+from typing import (Any, ClassVar, Dict, FrozenSet, List, NamedTuple, Optional, Self, Set, TextIO, Tuple,
                     TYPE_CHECKING, Type, Union)
 
 from Options import item_and_loc_options, ItemsAccessibility, OptionGroup, PerGameCommonOptions
 from BaseClasses import CollectionState, Entrance
 from rule_builder.rules import CustomRuleRegister, Rule
-from Utils import Version
+from Utils import Version, get_peak_rss
 
 if TYPE_CHECKING:
     from BaseClasses import CollectionRule, Item, Location, MultiWorld, Region, Tutorial
@@ -27,8 +27,109 @@ class InvalidItemError(KeyError):
     pass
 
 
+class LazyWorld(NamedTuple):
+    """Stands in for a world type in AutoWorldRegister.world_types until its world source is imported."""
+    load: Callable[[], Any]
+    """imports the world source, which registers the actual world type"""
+    world_version: Version
+    manifest: Dict[str, Any]
+    settings_key: str
+    settings_name: Optional[str]
+    """module.Class path of the world type, if it defines a settings group"""
+    checksum: str
+    """checksum of the world's data package"""
+
+
+def get_settings_name(world_type: AutoWorldRegister) -> Optional[str]:
+    """Returns the module.Class path to import the world type from, if it defines a settings group."""
+    annotation = world_type.__annotations__.get("settings", None)
+    if annotation is None or annotation == "ClassVar[Optional['Group']]":
+        return None
+    return f"{world_type.__module__}.{world_type.__name__}"
+
+
+class LazyWorldTypes(MutableMapping[str, Type["World"]]):
+    """
+    World types by game, some of which may only be known from the world index so far.
+    Checking for or listing games does not import any world, looking up a world type imports it on demand.
+    """
+    _worlds: Dict[str, Union[Type[World], LazyWorld]]
+
+    def __init__(self) -> None:
+        self._worlds = {}
+
+    def __getitem__(self, game: str) -> Type[World]:
+        world = self._worlds[game]
+        if isinstance(world, LazyWorld):
+            world.load()
+            world = self._worlds.get(game, world)
+            if isinstance(world, LazyWorld):
+                # world failed to load, the world source logged why
+                del self._worlds[game]
+                raise KeyError(game)
+        return world
+
+    def __setitem__(self, game: str, world_type: Type[World]) -> None:
+        lazy_world = self._worlds.get(game)
+        if isinstance(lazy_world, LazyWorld):
+            world_type.world_version = lazy_world.world_version
+            world_type.manifest = lazy_world.manifest
+        self._worlds[game] = world_type
+
+    def __delitem__(self, game: str) -> None:
+        del self._worlds[game]
+
+    def __contains__(self, game: object) -> bool:
+        return game in self._worlds
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._worlds))
+
+    def __len__(self) -> int:
+        return len(self._worlds)
+
+    def items(self):  # type: ignore[override]
+        self.load_all()
+        return super().items()
+
+    def values(self):  # type: ignore[override]
+        self.load_all()
+        return super().values()
+
+    def copy(self) -> LazyWorldTypes:
+        """Returns a copy with all worlds imported, as worlds only register with AutoWorldRegister.world_types."""
+        world_types = LazyWorldTypes()
+        world_types._worlds.update(self.items())
+        return world_types
+
+    def add_lazy(self, game: str, lazy_world: LazyWorld) -> None:
+        self._worlds[game] = lazy_world
+
+    def get_lazy(self, game: str) -> Optional[LazyWorld]:
+        """Returns the index entry of a world that was not imported yet."""
+        world = self._worlds.get(game)
+        return world if isinstance(world, LazyWorld) else None
+
+    def load_all(self) -> None:
+        """Imports all worlds that were not imported yet."""
+        for game in self:
+            self.get(game)
+
+    def get_settings_names(self) -> Dict[str, str]:
+        """Returns the module.Class path of each world type defining a settings group, by settings_key."""
+        settings_names: Dict[str, str] = {}
+        for world in self._worlds.values():
+            if isinstance(world, LazyWorld):
+                settings_key, settings_name = world.settings_key, world.settings_name
+            else:
+                settings_key, settings_name = world.settings_key, get_settings_name(world)
+            if settings_name:
+                settings_names[settings_key] = settings_name
+        return settings_names
+
+
 class AutoWorldRegister(type):
-    world_types: Dict[str, Type[World]] = {}
+    world_types: LazyWorldTypes = LazyWorldTypes()
     __file__: str
     zip_path: Optional[str]
     settings_key: str
@@ -59,12 +160,19 @@ class AutoWorldRegister(type):
             # build reverse lookups
             dct["item_id_to_name"] = {code: name for name, code in dct["item_name_to_id"].items()}
             dct["location_id_to_name"] = {code: name for name, code in dct["location_name_to_id"].items()}
+            dct["item_name_to_index"] = {name: index for index, name in
+                                         enumerate(sorted(dct["item_name_to_id"], key=dct["item_name_to_id"].get))}
 
             # build rest
             dct["item_names"] = frozenset(dct["item_name_to_id"])
             dct["item_name_groups"] = {group_name: frozenset(group_set) for group_name, group_set
                                     in dct.get("item_name_groups", {}).items()}
             dct["item_name_groups"]["Everything"] = dct["item_names"]
+            dct["item_name_group_indices"] = {
+                group_name: tuple(dct["item_name_to_index"][item_name] for item_name in group_set)
+                for group_name, group_set in dct["item_name_groups"].items()
+                if all(item_name in dct["item_name_to_index"] for item_name in group_set)
+            }
 
             dct["location_names"] = frozenset(dct["location_name_to_id"])
             dct["location_name_groups"] = {group_name: frozenset(group_set) for group_name, group_set
@@ -89,7 +197,10 @@ class AutoWorldRegister(type):
         new_class = super().__new__(mcs, name, bases, dct)
         new_class.__file__ = sys.modules[new_class.__module__].__file__
         if "game" in dct:
-            if dct["game"] in AutoWorldRegister.world_types:
+            world_types = AutoWorldRegister.world_types
+            # importing an indexed world replaces its index entry
+            if dct["game"] in world_types and not (isinstance(world_types, LazyWorldTypes)
+                                                  and world_types.get_lazy(dct["game"])):
                 raise RuntimeError(f"""Game {dct["game"]} already registered in 
                 {AutoWorldRegister.world_types[dct["game"]].__file__} when attempting to register from
                 {new_class.__file__}.""")
@@ -113,6 +224,8 @@ class AutoLogicRegister(type):
                 CollectionState.additional_copy_functions.append(function)
             elif item_name == "init_mixin":
                 CollectionState.additional_init_functions.append(function)
+            elif item_name == "own_mixin":
+                CollectionState.additional_own_functions.append(function)
             elif not item_name.startswith("__"):
                 if hasattr(CollectionState, item_name):
                     raise Exception(f"Name conflict on Logic Mixin {name} trying to overwrite {item_name}")
@@ -165,9 +278,17 @@ class WebWorldRegister(type):
 
 def _timed_call(method: Callable[..., Any], *args: Any,
                 multiworld: Optional["MultiWorld"] = None, player: Optional[int] = None) -> Any:
+    profiler = multiworld.profiler if multiworld else None
+    if profiler:
+        cpu_start = time.thread_time()
+        state_copies = profiler.thread_state_copies
+        peak_rss = get_peak_rss()
     start = time.perf_counter()
     ret = method(*args)
     taken = time.perf_counter() - start
+    if profiler and player:
+        profiler.record_world_call(player, method.__name__, taken, time.thread_time() - cpu_start,
+                                   profiler.thread_state_copies - state_copies, peak_rss)
     if taken > 1.0:
         if player and multiworld:
             perf_logger.info(f"Took {taken:.4f} seconds in {method.__qualname__} for player {player}, "
@@ -198,20 +319,21 @@ def call_single(multiworld: "MultiWorld", method_name: str, player: int, *args:
 
 
 def call_all(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
-    world_types: Set[AutoWorldRegister] = set()
-    for player in multiworld.player_ids:
-        prev_item_count = len(multiworld.itempool)
-        world_types.add(multiworld.worlds[player].__class__)
-        call_single(multiworld, method_name, player, *args)
-        if __debug__:
-            new_items = multiworld.itempool[prev_item_count:]
-            for i, item in enumerate(new_items):
-                for other in new_items[i+1:]:
-                    assert item is not other, (
-                        f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
-                        f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
-
-    call_stage(multiworld, method_name, *args)
+    with multiworld.profile_stage(method_name):
+        world_types: Set[AutoWorldRegister] = set()
+        for player in multiworld.player_ids:
+            prev_item_count = len(multiworld.itempool)
+            world_types.add(multiworld.worlds[player].__class__)
+            call_single(multiworld, method_name, player, *args)
+            if __debug__:
+                new_items = multiworld.itempool[prev_item_count:]
+                for i, item in enumerate(new_items):
+                    for other in new_items[i+1:]:
+                        assert item is not other, (
+                            f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
+                            f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
+
+        call_stage(multiworld, method_name, *args)
 
 
 def call_stage(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
@@ -324,6 +446,25 @@ class World(metaclass=AutoWorldRegister):
     If False, everything is rechecked at every step, which is slower computationally, 
     but may be desirable in complex/dynamic worlds."""
 
+    compact_item_counts: ClassVar[bool] = False
+    """If True, this world's items are counted in an ItemCounts array indexed by item_name_to_index instead of a Counter
+    in CollectionState.prog_items. Smaller and faster to copy when most of the world's items are progression.
+    CollectionState's item helpers read it by index, direct lookups by name go through ItemCounts.__getitem__."""
+
+    incremental_reachability: ClassVar[bool] = False
+    """If True, blocked entrances are only rechecked when an item returned by get_entrance_item_dependencies changes in
+    state. Entrances without known dependencies are still rechecked on every region accessibility update."""
+
+    thread_safe_rules: ClassVar[bool] = False
+    """If True, this world's access rules only read the state, and the world's locations may be checked on several
+    threads at once when sweep_threads is set. Rules that cache anything on the state or the world must leave this
+    False."""
+
+    output_in_process: ClassVar[bool] = False
+    """If True, generate_output may be run in a forked copy of the generator process when output_processes is set.
+    Only enable this if generate_output does not change anything that is used afterwards, such as in fill_slot_data or
+    modify_multidata, as those changes are lost when the process exits."""
+
     multiworld: "MultiWorld"
     """autoset on creation. The MultiWorld object for the currently generating multiworld."""
     player: int
@@ -333,6 +474,10 @@ class World(metaclass=AutoWorldRegister):
     """automatically generated reverse lookup of item id to name"""
     location_id_to_name: ClassVar[Dict[int, str]]
     """automatically generated reverse lookup of location id to name"""
+    item_name_to_index: ClassVar[Dict[str, int]]
+    """automatically generated dense index of item names, ordered by item id"""
+    item_name_group_indices: ClassVar[Dict[str, Tuple[int, ...]]]
+    """automatically generated item_name_to_index indices of the items of each item name group"""
 
     item_names: ClassVar[Set[str]]
     """set of all potential item names"""
@@ -580,6 +725,13 @@ class World(metaclass=AutoWorldRegister):
         """Called when a region is newly reachable by the state."""
         pass
 
+    def get_entrance_item_dependencies(self, entrance: Entrance) -> Optional[FrozenSet[str]]:
+        """
+        Returns the names of all items the access rule of an entrance of this world depends on, or None if the rule can
+        depend on anything else, such as regions or other players' items. Only used if incremental_reachability is True.
+        """
+        return None
+
     # following methods should not need to be overridden.
     def create_filler(self) -> "Item":
         return self.create_item(self.get_filler_item_name())
@@ -689,6 +841,9 @@ class World(metaclass=AutoWorldRegister):
 
 # any methods attached to this can be used as part of CollectionState,
 # please use a prefix as all of them get clobbered together
+# init_mixin, copy_mixin and own_mixin are called when a state is created, copied, or when a player's containers stop
+# being shared after CollectionState.copy(copy_on_write=True). Per-player data that only changes on collect and remove
+# can be shared in copy_mixin for the players in new_state.shared_players and copied in own_mixin.
 class LogicMixin(metaclass=AutoLogicRegister):
     pass
 
@@ -61,6 +61,9 @@ class AutoPatchRegister(abc.ABCMeta):
 
     @staticmethod
     def get_handler(file: str) -> Optional[AutoPatchRegister]:
+        from .AutoWorld import AutoWorldRegister
+        # any world could provide the handler for this file ending
+        AutoWorldRegister.world_types.load_all()
         _, suffix = os.path.splitext(file)
         return AutoPatchRegister.file_endings.get(suffix, None)
 
@@ -80,10 +83,13 @@ class AutoPatchExtensionRegister(abc.ABCMeta):
     def get_handler(game: Optional[str]) -> Union[AutoPatchExtensionRegister, List[AutoPatchExtensionRegister]]:
         if not game:
             return APPatchExtension
+        from .AutoWorld import AutoWorldRegister
+        AutoWorldRegister.world_types.get(game)  # import the world providing the extension
         handler = AutoPatchExtensionRegister.extension_types.get(game, APPatchExtension)
         if handler.required_extensions:
             handlers = [handler]
             for required in handler.required_extensions:
+                AutoWorldRegister.world_types.get(required)
                 ext = AutoPatchExtensionRegister.extension_types.get(required)
                 if not ext:
                     raise NotImplementedError(f"No handler for {required}.")
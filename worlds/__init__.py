@@ -1,7 +1,9 @@
+import hashlib
 import importlib
 import importlib.abc
 import importlib.machinery
 import logging
+import mmap
 import os
 import sys
 import zipimport
@@ -10,11 +12,16 @@ import dataclasses
 import json
 from pathlib import Path
 from types import ModuleType
-from typing import List, Sequence
+from typing import AbstractSet, Any, List, Mapping, NamedTuple, Optional, Sequence, TYPE_CHECKING, cast
 from zipfile import ZipFile, BadZipFile
 
-from NetUtils import DataPackage
-from Utils import local_path, user_path, Version, version_tuple, tuplize_version, messagebox
+from NetUtils import (SHARED_DATA_PACKAGE_VERSION, DataPackage, GamesPackage, SharedDataPackage,
+                      encode_shared_data_package)
+from Utils import (__version__, cache_argsless, cache_path, local_path, user_path, Version, VersionException,
+                   version_tuple, tuplize_version, messagebox)
+
+if TYPE_CHECKING:
+    from .Files import APWorldContainer
 
 local_folder = os.path.dirname(__file__)
 user_folder = user_path("worlds") if user_path() != local_path() else user_path("custom_worlds")
@@ -30,6 +37,9 @@ __all__ = [
     "local_folder",
     "user_folder",
     "failed_world_loads",
+    "get_game_data_package",
+    "get_game_checksum",
+    "get_game_static_data",
 ]
 
 
@@ -43,6 +53,9 @@ class WorldSource:
     relative: bool = True  # relative to regular world import folder
     time_taken: float = -1.0
     version: Version = Version(0, 0, 0)
+    games: List[str] = dataclasses.field(default_factory=list, compare=False)
+    """games registered while loading this world source"""
+    failed: bool = dataclasses.field(default=False, compare=False)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.path}, is_zip={self.is_zip}, relative={self.relative})"
@@ -53,11 +66,29 @@ class WorldSource:
             return os.path.join(local_folder, self.path)
         return self.path
 
+    @property
+    def signature(self) -> str:
+        """Changes whenever a file of this world source is added, removed or modified."""
+        if self.is_zip:
+            stat = os.stat(self.resolved_path)
+            return f"{stat.st_mtime_ns}:{stat.st_size}"
+        latest = 0
+        count = 0
+        for dirpath, dirnames, filenames in os.walk(self.resolved_path):
+            dirnames[:] = [dirname for dirname in dirnames if dirname != "__pycache__"]
+            latest = max(latest, os.stat(dirpath).st_mtime_ns)
+            for filename in filenames:
+                latest = max(latest, os.stat(os.path.join(dirpath, filename)).st_mtime_ns)
+            count += len(filenames)
+        return f"{latest}:{count}"
+
     def load(self) -> bool:
+        known_games = set(AutoWorldRegister.world_types)
         try:
             start = time.perf_counter()
             importlib.import_module(f".{Path(self.path).stem}", "worlds")
             self.time_taken = time.perf_counter()-start
+            self.games = [game for game in AutoWorldRegister.world_types if game not in known_games]
             return True
 
         except Exception:
@@ -71,6 +102,7 @@ class WorldSource:
             reason = file_like.read()
             logging.exception(reason)
             failed_world_loads[os.path.basename(self.path).rsplit(".", 1)[0]] = reason
+            self.failed = True
             return False
 
 
@@ -92,131 +124,325 @@ for folder in (folder for folder in (user_folder, local_folder) if folder):
             elif entry.is_file() and entry.name.endswith(".apworld"):
                 world_sources.append(WorldSource(file_name, is_zip=True, relative=relative))
 
-# import all submodules to trigger AutoWorldRegister
 world_sources.sort()
-apworlds: list[WorldSource] = []
-for world_source in world_sources:
-    # load all loose files first:
-    if world_source.is_zip:
-        apworlds.append(world_source)
-    else:
-        world_source.load()
-
-from .AutoWorld import AutoWorldRegister
-
-for world_source in world_sources:
-    if not world_source.is_zip:
-        # look for manifest
-        manifest = {}
-        for dirpath, dirnames, filenames in os.walk(world_source.resolved_path):
-            for file in filenames:
-                if file.endswith("archipelago.json"):
-                    with open(os.path.join(dirpath, file), mode="r", encoding="utf-8") as manifest_file:
-                        manifest = json.load(manifest_file)
-                    break
-            if manifest:
+
+from .AutoWorld import AutoWorldRegister, LazyWorld, get_settings_name
+
+apworld_module_paths: dict[str, str] = {}
+"""apworld file of each world module that can be imported from one"""
+
+
+class APWorldModuleFinder(importlib.abc.MetaPathFinder):
+    def find_spec(
+            self, fullname: str, _path: Sequence[str] | None, _target: ModuleType = None
+    ) -> importlib.machinery.ModuleSpec | None:
+        if fullname in apworld_module_paths:
+            return zipimport.zipimporter(apworld_module_paths[fullname]).find_spec(fullname)
+        return None
+
+
+if any(world_source.is_zip for world_source in world_sources):
+    sys.meta_path.insert(0, APWorldModuleFinder())
+
+
+def apply_manifest(world_source: WorldSource) -> None:
+    """Look for the archipelago.json manifest of a folder world and apply it to its world type."""
+    manifest = {}
+    for dirpath, dirnames, filenames in os.walk(world_source.resolved_path):
+        for file in filenames:
+            if file.endswith("archipelago.json"):
+                with open(os.path.join(dirpath, file), mode="r", encoding="utf-8") as manifest_file:
+                    manifest = json.load(manifest_file)
                 break
-        game = manifest.get("game")
-        if game in AutoWorldRegister.world_types:
-            AutoWorldRegister.world_types[game].world_version = tuplize_version(manifest.get("world_version", "0.0.0"))
-            AutoWorldRegister.world_types[game].manifest = manifest
-
-if apworlds:
-    # encapsulation for namespace / gc purposes
-    def load_apworlds() -> None:
-        global apworlds
-        from .Files import APWorldContainer, InvalidDataError
-        core_compatible: list[tuple[WorldSource, APWorldContainer]] = []
-
-        def fail_world(game_name: str, reason: str, add_as_failed_to_load: bool = True) -> None:
-            if add_as_failed_to_load:
-                failed_world_loads[game_name] = reason
-            logging.warning(reason)
-
-        for apworld_source in apworlds:
-            apworld: APWorldContainer = APWorldContainer(apworld_source.resolved_path)
-            # populate metadata
+        if manifest:
+            break
+    game = manifest.get("game")
+    if game in AutoWorldRegister.world_types:
+        AutoWorldRegister.world_types[game].world_version = tuplize_version(manifest.get("world_version", "0.0.0"))
+        AutoWorldRegister.world_types[game].manifest = manifest
+
+
+def fail_world(game_name: str, reason: str, add_as_failed_to_load: bool = True) -> None:
+    if add_as_failed_to_load:
+        failed_world_loads[game_name] = reason
+    logging.warning(reason)
+
+
+def read_apworld(apworld_source: WorldSource) -> "APWorldContainer | None":
+    """Reads the manifest of an apworld, returning it if the apworld is compatible with this core version."""
+    from .Files import APWorldContainer, InvalidDataError
+    apworld: APWorldContainer = APWorldContainer(apworld_source.resolved_path)
+    # populate metadata
+    try:
+        apworld.read()
+    except InvalidDataError as e:
+        if version_tuple < (0, 7, 0):
+            logging.error(
+                f"Invalid or missing manifest file for {apworld_source.resolved_path}. "
+                "This apworld will stop working with Archipelago 0.7.0."
+            )
+            logging.error(e)
+        else:
+            raise e
+    except BadZipFile as e:
+        err_message = (f"The world source {apworld_source.resolved_path} is not a valid zip. "
+                       "It is likely either corrupted, or was packaged incorrectly.")
+
+        if sys.stdout:
+            raise RuntimeError(err_message) from e
+        else:
+            messagebox("Couldn't load worlds", err_message, error=True)
+            sys.exit(1)
+
+    if apworld.minimum_ap_version and apworld.minimum_ap_version > version_tuple:
+        fail_world(apworld.game,
+                   f"Did not load {apworld_source.path} "
+                   f"as its minimum core version {apworld.minimum_ap_version} "
+                   f"is higher than current core version {version_tuple}.")
+    elif apworld.maximum_ap_version and apworld.maximum_ap_version < version_tuple:
+        fail_world(apworld.game,
+                   f"Did not load {apworld_source.path} "
+                   f"as its maximum core version {apworld.maximum_ap_version} "
+                   f"is lower than current core version {version_tuple}.")
+    else:
+        return apworld
+    apworld_source.failed = True
+    return None
+
+
+def load_apworld(apworld_source: WorldSource, apworld: "APWorldContainer") -> None:
+    if apworld.game and apworld.game in AutoWorldRegister.world_types:
+        fail_world(apworld.game,
+                   f"Did not load {apworld_source.path} "
+                   f"as its game {apworld.game} is already loaded.",
+                   add_as_failed_to_load=False)
+    else:
+        apworld_module_paths[f"worlds.{Path(apworld_source.path).stem}"] = apworld_source.resolved_path
+
+        apworld_source.load()
+        if apworld.game in AutoWorldRegister.world_types:
+            # world could fail to load at this point
+            if apworld.world_version:
+                AutoWorldRegister.world_types[apworld.game].world_version = apworld.world_version
+
+            assert apworld.path
+            with ZipFile(apworld.path, "r") as zf:
+                manifest = apworld.read_contents(zf)
+            # version/compatible_version shouldn't be needed by world, makes it consistent with folder world
+            manifest.pop("version", None)
+            manifest.pop("compatible_version", None)
+            AutoWorldRegister.world_types[apworld.game].manifest = manifest
+
+
+def load_world_sources(sources: List[WorldSource]) -> None:
+    """Import world sources to trigger AutoWorldRegister, loose files first, then apworlds by descending version."""
+    for world_source in sources:
+        if not world_source.is_zip:
+            world_source.load()
+    for world_source in sources:
+        if not world_source.is_zip:
+            apply_manifest(world_source)
+
+    core_compatible = [(apworld_source, apworld) for apworld_source in sources if apworld_source.is_zip
+                       for apworld in [read_apworld(apworld_source)] if apworld]
+    # load highest version first
+    core_compatible.sort(
+        key=lambda element: element[1].world_version if element[1].world_version else Version(0, 0, 0),
+        reverse=True)
+    for apworld_source, apworld in core_compatible:
+        load_apworld(apworld_source, apworld)
+
+
+# The world index remembers which games each world source provides, along with everything needed about them
+# before they are imported, so that worlds only get imported once they are first needed.
+# Next to it, the data package and name groups of all indexed games are cached in the format of SharedDataPackage.
+# Both are rebuilt by importing all worlds whenever any world source is added, removed or changed.
+world_index_key = hashlib.sha1(local_folder.encode()).hexdigest()[:16]
+world_index_path = cache_path("worlds", f"index_{world_index_key}.json")
+world_data_package_path: Optional[str] = None
+"""cached data package of the indexed games, if there is one"""
+
+
+def read_world_index() -> dict[str, Any]:
+    """Returns the world index, if it is still up to date with the world sources."""
+    try:
+        with open(world_index_path, encoding="utf-8") as index_file:
+            index = json.load(index_file)
+    except (OSError, ValueError):
+        return {}
+    if index.get("version") != __version__ or index.get("data_package_version") != SHARED_DATA_PACKAGE_VERSION:
+        return {}
+    if not index.get("data_package") or not os.path.isfile(cache_path("worlds", index["data_package"])):
+        return {}
+    sources = index.get("sources", {})
+    if list(sources) != [world_source.resolved_path for world_source in world_sources]:
+        return {}
+    for world_source in world_sources:
+        if sources[world_source.resolved_path]["signature"] != world_source.signature:
+            return {}
+    return index
+
+
+def write_world_data_package(games: List[str]) -> Optional[str]:
+    """Caches the data package and name groups of the games, named by content, and returns the file name."""
+    world_types = {game: AutoWorldRegister.world_types[game] for game in games}
+    data = encode_shared_data_package(
+        {game: network_data_package["games"][game] for game in games},
+        item_name_groups={game: world_type.item_name_groups for game, world_type in world_types.items()},
+        location_name_groups={game: world_type.location_name_groups for game, world_type in world_types.items()},
+        non_hintable_names={game: world_type.hint_blacklist for game, world_type in world_types.items()},
+    )
+    file_name = f"data_package_{world_index_key}_{hashlib.sha256(data).hexdigest()[:16]}.bin"
+    path = cache_path("worlds", file_name)
+    try:
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f"{path}.{os.getpid()}", "wb") as data_file:
+                data_file.write(data)
+            os.replace(f"{path}.{os.getpid()}", path)
+    except OSError as e:
+        logging.warning(f"Could not write data package cache: {e}")
+        return None
+    # outdated files may still be mapped by running processes, which can prevent removing them
+    for entry in os.scandir(os.path.dirname(path)):
+        if entry.name.startswith(f"data_package_{world_index_key}_") and entry.name != file_name:
             try:
-                apworld.read()
-            except InvalidDataError as e:
-                if version_tuple < (0, 7, 0):
-                    logging.error(
-                        f"Invalid or missing manifest file for {apworld_source.resolved_path}. "
-                        "This apworld will stop working with Archipelago 0.7.0."
-                    )
-                    logging.error(e)
-                else:
-                    raise e
-            except BadZipFile as e:
-                err_message = (f"The world source {apworld_source.resolved_path} is not a valid zip. "
-                               "It is likely either corrupted, or was packaged incorrectly.")
+                os.remove(entry.path)
+            except OSError:
+                pass
+    return file_name
+
+
+def write_world_index() -> None:
+    sources: dict[str, Any] = {}
+    for world_source in world_sources:
+        games: list[dict[str, Any]] = []
+        for game in world_source.games:
+            world_type = AutoWorldRegister.world_types[game]
+            games.append({
+                "game": game,
+                "world_version": list(world_type.world_version),
+                "manifest": world_type.manifest,
+                "settings_key": world_type.settings_key,
+                "settings_name": get_settings_name(world_type),
+                "checksum": network_data_package["games"][game]["checksum"],
+            })
+        sources[world_source.resolved_path] = {
+            "signature": world_source.signature,
+            "failed": world_source.failed,
+            "games": games,
+        }
+    data_package_file = write_world_data_package([game for world_source in world_sources
+                                                  for game in world_source.games])
+    try:
+        os.makedirs(os.path.dirname(world_index_path), exist_ok=True)
+        temp_path = f"{world_index_path}.{os.getpid()}"
+        with open(temp_path, "w", encoding="utf-8") as index_file:
+            json.dump({"version": __version__, "sources": sources, "data_package": data_package_file,
+                       "data_package_version": SHARED_DATA_PACKAGE_VERSION}, index_file)
+        os.replace(temp_path, world_index_path)
+    except OSError as e:
+        logging.warning(f"Could not write world index: {e}")
+
+
+def add_indexed_worlds(sources: dict[str, Any]) -> None:
+    retry: list[WorldSource] = []
+    for world_source in world_sources:
+        source = sources[world_source.resolved_path]
+        if source["failed"]:
+            retry.append(world_source)
+            continue
+        if world_source.is_zip and source["games"]:
+            apworld_module_paths[f"worlds.{Path(world_source.path).stem}"] = world_source.resolved_path
+        for world in source["games"]:
+            AutoWorldRegister.world_types.add_lazy(world["game"], LazyWorld(
+                world_source.load, Version(*world["world_version"]), world["manifest"],
+                world["settings_key"], world["settings_name"], world["checksum"]))
+    # sources that failed to load before are not indexed, give them another try
+    load_world_sources(retry)
+
+
+network_data_package: DataPackage
+"""Data package of all games, importing all worlds when first accessed."""
+
+world_index = read_world_index()
+if world_index:
+    add_indexed_worlds(world_index["sources"])
+    world_data_package_path = cache_path("worlds", world_index["data_package"])
+else:
+    load_world_sources(world_sources)
+    # Build the data package for each game.
+    network_data_package = {
+        "games": {world_name: world.get_data_package_data()
+                  for world_name, world in AutoWorldRegister.world_types.items()},
+    }
+    write_world_index()
+del world_index
+
+
+def __getattr__(name: str) -> Any:
+    if name == "network_data_package":
+        global network_data_package
+        games: dict[str, GamesPackage] = {}
+        for game in AutoWorldRegister.world_types:
+            try:
+                games[game] = get_game_data_package(game)
+            except KeyError:
+                pass  # world failed to import
+        network_data_package = {"games": games}
+        return network_data_package
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@cache_argsless
+def get_shared_data_package() -> Optional[SharedDataPackage]:
+    """Maps the data package cached with the world index read-only, if there is one."""
+    if not world_data_package_path:
+        return None
+    try:
+        with open(world_data_package_path, "rb") as data_file:
+            return SharedDataPackage(mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ))
+    except (OSError, ValueError, VersionException) as e:
+        logging.warning(f"Could not read data package cache: {e}")
+        return None
+
+
+def get_game_data_package(game: str) -> GamesPackage:
+    """Returns the data package of a single game, from the cache or else by importing only its world."""
+    data_package: Optional[DataPackage] = globals().get("network_data_package")
+    if data_package is not None:
+        return data_package["games"][game]
+    shared = get_shared_data_package()
+    if shared is not None and game in shared and game in AutoWorldRegister.world_types:
+        package = dict(shared[game])
+        package["item_name_to_id"] = package["item_name_to_id"].to_dict()
+        package["location_name_to_id"] = package["location_name_to_id"].to_dict()
+        return cast(GamesPackage, package)
+    return AutoWorldRegister.world_types[game].get_data_package_data()
+
+
+class GameStaticData(NamedTuple):
+    item_name_groups: Mapping[str, AbstractSet[str]]
+    location_name_groups: Mapping[str, AbstractSet[str]]
+    hint_blacklist: AbstractSet[str]
+
+
+def get_game_static_data(game: str) -> GameStaticData:
+    """Returns what a server needs to know about a game besides its data package, importing its world if not cached."""
+    shared = get_shared_data_package()
+    if shared is not None and AutoWorldRegister.world_types.get_lazy(game) and game in shared:
+        return GameStaticData(shared.per_game("item_name_groups")[game],
+                              shared.per_game("location_name_groups")[game],
+                              shared.per_game("non_hintable_names")[game])
+    world_type = AutoWorldRegister.world_types[game]
+    return GameStaticData(world_type.item_name_groups, world_type.location_name_groups, world_type.hint_blacklist)
 
-                if sys.stdout:
-                    raise RuntimeError(err_message) from e
-                else:
-                    messagebox("Couldn't load worlds", err_message, error=True)
-                    sys.exit(1)
-
-            if apworld.minimum_ap_version and apworld.minimum_ap_version > version_tuple:
-                fail_world(apworld.game,
-                           f"Did not load {apworld_source.path} "
-                           f"as its minimum core version {apworld.minimum_ap_version} "
-                           f"is higher than current core version {version_tuple}.")
-            elif apworld.maximum_ap_version and apworld.maximum_ap_version < version_tuple:
-                fail_world(apworld.game,
-                           f"Did not load {apworld_source.path} "
-                           f"as its maximum core version {apworld.maximum_ap_version} "
-                           f"is lower than current core version {version_tuple}.")
-            else:
-                core_compatible.append((apworld_source, apworld))
-        # load highest version first
-        core_compatible.sort(
-            key=lambda element: element[1].world_version if element[1].world_version else Version(0, 0, 0),
-            reverse=True)
-
-        apworld_module_specs = {}
-        class APWorldModuleFinder(importlib.abc.MetaPathFinder):
-            def find_spec(
-                    self, fullname: str, _path: Sequence[str] | None, _target: ModuleType = None
-            ) -> importlib.machinery.ModuleSpec | None:
-                return apworld_module_specs.get(fullname)
-
-        sys.meta_path.insert(0, APWorldModuleFinder())
-
-        for apworld_source, apworld in core_compatible:
-            if apworld.game and apworld.game in AutoWorldRegister.world_types:
-                fail_world(apworld.game,
-                           f"Did not load {apworld_source.path} "
-                           f"as its game {apworld.game} is already loaded.",
-                           add_as_failed_to_load=False)
-            else:
-                importer = zipimport.zipimporter(apworld_source.resolved_path)
-                world_name = Path(apworld.path).stem
-
-                spec = importer.find_spec(f"worlds.{world_name}")
-                apworld_module_specs[f"worlds.{world_name}"] = spec
-
-                apworld_source.load()
-                if apworld.game in AutoWorldRegister.world_types:
-                    # world could fail to load at this point
-                    if apworld.world_version:
-                        AutoWorldRegister.world_types[apworld.game].world_version = apworld.world_version
-
-                    assert apworld.path
-                    with ZipFile(apworld.path, "r") as zf:
-                        manifest = apworld.read_contents(zf)
-                    # version/compatible_version shouldn't be needed by world, makes it consistent with folder world
-                    manifest.pop("version", None)
-                    manifest.pop("compatible_version", None)
-                    AutoWorldRegister.world_types[apworld.game].manifest = manifest
-
-    load_apworlds()
-    del load_apworlds
-
-del apworlds
-
-# Build the data package for each game.
-network_data_package: DataPackage = {
-    "games": {world_name: world.get_data_package_data() for world_name, world in AutoWorldRegister.world_types.items()},
-}
 
+def get_game_checksum(game: str) -> Optional[str]:
+    """Returns the checksum of a game's data package, without importing its world if it is indexed."""
+    lazy_world = AutoWorldRegister.world_types.get_lazy(game)
+    if lazy_world:
+        return lazy_world.checksum
+    if game not in AutoWorldRegister.world_types:
+        return None
+    return get_game_data_package(game)["checksum"]
@@ -7,10 +7,11 @@ naively passed to BizHawk without validation or modification.
 
 import asyncio
 import base64
+import collections
 import enum
 import json
 import sys
-from typing import Any, Sequence
+from typing import Any, Iterable, Sequence
 
 
 BIZHAWK_SOCKET_PORT_RANGE_START = 43055
@@ -46,47 +47,132 @@ class SyncError(Exception):
 class BizHawkContext:
     streams: tuple[asyncio.StreamReader, asyncio.StreamWriter] | None
     connection_status: ConnectionStatus
+    watches: dict[int, bytes]
+    """The latest data of each watched memory range, by watch id"""
     _lock: asyncio.Lock
     _port: int | None
+    _next_request_id: int
+    _next_watch_id: int
+    _pending_requests: dict[int, asyncio.Future[Any]]
+    _pending_untagged: collections.deque[asyncio.Future[Any]]
+    _changed_watches: set[int]
+    _receive_task: asyncio.Task[None] | None
 
     def __init__(self) -> None:
         self.streams = None
         self.connection_status = ConnectionStatus.NOT_CONNECTED
+        self.watches = {}
         self._lock = asyncio.Lock()
         self._port = None
+        self._next_request_id = 0
+        self._next_watch_id = 0
+        self._pending_requests = {}
+        self._pending_untagged = collections.deque()
+        self._changed_watches = set()
+        self._receive_task = None
+
+    def _start_receiving(self, streams: tuple[asyncio.StreamReader, asyncio.StreamWriter]) -> None:
+        self.streams = streams
+        self._receive_task = asyncio.create_task(self._receive_loop(streams[0]), name="BizHawkReceive")
+
+    async def _receive_loop(self, reader: asyncio.StreamReader) -> None:
+        reason = "Connection closed"
+        try:
+            while True:
+                line = await reader.readline()
+                if line == b"":
+                    break
+                self._receive(line)
+        except ConnectionResetError:
+            reason = "Connection reset"
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            # such as an over-long line, after which the connection can't be trusted to be in sync anymore
+            reason = f"Failed to read from the connector: {exc!r}"
+        if self.streams is not None and self.streams[0] is reader:
+            self._receive_task = None
+            self._close(reason)
+
+    def _receive(self, line: bytes) -> None:
+        """Hands a line from the connector to whatever is waiting for it"""
+        if self.connection_status == ConnectionStatus.TENTATIVE:
+            self.connection_status = ConnectionStatus.CONNECTED
 
-    async def _send_message(self, message: str):
-        async with self._lock:
-            if self.streams is None:
-                raise NotConnectedError("You tried to send a request before a connection to BizHawk was made")
-
-            try:
-                reader, writer = self.streams
-                writer.write(message.encode("utf-8") + b"\n")
-                await asyncio.wait_for(writer.drain(), timeout=5)
+        try:
+            message = json.loads(line)
+        except ValueError:
+            message = None
+
+        if isinstance(message, dict) and "id" in message:
+            future = self._pending_requests.pop(message["id"], None)
+            if future is not None and not future.done():
+                future.set_result(message["responses"])
+        elif isinstance(message, dict) and "watches" in message:
+            for update in message["watches"]:
+                if update["id"] in self.watches:
+                    self.watches[update["id"]] = base64.b64decode(update["value"])
+                    self._changed_watches.add(update["id"])
+        elif self._pending_untagged:
+            future = self._pending_untagged.popleft()
+            if not future.done():
+                future.set_result(line.decode("utf-8"))
+
+    def _close(self, reason: str) -> None:
+        """Closes the connection and fails every request still waiting for a response"""
+        if self.streams is not None:
+            self.streams[1].close()
+            self.streams = None
+        if self._receive_task is not None:
+            self._receive_task.cancel()
+            self._receive_task = None
+        self.connection_status = ConnectionStatus.NOT_CONNECTED
 
-                res = await asyncio.wait_for(reader.readline(), timeout=5)
+        futures = [*self._pending_requests.values(), *self._pending_untagged]
+        self._pending_requests.clear()
+        self._pending_untagged.clear()
+        for future in futures:
+            if not future.done():
+                future.set_exception(RequestFailedError(reason))
+        self.watches.clear()
+        self._changed_watches.clear()
+
+    async def _send_message(self, message: str, request_id: int | None = None) -> Any:
+        """Sends a line to the connector and waits for its response, without blocking other requests.
+
+        Responses to requests with an id are matched by that id, other responses are matched in order."""
+        if self.streams is None:
+            raise NotConnectedError("You tried to send a request before a connection to BizHawk was made")
+
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        if request_id is None:
+            self._pending_untagged.append(future)
+        else:
+            self._pending_requests[request_id] = future
 
-                if res == b"":
-                    writer.close()
-                    self.streams = None
-                    self.connection_status = ConnectionStatus.NOT_CONNECTED
+        try:
+            async with self._lock:
+                if self.streams is None:
                     raise RequestFailedError("Connection closed")
+                writer = self.streams[1]
+                writer.write(message.encode("utf-8") + b"\n")
+                await asyncio.wait_for(writer.drain(), timeout=5)
 
-                if self.connection_status == ConnectionStatus.TENTATIVE:
-                    self.connection_status = ConnectionStatus.CONNECTED
+            return await asyncio.wait_for(future, timeout=5)
+        except asyncio.TimeoutError as exc:
+            self._close("Connection timed out")
+            raise RequestFailedError("Connection timed out") from exc
+        except ConnectionResetError as exc:
+            self._close("Connection reset")
+            raise RequestFailedError("Connection reset") from exc
+        finally:
+            if request_id is not None:
+                self._pending_requests.pop(request_id, None)
 
-                return res.decode("utf-8")
-            except asyncio.TimeoutError as exc:
-                writer.close()
-                self.streams = None
-                self.connection_status = ConnectionStatus.NOT_CONNECTED
-                raise RequestFailedError("Connection timed out") from exc
-            except ConnectionResetError as exc:
-                writer.close()
-                self.streams = None
-                self.connection_status = ConnectionStatus.NOT_CONNECTED
-                raise RequestFailedError("Connection reset") from exc
+    async def _send_requests(self, req_list: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        request_id = self._next_request_id
+        self._next_request_id += 1
+        return await self._send_message(json.dumps({"id": request_id, "requests": req_list}), request_id)
 
 
 async def connect(ctx: BizHawkContext) -> bool:
@@ -97,7 +183,7 @@ async def connect(ctx: BizHawkContext) -> bool:
 
     for port in ports:
         try:
-            ctx.streams = await asyncio.open_connection("127.0.0.1", port)
+            ctx._start_receiving(await asyncio.open_connection("127.0.0.1", port))
             ctx.connection_status = ConnectionStatus.TENTATIVE
             ctx._port = port
             return True
@@ -112,10 +198,7 @@ async def connect(ctx: BizHawkContext) -> bool:
 
 def disconnect(ctx: BizHawkContext) -> None:
     """Closes the connection to the connector script."""
-    if ctx.streams is not None:
-        ctx.streams[1].close()
-        ctx.streams = None
-    ctx.connection_status = ConnectionStatus.NOT_CONNECTED
+    ctx._close("Disconnected")
 
 
 async def get_script_version(ctx: BizHawkContext) -> int:
@@ -126,7 +209,7 @@ async def send_requests(ctx: BizHawkContext, req_list: list[dict[str, Any]]) ->
     """Sends a list of requests to the BizHawk connector and returns their responses.
 
     It's likely you want to use the wrapper functions instead of this."""
-    responses = json.loads(await ctx._send_message(json.dumps(req_list)))
+    responses = await ctx._send_requests(req_list)
     errors: list[ConnectorError] = []
 
     for response in responses:
@@ -334,3 +417,60 @@ async def write(ctx: BizHawkContext, write_list: Sequence[tuple[int, Sequence[in
     - `value` is a list of bytes to write, in order, starting at `address`
     - `domain` is the name of the region of memory the address corresponds to"""
     await guarded_write(ctx, write_list, [])
+
+
+async def watch(ctx: BizHawkContext, watch_list: Sequence[tuple[int, int, str]]) -> list[int]:
+    """Subscribes to changes of 1 or more memory ranges, and returns an id for each range.
+
+    Items in `watch_list` should be organized `(address, size, domain)` where
+    - `address` is the address of the first byte of data
+    - `size` is the number of bytes to watch
+    - `domain` is the name of the region of memory the address corresponds to
+
+    The connector sends the data of a watched range once, and then again at the end of any frame where it changed.
+    The latest data is kept in `ctx.watches` by id, and `get_watch_updates` returns the ranges that changed since
+    they were last returned. Watches end when the connection does."""
+    watch_ids = [*range(ctx._next_watch_id, ctx._next_watch_id + len(watch_list))]
+    ctx._next_watch_id += len(watch_list)
+    for watch_id in watch_ids:
+        ctx.watches[watch_id] = b""
+
+    res = await send_requests(ctx, [{
+        "type": "WATCH",
+        "id": watch_id,
+        "address": address,
+        "size": size,
+        "domain": domain
+    } for watch_id, (address, size, domain) in zip(watch_ids, watch_list)])
+
+    for item in res:
+        if item["type"] != "WATCH_RESPONSE":
+            raise SyncError(f"Expected response of type WATCH_RESPONSE but got {item['type']}")
+
+    return watch_ids
+
+
+async def unwatch(ctx: BizHawkContext, watch_ids: Sequence[int]) -> None:
+    """Ends the given watches. See `watch` for more info."""
+    for watch_id in watch_ids:
+        ctx.watches.pop(watch_id, None)
+        ctx._changed_watches.discard(watch_id)
+
+    res = await send_requests(ctx, [{"type": "UNWATCH", "id": watch_id} for watch_id in watch_ids])
+
+    for item in res:
+        if item["type"] != "UNWATCH_RESPONSE":
+            raise SyncError(f"Expected response of type UNWATCH_RESPONSE but got {item['type']}")
+
+
+def get_watch_updates(ctx: BizHawkContext, watch_ids: Iterable[int]) -> dict[int, bytes]:
+    """Returns the latest data of each of the given watches that changed since it was last returned, by watch id.
+
+    Only the given watches are marked as seen, so clients with different watches on the same connection don't take
+    each other's updates."""
+    updates: dict[int, bytes] = {}
+    for watch_id in watch_ids:
+        if watch_id in ctx._changed_watches:
+            ctx._changed_watches.remove(watch_id)
+            updates[watch_id] = ctx.watches[watch_id]
+    return updates
@@ -56,6 +56,9 @@ class AutoBizHawkClientRegister(abc.ABCMeta):
 
     @staticmethod
     async def get_handler(ctx: "BizHawkClientContext", system: str) -> BizHawkClient | None:
+        from ..AutoWorld import AutoWorldRegister
+        # handlers are registered by their worlds, any of which could handle this rom
+        AutoWorldRegister.world_types.load_all()
         for systems, handlers in AutoBizHawkClientRegister.game_handlers.items():
             if system in systems:
                 for handler in handlers.values():
@@ -15,11 +15,11 @@ import Patch
 import Utils
 
 from . import BizHawkContext, ConnectionStatus, NotConnectedError, RequestFailedError, connect, disconnect, get_hash, \
-    get_script_version, get_system, ping, display_message
+    get_script_version, get_system, display_message
 from .client import BizHawkClient, AutoBizHawkClientRegister
 
 
-EXPECTED_SCRIPT_VERSION = 1
+EXPECTED_SCRIPT_VERSION = 2
 
 
 class AuthStatus(enum.IntEnum):
@@ -254,13 +254,13 @@ async def _game_watcher(ctx: BizHawkClientContext):
 
             showed_connecting_message = False
 
-            await ping(ctx.bizhawk_ctx)
+            # Any request keeps the connection alive, so this doubles as a ping
+            rom_hash = await get_hash(ctx.bizhawk_ctx)
 
             if not showed_connected_message:
                 showed_connected_message = True
                 logger.info("Connected to BizHawk")
 
-            rom_hash = await get_hash(ctx.bizhawk_ctx)
             if ctx.rom_hash is not None and ctx.rom_hash != rom_hash:
                 if ctx.server is not None and not ctx.server.socket.closed:
                     logger.info(f"ROM changed. Disconnecting from server.")
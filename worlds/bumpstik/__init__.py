@@ -40,6 +40,8 @@ class BumpStikWorld(World):
     item_name_groups = item_groups
 
     required_client_version = (0, 3, 8)
+    thread_safe_rules = True
+    compact_item_counts = True
 
     options: BumpstikOptions
     options_dataclass = BumpstikOptions
@@ -78,6 +78,8 @@ class FF1Client(BizHawkClient):
     weapons_queue: deque[int]
     armor_queue: deque[int]
     consumable_stack_amounts: dict[str, int] | None
+    locations_watch: int | None
+    locations_changed: bool
 
     def __init__(self) -> None:
         self.wram = "RAM"
@@ -87,6 +89,8 @@ class FF1Client(BizHawkClient):
         self.weapons_queue = deque()
         self.armor_queue = deque()
         self.guard_character = 0x00
+        self.locations_watch = None
+        self.locations_changed = True
 
     async def validate_rom(self, ctx: "BizHawkClientContext") -> bool:
         try:
@@ -109,6 +113,7 @@ class FF1Client(BizHawkClient):
         self.consumable_stack_amounts = None
         self.weapons_queue = deque()
         self.armor_queue = deque()
+        self.locations_changed = True
 
         return True
 
@@ -156,10 +161,26 @@ class FF1Client(BizHawkClient):
             # The connector didn't respond. Exit handler and return to main loop to reconnect
             pass
 
+    def on_package(self, ctx: "BizHawkClientContext", cmd: str, args: dict) -> None:
+        if cmd == "Connected":
+            self.locations_changed = True
+
     async def location_check(self, ctx: "BizHawkClientContext"):
+        # The connector tells us when the locations array changes, so it is only read and checked after that
+        if self.locations_watch not in ctx.bizhawk_ctx.watches:
+            self.locations_watch = (await bizhawk.watch(
+                ctx.bizhawk_ctx,
+                [(locations_array_start, locations_array_length, self.sram)]))[0]
+            self.locations_changed = True
+        if bizhawk.get_watch_updates(ctx.bizhawk_ctx, [self.locations_watch]):
+            self.locations_changed = True
+        if not self.locations_changed:
+            return
+
         locations_data = await self.read_sram_values_guarded(ctx, locations_array_start, locations_array_length)
         if locations_data is None:
             return
+        self.locations_changed = False
         locations_checked = []
         if len(locations_data) > 0xFE and locations_data[0xFE] & 0x02 != 0 and not ctx.finished_game:
             await ctx.send_msgs([
@@ -66,6 +66,7 @@ class L2ACWorld(World):
         "Party members": {name for name, data in l2ac_item_table.items() if data.type is ItemType.PARTY_MEMBER},
     }
     required_client_version: Tuple[int, int, int] = (0, 4, 4)
+    output_in_process: ClassVar[bool] = True
 
     # L2ACWorld specific properties
     rom_name: bytearray
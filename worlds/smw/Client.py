@@ -77,6 +77,21 @@ SMW_BOSS_STATES                = [0x80, 0xC0, 0xC1]
 SMW_UNCOLLECTABLE_LEVELS       = [0x25, 0x07, 0x0B, 0x40, 0x0E, 0x1F, 0x20, 0x1B, 0x1A, 0x35, 0x34, 0x31, 0x32]
 SMW_UNCOLLECTABLE_DRAGON_COINS = [0x24]
 
+# Ranges game_watcher reads in one batch each: the game state it checks before handling queues,
+# and the location and progress data it checks after them
+SMW_WATCHER_STATE_RANGES = [
+    (SMW_GAME_STATE_ADDR, 0x1), (SMW_MARIO_STATE_ADDR, 0x1), (SMW_BOSS_STATE_ADDR, 0x1),
+    (SMW_CURRENT_LEVEL_ADDR, 0x1), (SMW_MESSAGE_BOX_ADDR, 0x1), (SMW_PAUSE_ADDR, 0x1), (SMW_ACTIVE_BOSS_ADDR, 0x1),
+    (SMW_COIN_COUNT_ADDR, 0x1), (SMW_BONUS_STAR_ADDR, 0x1), (SMW_EGG_COUNT_ADDR, 0x3), (SMW_GOAL_DATA, 0xC),
+]
+SMW_WATCHER_LOCATION_RANGES = [
+    (SMW_EVENT_ROM_DATA, 0x60), (SMW_PROGRESS_DATA, 0x0F), (SMW_DRAGON_COINS_DATA, 0x0C), (SMW_MOON_DATA, 0x0C),
+    (SMW_HIDDEN_1UP_DATA, 0x0C), (SMW_BONUS_BLOCK_DATA, 0x0C), (SMW_BLOCKSANITY_DATA, SMW_BLOCKSANITY_BLOCK_COUNT),
+    (SMW_BLOCKSANITY_FLAGS, 0xC), (SMW_LEVEL_CLEAR_FLAGS, 0x60), (SMW_PATH_DATA, 0x60), (SMW_NUM_EVENTS_ADDR, 0x1),
+    (SMW_GAME_STATE_ADDR, 0x1), (SMW_ROMHASH_START, ROMHASH_SIZE), (SMW_CURRENT_SUBLEVEL_ADDR, 2),
+    (SMW_RECV_PROGRESS_ADDR, 2), (SMW_GOAL_DATA, 0xC),
+]
+
 
 class SMWSNIClient(SNIClient):
     game = "Super Mario World"
@@ -470,8 +485,16 @@ class SMWSNIClient(SNIClient):
 
 
     async def game_watcher(self, ctx):
-        from SNIClient import snes_buffered_write, snes_flush_writes, snes_read
-        
+        from SNIClient import snes_read_snapshot
+
+        # reads are served from the batched reads of the current tick, until a write invalidates them
+        with snes_read_snapshot(ctx):
+            await self.watch_game(ctx)
+
+    async def watch_game(self, ctx):
+        from SNIClient import snes_buffered_write, snes_flush_writes, snes_read, snes_read_ranges
+
+        await snes_read_ranges(ctx, SMW_WATCHER_STATE_RANGES)
         boss_state = await snes_read(ctx, SMW_BOSS_STATE_ADDR, 0x1)
         game_state = await snes_read(ctx, SMW_GAME_STATE_ADDR, 0x1)
         mario_state = await snes_read(ctx, SMW_MARIO_STATE_ADDR, 0x1)
@@ -532,6 +555,7 @@ class SMWSNIClient(SNIClient):
         await self.handle_ring_link(ctx)
 
         new_checks = []
+        await snes_read_ranges(ctx, SMW_WATCHER_LOCATION_RANGES)
         event_data = await snes_read(ctx, SMW_EVENT_ROM_DATA, 0x60)
         progress_data = bytearray(await snes_read(ctx, SMW_PROGRESS_DATA, 0x0F))
         dragon_coins_data = bytearray(await snes_read(ctx, SMW_DRAGON_COINS_DATA, 0x0C))